@@ -0,0 +1,95 @@
+"""Throughput of parsing raw model outputs into validated actions.
+
+Cycles through a mix of model outputs (with and without a <think> block, code fences, and a share
+of malformed outputs) and parses each one with `MissionEnvironment.parse_action`'s parser. For
+comparison, `naive` strips thinking with a regex, decodes with json.loads and only runs the
+existing existence/availability/required-key checks.
+
+Usage: python benchmarks/bench_action_parser.py [--outputs 1000000] [--malformed 0.1]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+from common import env_config
+from uav_mission_env.environment import MissionEnvironment
+
+_THINK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+def make_outputs(count: int, malformed: float, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    outputs = []
+    for i in range(count):
+        call = {"name": "next_goal", "parameters": {"next_goal": f"waypoint_{rng.randrange(20)}"}}
+        broken = rng.random() < malformed
+        fault = rng.randrange(4) if broken else None
+        if fault == 0:
+            call["parameters"]["next_goal"] = 3
+        elif fault == 1:
+            call["name"] = "fly_to"
+        text = json.dumps({"justification": "Closest unvisited location. " * rng.randrange(1, 5),
+                           "tool_call": call, "information": "No target visible."})
+        if fault == 2:
+            text = text[:-5]
+        elif fault == 3:
+            text = "I cannot decide."
+        kind = i % 3
+        if kind == 1:
+            text = "<think>" + "The image shows a parking lot. " * rng.randrange(5, 40) + "</think>\n" + text
+        elif kind == 2:
+            text = "```json\n" + text + "\n```"
+        outputs.append(text)
+    return outputs
+
+
+def naive_parse(env: MissionEnvironment, text: str):
+    try:
+        output = json.loads(_THINK.sub("", text).strip().removeprefix("```json").removesuffix("```"))
+        tool_call = output["tool_call"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return env.tool_validator.validate(tool_call.get("name"), tool_call.get("parameters", {}), "execution")
+
+
+def run(parse, outputs: list, total: int) -> float:
+    count = len(outputs)
+    start = time.perf_counter()
+    for i in range(total):
+        parse(outputs[i % count])
+    return total / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outputs", type=int, default=1_000_000, help="Number of outputs to parse.")
+    parser.add_argument("--distinct", type=int, default=10_000, help="Distinct outputs cycled through.")
+    parser.add_argument("--malformed", type=float, default=0.1, help="Share of malformed outputs.")
+    args = parser.parse_args()
+
+    env = MissionEnvironment(config=env_config("disabled"))
+    outputs = make_outputs(args.distinct, args.malformed)
+    action_parser = env.action_parser
+    results = {
+        "parser": run(lambda text: action_parser.parse(text, "execution"), outputs, args.outputs),
+        "naive": run(lambda text: naive_parse(env, text), outputs, args.outputs),
+    }
+    errors = {}
+    for text in outputs:
+        result = action_parser.parse(text, "execution")
+        if not result.ok:
+            errors[result.error.code] = errors.get(result.error.code, 0) + 1
+    print(json.dumps({
+        "outputs": args.outputs,
+        "outputs_per_sec": results,
+        "error_codes": errors,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Check per-step memory allocations of a text-only environment with tracemalloc.
+
+Reports the peak of memory allocated during a single step (transient garbage) and the memory
+retained per step, and exits with code 1 if either exceeds its bound.
+
+Usage: python benchmarks/bench_allocations.py [--steps N] [--max-step-peak BYTES] [--max-retained BYTES]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tracemalloc
+
+from common import env_config, scripted_action
+from uav_mission_env.environment import MissionEnvironment
+
+
+def measure(steps: int, warmup: int) -> dict:
+    env = MissionEnvironment(config=env_config("disabled"))
+    seeds = iter(range(10**9))
+    env.reset(seed=next(seeds))
+
+    def step() -> bool:
+        _, _, terminated, truncated, _ = env.step(scripted_action(env))
+        return terminated or truncated
+
+    # Fill the per-state and condition caches before measuring
+    for _ in range(warmup):
+        if step():
+            env.reset(seed=next(seeds))
+
+    tracemalloc.start()
+    peaks = []
+    start_current, _ = tracemalloc.get_traced_memory()
+    for _ in range(steps):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        done = step()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        if done:
+            # Resets are not part of the per-step budget
+            env.reset(seed=next(seeds))
+    end_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "steps": steps,
+        "step_peak_max_bytes": max(peaks),
+        "step_peak_median_bytes": statistics.median(peaks),
+        "retained_bytes_per_step": (end_current - start_current) / steps,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=2000)
+    parser.add_argument("--max-step-peak", type=int, default=16 * 1024, help="Bound for the largest per-step allocation peak in bytes.")
+    parser.add_argument("--max-retained", type=float, default=64.0, help="Bound for the memory retained per step in bytes.")
+    args = parser.parse_args()
+
+    result = measure(args.steps, args.warmup)
+    print(json.dumps(result, indent=2))
+    failures = []
+    if result["step_peak_max_bytes"] > args.max_step_peak:
+        failures.append(f"step peak {result['step_peak_max_bytes']} B > {args.max_step_peak} B")
+    if result["retained_bytes_per_step"] > args.max_retained:
+        failures.append(f"retained {result['retained_bytes_per_step']:.1f} B/step > {args.max_retained} B/step")
+    for failure in failures:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""End-to-end throughput of mock agents against single, vector and server (asyncio) environments.
+
+Every agent is a `MockAgent` that answers with raw model output (think block + JSON), so the run
+covers observation building, output parsing, tool execution and transitions. Runs offline on the
+bundled synthetic dataset. Reported per mode:
+
+- episodes/s over the measured episodes (after one warm-up episode per agent);
+- p50/p99 latency of one environment call: `env.step` (single), `vector_env.step` for all agents
+  (vector) or one batched round trip for all agents (server);
+- CPU seconds per episode (this process, plus the server process in server mode);
+- RSS growth per episode and the peak RSS of this process.
+
+With a think time, agents think concurrently on threads, like agents waiting for a model server.
+
+Usage: python benchmarks/bench_end_to_end.py [--modes single vector server] [--agents 16] [--episodes 200]
+                                             [--think-time 0] [--error-rate 0.05] [--media-mode disabled]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_server import CONFIG_NAME, start_server
+from common import env_config
+from uav_mission_env.client import EnvClient
+from uav_mission_env.environment import MissionEnvironment
+from uav_mission_env.mock_agent import MockAgent
+from uav_mission_env.vector_env import VectorMissionEnvironment
+
+MAX_TURNS = 20
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """User + system CPU time of another process (Linux)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Agents:
+    """One MockAgent per environment; thinks concurrently when there is a think time."""
+
+    def __init__(self, count: int, think_time: float, error_rate: float):
+        self.agents = [MockAgent(seed=i, think_time=think_time, error_rate=error_rate) for i in range(count)]
+        self.executor = ThreadPoolExecutor(max_workers=count) if think_time > 0 else None
+
+    def act(self, observations: list) -> list:
+        if self.executor is None:
+            return [agent.act(observation) for agent, observation in zip(self.agents, observations)]
+        return list(self.executor.map(lambda pair: pair[0].act(pair[1]), zip(self.agents, observations)))
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def run_single(config: dict, agents: Agents, episodes: int, latencies: list, measuring: list) -> int:
+    envs = [MissionEnvironment(config=config, max_turns=MAX_TURNS) for _ in agents.agents]
+    seeds = iter(range(10**9))
+    observations = [env.reset(seed=next(seeds)) for env in envs]
+    done = 0
+    while done < episodes:
+        actions = agents.act(observations)
+        for i, (env, action) in enumerate(zip(envs, actions)):
+            start = time.perf_counter()
+            observation, _, terminated, truncated, _ = env.step(action)
+            latencies.append(time.perf_counter() - start)
+            if terminated or truncated:
+                done += 1
+                measuring(done)
+                observation = env.reset(seed=next(seeds))
+            observations[i] = observation
+    for env in envs:
+        env.close()
+    return done
+
+
+def run_vector(config: dict, agents: Agents, episodes: int, latencies: list, measuring: list) -> int:
+    vector_env = VectorMissionEnvironment(len(agents.agents), config=config, max_turns=MAX_TURNS)
+    observations = vector_env.reset(seed=0)
+    done = 0
+    while done < episodes:
+        actions = agents.act(observations)
+        start = time.perf_counter()
+        observations, _, terminations, truncations, _ = vector_env.step(actions)
+        latencies.append(time.perf_counter() - start)
+        for terminated, truncated in zip(terminations, truncations):
+            if terminated or truncated:
+                done += 1
+                measuring(done)
+    vector_env.close()
+    return done
+
+
+def run_server(config: dict, agents: Agents, episodes: int, latencies: list, measuring: list, client: EnvClient) -> int:
+    envs = client.create_envs(len(agents.agents), config=CONFIG_NAME, max_turns=MAX_TURNS)
+    seeds = iter(range(10**9))
+    observations = client.reset_batch(envs, [next(seeds) for _ in envs])
+    done = 0
+    while done < episodes:
+        actions = agents.act(observations)
+        start = time.perf_counter()
+        results = client.step_batch(envs, actions)
+        latencies.append(time.perf_counter() - start)
+        finished = []
+        for i, (observation, _, terminated, truncated, _) in enumerate(results):
+            observations[i] = observation
+            if terminated or truncated:
+                done += 1
+                measuring(done)
+                finished.append(i)
+        if finished:
+            reset = client.reset_batch([envs[i] for i in finished], [next(seeds) for _ in finished])
+            for i, observation in zip(finished, reset):
+                observations[i] = observation
+    client.batch([{"op": "close", "session": env.session_id} for env in envs])
+    return done
+
+
+def measure(mode: str, args, config: dict) -> dict:
+    agents = Agents(args.agents, args.think_time, args.error_rate)
+    warmup = args.agents
+    latencies: list = []
+    marks = {}
+
+    def measuring(done: int) -> None:
+        # Start measuring once every agent had a warm-up episode
+        if done == warmup:
+            latencies.clear()
+            marks.update(wall=time.perf_counter(), cpu=time.process_time(), rss=rss_bytes(),
+                         server_cpu=process_cpu_seconds(server.pid) if server else 0.0)
+
+    total = warmup + args.episodes
+    server = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if mode == "server":
+            server = start_server(os.path.join(tmp_dir, "env.sock"), config)
+        try:
+            if mode == "single":
+                done = run_single(config, agents, total, latencies, measuring)
+            elif mode == "vector":
+                done = run_vector(config, agents, total, latencies, measuring)
+            else:
+                with EnvClient(os.path.join(tmp_dir, "env.sock")) as client:
+                    done = run_server(config, agents, total, latencies, measuring, client)
+            wall = time.perf_counter() - marks["wall"]
+            cpu = time.process_time() - marks["cpu"]
+            if server:
+                cpu += process_cpu_seconds(server.pid) - marks["server_cpu"]
+            rss_growth = rss_bytes() - marks["rss"]
+        finally:
+            agents.close()
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+    measured = done - warmup
+    latencies.sort()
+    return {
+        "episodes": measured,
+        "episodes_per_sec": measured / wall,
+        "step_latency_ms": {
+            "p50": 1000 * statistics.median(latencies),
+            "p99": 1000 * latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+            "calls": len(latencies),
+        },
+        "cpu_seconds_per_episode": cpu / measured,
+        "rss_growth_bytes_per_episode": rss_growth / measured,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "malformed_outputs": sum(agent.malformed for agent in agents.agents),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["single", "vector", "server"], choices=["single", "vector", "server"])
+    parser.add_argument("--agents", type=int, default=16)
+    parser.add_argument("--episodes", type=int, default=200, help="Measured episodes per mode (after warm-up).")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds each agent thinks per step.")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of malformed agent outputs.")
+    parser.add_argument("--media-mode", default="disabled", choices=["encode", "reference", "disabled"])
+    args = parser.parse_args()
+
+    config = env_config(args.media_mode)
+    results = {}
+    for mode in args.modes:
+        results[mode] = measure(mode, args, config)
+        print(f"{mode:<7} {results[mode]['episodes_per_sec']:>9.1f} episodes/s  "
+              f"p50 {results[mode]['step_latency_ms']['p50']:.3f} ms  p99 {results[mode]['step_latency_ms']['p99']:.3f} ms",
+              file=sys.stderr)
+    print(json.dumps({"agents": args.agents, "think_time": args.think_time, "error_rate": args.error_rate,
+                      "media_mode": args.media_mode, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Encode latency against payload size per encoder, codec and quality.
+
+Encodes a JPEG source (synthetic dataset) and a PNG source (demo dataset), resized to the
+observation resolution and without augmentation, with every combination and reports the median
+latency and the base64 payload size. Use it to choose `image_encoding` for a bandwidth/CPU budget.
+
+Usage: python benchmarks/bench_image_encoding.py [--repeats N] [--width N --height N] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from common import DEMO_IMAGE_PATH, SYNTHETIC_IMAGE_PATH
+from uav_mission_env.utils.media_utils import IMAGE_CODECS, IMAGE_ENCODERS, load_image_from_path, pil_image_to_base64_str
+
+QUALITIES = (None, 90, 75, 50)
+
+
+def measure(image, codec: str, quality, encoder: str, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encoded = pil_image_to_base64_str(image, codec, quality=quality, encoder=encoder)
+        timings.append(time.perf_counter() - start)
+    return {"ms": round(1000 * statistics.median(timings), 3), "bytes": len(encoded)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+    rows = []
+    for source_name, path in (("jpeg_source", SYNTHETIC_IMAGE_PATH), ("png_source", DEMO_IMAGE_PATH)):
+        image = load_image_from_path(path).convert("RGB").resize((args.width, args.height))
+        for encoder in IMAGE_ENCODERS:
+            for codec in IMAGE_CODECS:
+                # Quality does not apply to PNG
+                for quality in (None,) if codec == "png" else QUALITIES:
+                    result = measure(image, codec, quality, encoder, args.repeats)
+                    rows.append({"source": source_name, "encoder": encoder, "codec": codec, "quality": quality, **result})
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{'source':<12} {'encoder':<8} {'codec':<6} {'quality':>7} {'ms':>9} {'bytes':>9}")
+    for row in rows:
+        quality = "default" if row["quality"] is None else row["quality"]
+        print(f"{row['source']:<12} {row['encoder']:<8} {row['codec']:<6} {quality:>7} {row['ms']:>9.3f} {row['bytes']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Compare resizes and crops from the decoded source with those served by an ImagePyramidCache.
+
+Encodes every image of the synthetic dataset at several resolutions (without augmentation, to
+isolate loading and resizing) and crops boxes of several sizes from them, --passes times, once from
+the source and once through a pyramid cache (the first pass builds the levels). Also checks that
+images in modes `Image.reduce` does not support (palette, bilevel, 16-bit) are served by the pyramid.
+
+Usage: python benchmarks/bench_image_pyramid.py [--passes N] [--images N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from common import SYNTHETIC_METADATA_PATH
+from uav_mission_env.utils import media_utils
+from uav_mission_env.utils.image_pyramid import ImagePyramidCache
+
+RESOLUTIONS = [(640, 480), (320, 240), (160, 120)]
+BOXES = [(0.1, 0.1, 0.9, 0.9), (0.2, 0.2, 0.5, 0.5), (0.4, 0.4, 0.5, 0.5)]
+ZOOM_SIZE = (160, 120)
+# (mode, PNG save options) of the images for the mode check
+MODES = [("P", {}), ("P", {"transparency": 0}), ("1", {}), ("I;16", {}), ("LA", {}), ("RGBA", {})]
+
+
+def crop_from_source(path: str, box) -> None:
+    image = media_utils.load_image_from_path(path)
+    width, height = image.size
+    image.crop((int(box[0] * width), int(box[1] * height), int(box[2] * width), int(box[3] * height))).resize(ZOOM_SIZE)
+
+
+def measure(paths: list, passes: int, pyramid) -> dict:
+    result = {}
+    for resolution in RESOLUTIONS:
+        start = time.perf_counter()
+        for _ in range(passes):
+            for path in paths:
+                media_utils.load_and_encode_image(path, augment=False, image_resolution=resolution, pyramid=pyramid)
+        result[f"encode_{resolution[0]}x{resolution[1]}_ms"] = round(1000 * (time.perf_counter() - start) / (passes * len(paths)), 3)
+    start = time.perf_counter()
+    for _ in range(passes):
+        for path in paths:
+            for box in BOXES:
+                if pyramid is None:
+                    crop_from_source(path, box)
+                else:
+                    pyramid.region(path, None, box, ZOOM_SIZE)
+    result["crop_ms"] = round(1000 * (time.perf_counter() - start) / (passes * len(paths) * len(BOXES)), 3)
+    return result
+
+
+def check_modes() -> list:
+    """Encode and crop 1400x1000 PNGs of every mode in MODES through a fresh pyramid; returns the failures."""
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        pyramid = ImagePyramidCache()
+        for index, (mode, options) in enumerate(MODES):
+            path = os.path.join(directory, f"mode_{index}.png")
+            Image.radial_gradient("L").resize((1400, 1000)).convert(mode).save(path, **options)
+            try:
+                media_utils.load_and_encode_image(path, augment=False, image_resolution=(320, 240), pyramid=pyramid)
+                pyramid.region(path, None, BOXES[1], ZOOM_SIZE)
+            except Exception as e:
+                failures.append(f"{mode} {options}: {type(e).__name__}: {e}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--passes", type=int, default=5)
+    parser.add_argument("--images", type=int, default=20)
+    args = parser.parse_args()
+    with open(SYNTHETIC_METADATA_PATH, "r") as f:
+        paths = [entry["media"][0]["path"] for entry in json.load(f)][:args.images]
+    pyramid = ImagePyramidCache()
+    results = {"source": measure(paths, args.passes, None), "pyramid": measure(paths, args.passes, pyramid)}
+    results["pyramid_stats"] = pyramid.stats()
+    results["mode_failures"] = check_modes()
+    print(json.dumps(results, indent=2))
+    return 1 if results["mode_failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Compare eager and selective encoding of multi-image waypoints.
+
+Builds a copy of the synthetic dataset with --frames images per waypoint and runs scripted episodes
+in encode mode, once with every image shown and once with `max_images` images shown per waypoint,
+where the agent requests --views further images with view_images at every waypoint.
+
+Usage: python benchmarks/bench_multi_image.py [--frames N] [--max-images N] [--views N] [--episodes N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from common import SYNTHETIC_METADATA_PATH, env_config, scripted_action
+from uav_mission_env.environment import MissionEnvironment
+
+
+def multi_image_metadata(frames: int, directory: str) -> str:
+    with open(SYNTHETIC_METADATA_PATH, "r") as f:
+        metadata = json.load(f)
+    for entry in metadata:
+        entry["media"] = [
+            {"path": f"data/synthetic_dataset/sample_{(entry['id'] + k) % len(metadata):04d}.jpg", "type": "image", "camera": f"cam{k}"}
+            for k in range(frames)
+        ]
+    path = os.path.join(directory, "metadata.json")
+    with open(path, "w") as f:
+        json.dump(metadata, f)
+    return path
+
+
+def measure(metadata_path: str, episodes: int, max_images, views: int) -> dict:
+    config = env_config("encode", metadata_path)
+    config["state_config"]["max_images"] = max_images
+    config["state_config"]["states"]["execution"]["tools"].append("view_images")
+    env = MissionEnvironment(config=config)
+    waypoint_observation = env.observations_tools["waypoint"]
+    encoded = 0
+    encode_media = waypoint_observation.encode_media
+
+    def counting_encode_media(media_list, **kwargs):
+        nonlocal encoded
+        encoded += len(media_list)
+        return encode_media(media_list, **kwargs)
+
+    waypoint_observation.encode_media = counting_encode_media
+    steps = payload_bytes = 0
+    start = time.perf_counter()
+    for episode in range(episodes):
+        observation = env.reset(seed=episode)
+        done = False
+        while not done:
+            catalog = observation.get("obs_payload", {}).get("media_catalog")
+            if views and catalog and env.current_state == "execution":
+                hidden = [item["index"] for item in catalog if not item["shown"]][:views]
+                if hidden:
+                    observation, _, terminated, truncated, _ = env.step({"tool_name": "view_images", "parameters": {"indices": hidden}})
+                    steps += 1
+                    payload_bytes += len(json.dumps(observation))
+            observation, _, terminated, truncated, _ = env.step(scripted_action(env))
+            steps += 1
+            payload_bytes += len(json.dumps(observation))
+            done = terminated or truncated
+    elapsed = time.perf_counter() - start
+    return {
+        "max_images": max_images,
+        "steps": steps,
+        "images_encoded_per_step": round(encoded / steps, 2),
+        "ms_per_step": round(1000 * elapsed / steps, 2),
+        "observation_bytes_per_step": round(payload_bytes / steps),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=6)
+    parser.add_argument("--max-images", type=int, default=1)
+    parser.add_argument("--views", type=int, default=1)
+    parser.add_argument("--episodes", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        metadata_path = multi_image_metadata(args.frames, directory)
+        results = {
+            "eager": measure(metadata_path, args.episodes, None, 0),
+            "selective": measure(metadata_path, args.episodes, args.max_images, args.views),
+        }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
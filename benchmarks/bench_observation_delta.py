@@ -0,0 +1,78 @@
+"""Report the bytes saved by delta observations on mock-agent episodes.
+
+Runs episodes with `observation_mode: delta`, rebuilds every observation with a DeltaDecoder and
+compares the JSON size of the deltas with that of the rebuilt (full mode) observations. With
+--check, the rebuilt observations are compared with a full mode environment stepped in lockstep
+(reference and disabled media modes; encode mode augments images per observation).
+
+Usage: python benchmarks/bench_observation_delta.py [--episodes N] [--media-modes reference,encode] [--check]
+"""
+
+import argparse
+import json
+import sys
+
+from common import env_config
+from uav_mission_env.environment import MissionEnvironment
+from uav_mission_env.mock_agent import MockAgent
+from uav_mission_env.observation_delta import DeltaDecoder
+
+
+def _size(observation: dict) -> int:
+    return len(json.dumps(observation, separators=(",", ":")))
+
+
+def measure(media_mode: str, episodes: int, check: bool) -> dict:
+    config = env_config(media_mode)
+    config["state_config"]["observation_mode"] = "delta"
+    env = MissionEnvironment(config=config)
+    full_env = MissionEnvironment(config=env_config(media_mode)) if check else None
+    decoder = DeltaDecoder()
+    agent = MockAgent(seed=0, error_rate=0.1)
+    full_bytes = delta_bytes = steps = mismatches = 0
+    for episode in range(episodes):
+        delta = env.reset(seed=episode)
+        expected = full_env.reset(seed=episode) if check else None
+        while True:
+            observation = decoder.apply(delta)
+            full_bytes += _size(observation)
+            delta_bytes += _size(delta)
+            mismatches += check and observation != expected
+            if not observation.get("obs_payload"):
+                break
+            action = agent.act(observation)
+            delta, _, terminated, truncated, _ = env.step(action)
+            if check:
+                expected = full_env.step(action)[0]
+            steps += 1
+            if terminated or truncated:
+                full_bytes += _size(decoder.apply(delta))
+                delta_bytes += _size(delta)
+                break
+    result = {
+        "episodes": episodes,
+        "steps": steps,
+        "full_bytes_per_step": round(full_bytes / (steps + episodes)),
+        "delta_bytes_per_step": round(delta_bytes / (steps + episodes)),
+        "full_bytes_per_episode": round(full_bytes / episodes),
+        "delta_bytes_per_episode": round(delta_bytes / episodes),
+        "savings": round(1 - delta_bytes / full_bytes, 3),
+    }
+    if check:
+        result["mismatches"] = mismatches
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=50)
+    parser.add_argument("--media-modes", default="reference,encode")
+    parser.add_argument("--check", action="store_true", help="compare with a full mode environment")
+    args = parser.parse_args()
+    results = {mode: measure(mode, args.episodes, args.check and mode != "encode") for mode in args.media_modes.split(",")}
+    print(json.dumps(results, indent=2))
+    return 1 if any(result.get("mismatches") for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
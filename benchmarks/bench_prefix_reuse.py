@@ -0,0 +1,45 @@
+"""Report how much of the prompts a prefix (KV) cache could reuse, per prompt layout.
+
+Runs scripted episodes on several environments and feeds every prompt's segments to a
+PrefixReuseTracker. Token counts are approximated with four characters per token.
+
+Usage: python benchmarks/bench_prefix_reuse.py [--envs N] [--episodes N]
+"""
+
+import argparse
+import json
+import sys
+
+from common import env_config, scripted_action
+from uav_mission_env.environment import MissionEnvironment
+from uav_mission_env.utils.prompt_utils import PROMPT_LAYOUTS, PrefixReuseTracker
+
+
+def measure(layout: str, num_envs: int, episodes: int) -> dict:
+    config = env_config("disabled")
+    config["state_config"]["prompt_layout"] = layout
+    config["state_config"]["prompt_segments"] = True
+    tracker = PrefixReuseTracker()
+    for env_index in range(num_envs):
+        env = MissionEnvironment(config=config)
+        for episode in range(episodes):
+            observation = env.reset(seed=env_index * episodes + episode)
+            while observation.get("obs_payload"):
+                tracker.observe(observation["obs_payload"]["prompt_segments"])
+                observation, _, terminated, truncated, _ = env.step(scripted_action(env))
+                if terminated or truncated:
+                    break
+    return tracker.summary()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--envs", type=int, default=4)
+    parser.add_argument("--episodes", type=int, default=25)
+    args = parser.parse_args()
+    print(json.dumps({layout: measure(layout, args.envs, args.episodes) for layout in PROMPT_LAYOUTS}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Run a sharded rollout plan with several local worker processes, one of which is killed mid-unit.
+
+Plans the same run twice: once worked by a single in-process worker (the reference) and once by
+--workers `python -m uav_mission_env.rollouts work` processes standing in for nodes. The first
+process is killed with SIGKILL once it has recorded an episode, so its unit is requeued after the
+lease and resumed by another worker. Checks that the merged logs are identical, that every seed
+occurs exactly once and that the merged episodes replay without divergences. Runs with sampled
+missions and with a sharded mission dataset. The distributed wall time includes process start-up
+and the lease expiry of the killed worker's unit.
+
+Usage: python benchmarks/bench_rollouts.py [--episodes N] [--unit-size N] [--workers N] [--num-envs N]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import REPO_ROOT, env_config
+from uav_mission_env.missions.mission_dataset import materialize_missions
+from uav_mission_env.missions.mission_generator import RandomMissionGenerator
+from uav_mission_env.missions.mission_queue import MissionBatchGenerator
+from uav_mission_env.missions.task import TaskRegistry
+from uav_mission_env.replay import ReplayEngine, load_episodes
+from uav_mission_env.rollouts import RolloutCoordinator, RolloutWorker
+from uav_mission_env.utils.config_loader import ConfigLoader
+
+LEASE_SECONDS = 2.0
+
+
+def complete_lines(path: str) -> int:
+    try:
+        with open(path, "r") as f:
+            return sum(line.endswith("\n") for line in f)
+    except FileNotFoundError:
+        return 0
+
+
+def run_distributed(root: str, workers: int, num_envs: int) -> dict:
+    environment = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "uav_mission_env.rollouts", "work", "--root", root,
+                          "--num-envs", str(num_envs), "--worker-id", f"node{index}"],
+                         cwd=REPO_ROOT, env=environment, stdout=subprocess.DEVNULL)
+        for index in range(workers)
+    ]
+    logs_dir = os.path.join(root, "logs")
+    killed_after = None
+    while processes[0].poll() is None:
+        partials = [name for name in os.listdir(logs_dir) if "@node0." in name]
+        recorded = sum(complete_lines(os.path.join(logs_dir, name)) for name in partials)
+        if recorded:
+            processes[0].send_signal(signal.SIGKILL)
+            processes[0].wait()
+            killed_after = recorded
+            break
+        time.sleep(0.01)
+    failed = sum(process.wait() != 0 for process in processes[1:])
+    return {"killed_after_episodes": killed_after, "failed_workers": failed}
+
+
+def run(name: str, config: dict, args, num_shards: int, directory: str) -> dict:
+    plan = dict(num_episodes=args.episodes, unit_size=args.unit_size, num_shards=num_shards, config=config,
+                lease_seconds=LEASE_SECONDS)
+    reference_root = os.path.join(directory, f"{name}_reference")
+    RolloutCoordinator(reference_root).plan(**plan)
+    start = time.perf_counter()
+    RolloutWorker(reference_root, worker_id="reference", num_envs=1).run()
+    reference_seconds = time.perf_counter() - start
+
+    distributed_root = os.path.join(directory, f"{name}_distributed")
+    coordinator = RolloutCoordinator(distributed_root)
+    coordinator.plan(**plan)
+    start = time.perf_counter()
+    result = run_distributed(distributed_root, args.workers, args.num_envs)
+    distributed_seconds = time.perf_counter() - start
+
+    reference_path = os.path.join(directory, f"{name}_reference.jsonl")
+    merged_path = os.path.join(directory, f"{name}_merged.jsonl")
+    RolloutCoordinator(reference_root).merge(reference_path)
+    coordinator.merge(merged_path)
+    with open(reference_path, "rb") as f_reference, open(merged_path, "rb") as f_merged:
+        identical = f_reference.read() == f_merged.read()
+    seeds = [episode["seed"] for episode in load_episodes(merged_path)]
+    missions = [episode["mission"]["id"] for episode in load_episodes(merged_path)]
+    report = ReplayEngine(config).replay_file(merged_path)
+    return {
+        **result,
+        "episodes": len(seeds),
+        "duplicate_seeds": len(seeds) - len(set(seeds)),
+        "missing_seeds": len(set(range(args.episodes)) - set(seeds)),
+        "distinct_missions": len(set(missions)),
+        "identical_to_reference": identical,
+        "replay_divergences": len(report.divergences),
+        "reference_seconds": round(reference_seconds, 2),
+        "distributed_seconds": round(distributed_seconds, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=120)
+    parser.add_argument("--unit-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--num-envs", type=int, default=4)
+    parser.add_argument("--num-shards", type=int, default=4)
+    args = parser.parse_args()
+    config = env_config("disabled")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        results["sampled"] = run("sampled", config, args, 1, directory)
+
+        dataset_path = os.path.join(directory, "missions.jsonl")
+        generator = RandomMissionGenerator(dataset_metadata_path=config["data_config"]["dataset_metadata_path"],
+                                           task_registry=TaskRegistry(ConfigLoader._load_default_task_config_path()))
+        materialize_missions(MissionBatchGenerator(generator, seed=0), args.episodes, dataset_path)
+        dataset_config = {**config, "data_config": {**config["data_config"], "mission_dataset_path": dataset_path}}
+        results["dataset"] = run("dataset", dataset_config, args, args.num_shards, directory)
+    print(json.dumps(results, indent=2))
+    ok = all(
+        result["identical_to_reference"] and not result["duplicate_seeds"] and not result["missing_seeds"]
+        and not result["replay_divergences"] and not result["failed_workers"]
+        for result in results.values()
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Loopback benchmark of the environment server: steps per second for sessions x request mode.
+
+Starts `uav_mission_env.server` in a subprocess on a Unix socket, creates the sessions and drives
+them with a scripted policy that only sees the remote observations. In `batched` mode every round is
+one batch request covering all sessions (finished episodes are reset within the same batch), in
+`single` mode every step is its own request from a pool of client threads.
+
+Usage: python benchmarks/bench_server.py [--sessions 1 16 256 1024] [--seconds 2] [--media-mode disabled]
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import REPO_ROOT, env_config
+from uav_mission_env.client import EnvClient
+
+_UNVISITED = re.compile(r"Locations to Visit \(Unvisited\):\*\* (\[.*?\])")
+
+
+def remote_action(observation: dict) -> dict:
+    """Visit the first unvisited waypoint listed in the prompt, land, then conclude."""
+    if observation.get("current_state") == "execution":
+        match = _UNVISITED.search(observation["obs_payload"]["prompt"])
+        waypoints = ast.literal_eval(match.group(1)) if match else []
+        return {"tool_name": "next_goal", "parameters": {"next_goal": waypoints[0] if waypoints else "ground"}}
+    return {
+        "tool_name": "report_final_conclusion",
+        "parameters": {"mission_completed_successfully": True, "conclusion": "", "waypoint": ""},
+    }
+
+
+# Name under which start_server offers the benchmark's environment config
+CONFIG_NAME = "bench"
+
+
+def start_server(socket_path: str, config: dict) -> subprocess.Popen:
+    """Start a server that offers `config` as CONFIG_NAME (written next to the socket)."""
+    config_path = socket_path + ".config.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uav_mission_env.server", "--unix", socket_path, "--config", f"{CONFIG_NAME}={config_path}"],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith("listening"):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    return process
+
+
+def run_batched(client: EnvClient, envs: list, config_seed: int, seconds: float) -> int:
+    seeds = iter(range(config_seed, 10**12))
+    observations = client.reset_batch(envs, [next(seeds) for _ in envs])
+    done = [False] * len(envs)
+    steps = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        requests = []
+        for env, observation, finished in zip(envs, observations, done):
+            if finished:
+                requests.append({"op": "reset", "session": env.session_id, "seed": next(seeds)})
+            else:
+                requests.append({"op": "step", "session": env.session_id, "action": remote_action(observation)})
+        results = client.batch(requests)
+        for i, (request, result) in enumerate(zip(requests, results)):
+            observations[i] = result["observation"]
+            if request["op"] == "step":
+                steps += 1
+                done[i] = result["terminated"] or result["truncated"]
+            else:
+                done[i] = False
+    return steps
+
+
+def run_single(client: EnvClient, envs: list, config_seed: int, seconds: float, threads: int) -> int:
+    deadline = time.perf_counter() + seconds
+
+    def drive(worker: int) -> int:
+        own_envs = envs[worker::threads]
+        seeds = iter(range(config_seed + worker * 10**9, 10**12))
+        observations = [env.reset(seed=next(seeds)) for env in own_envs]
+        steps = 0
+        while time.perf_counter() < deadline:
+            for i, env in enumerate(own_envs):
+                observation, _, terminated, truncated, _ = env.step(remote_action(observations[i]))
+                steps += 1
+                observations[i] = env.reset(seed=next(seeds)) if terminated or truncated else observation
+        return steps
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return sum(executor.map(drive, range(threads)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 16, 256, 1024])
+    parser.add_argument("--seconds", type=float, default=2.0, help="Measurement time per configuration.")
+    parser.add_argument("--media-mode", default="disabled", choices=["encode", "reference", "disabled"])
+    parser.add_argument("--threads", type=int, default=4, help="Client threads (and pooled connections) in single mode.")
+    args = parser.parse_args()
+
+    config = env_config(args.media_mode)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "env.sock")
+        server = start_server(socket_path, config)
+        try:
+            with EnvClient(socket_path, pool_size=args.threads) as client:
+                for num_sessions in args.sessions:
+                    envs = client.create_envs(num_sessions, config=CONFIG_NAME)
+                    for mode in ("batched", "single"):
+                        threads = min(args.threads, num_sessions)
+                        start = time.perf_counter()
+                        if mode == "batched":
+                            steps = run_batched(client, envs, 0, args.seconds)
+                        else:
+                            steps = run_single(client, envs, 0, args.seconds, threads)
+                        elapsed = time.perf_counter() - start
+                        results.append({"sessions": num_sessions, "mode": mode, "steps": steps, "steps_per_sec": steps / elapsed})
+                        print(f"{num_sessions:>6} sessions  {mode:<8} {steps / elapsed:>10.0f} steps/s", file=sys.stderr)
+                    client.batch([{"op": "close", "session": env.session_id} for env in envs])
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    print(json.dumps({"media_mode": args.media_mode, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
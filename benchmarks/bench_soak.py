@@ -0,0 +1,89 @@
+"""Soak test: run many episodes and check that memory stays flat.
+
+Missions alternate between large and small sizes so that stale per-episode state would show up.
+Traced memory is sampled at checkpoints after a warmup, each time right after a reset with the same
+seed. The run fails if it grows by more than `--max-growth` bytes per episode between the first
+and the last checkpoint, or if the waypoint storage holds more than the current mission.
+
+Usage: python benchmarks/bench_soak.py [--episodes N] [--checkpoints K] [--max-growth BYTES]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import env_config, run_episode
+from uav_mission_env.environment import MissionEnvironment
+
+CHECKPOINT_SEED = 0
+
+
+def soak(episodes: int, checkpoints: int, warmup: int) -> dict:
+    config = env_config("disabled")
+    config["data_config"]["mission_size"] = {"choices": [5, 50, 200], "weights": [0.6, 0.3, 0.1]}
+    env = MissionEnvironment(config=config)
+    mission_manager = env.mission_manager
+    seeds = iter(range(CHECKPOINT_SEED + 1, 10**12))
+
+    for _ in range(warmup):
+        run_episode(env, next(seeds))
+
+    interval = max(1, episodes // checkpoints)
+    # Preallocated, so recording a sample does not allocate traced memory itself
+    samples = np.zeros(episodes // interval, dtype=np.int64)
+    max_stored_waypoints = 0
+    stale_episodes = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for episode in range(1, episodes + 1):
+        run_episode(env, next(seeds))
+        stored = len(mission_manager.waypoint_manager.waypoints)
+        max_stored_waypoints = max(max_stored_waypoints, stored)
+        stale_episodes += stored != len(mission_manager.mission.waypoints)
+        if episode % interval == 0:
+            # Sample in the same episode state every time, so only leaked memory differs
+            env.reset(seed=CHECKPOINT_SEED)
+            gc.collect()
+            samples[episode // interval - 1] = tracemalloc.get_traced_memory()[0]
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    env.close()
+
+    growth = float(samples[-1] - samples[0]) / max(1, (len(samples) - 1) * interval)
+    return {
+        "episodes": episodes,
+        "episodes_per_sec": episodes / elapsed,
+        "traced_bytes": samples.tolist(),
+        "growth_bytes_per_episode": growth,
+        "max_stored_waypoints": max_stored_waypoints,
+        "stale_episodes": stale_episodes,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--checkpoints", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--max-growth", type=float, default=1.0, help="Bound for the memory growth per episode in bytes.")
+    args = parser.parse_args()
+
+    result = soak(args.episodes, args.checkpoints, args.warmup)
+    print(json.dumps(result, indent=2))
+    failures = []
+    if result["growth_bytes_per_episode"] > args.max_growth:
+        failures.append(f"memory grew by {result['growth_bytes_per_episode']:.2f} B/episode > {args.max_growth} B/episode")
+    if result["stale_episodes"]:
+        failures.append(f"{result['stale_episodes']} episodes kept waypoints of earlier missions")
+    for failure in failures:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Steps/sec of MissionEnvironment per media mode.
+
+Usage: python benchmarks/bench_text_only.py [--episodes N] [--modes disabled reference encode]
+"""
+
+import argparse
+import time
+
+from common import env_config, run_episode
+from uav_mission_env.environment import MissionEnvironment
+
+
+def bench_mode(media_mode: str, episodes: int) -> dict:
+    env = MissionEnvironment(config=env_config(media_mode))
+    steps = 0
+    start = time.perf_counter()
+    for seed in range(episodes):
+        steps += run_episode(env, seed)
+    elapsed = time.perf_counter() - start
+    env.close()
+    return {"media_mode": media_mode, "episodes": episodes, "steps": steps, "seconds": elapsed, "steps_per_sec": steps / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=2000)
+    parser.add_argument("--media-episodes", type=int, default=5, help="Episodes for the (slow) 'encode' mode.")
+    parser.add_argument("--modes", nargs="+", default=["disabled", "reference", "encode"])
+    args = parser.parse_args()
+
+    for media_mode in args.modes:
+        episodes = args.media_episodes if media_mode == "encode" else args.episodes
+        result = bench_mode(media_mode, episodes)
+        print(f"{result['media_mode']:>10}: {result['steps_per_sec']:>10.0f} steps/s ({result['steps']} steps in {result['seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
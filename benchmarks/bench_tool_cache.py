@@ -0,0 +1,69 @@
+"""Hit rate and time saved by the tool result cache for repeated crop calls.
+
+Agents crop one of a few regions (quadrants) of dataset images. Images are encoded without
+augmentation, as an agent working from `reference` media would, so calls on the same sample and
+region repeat across episodes. Runs the same call sequence with and without the cache.
+
+Usage: python benchmarks/bench_tool_cache.py [--calls 2000] [--samples 20] [--disk-path DIR]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from common import PACKAGE_DIR, env_config
+from uav_mission_env.environment import MissionEnvironment
+from uav_mission_env.utils.media_utils import load_and_encode_image
+
+QUADRANTS = [
+    {"x_min": 0.0, "y_min": 0.0, "x_max": 0.5, "y_max": 0.5},
+    {"x_min": 0.5, "y_min": 0.0, "x_max": 1.0, "y_max": 0.5},
+    {"x_min": 0.0, "y_min": 0.5, "x_max": 0.5, "y_max": 1.0},
+    {"x_min": 0.5, "y_min": 0.5, "x_max": 1.0, "y_max": 1.0},
+]
+
+
+def run(tool_cache, images: list, calls: int) -> dict:
+    config = env_config("disabled")
+    config["state_config"]["states"]["execution"]["tools"] = ["crop_zoom_image"]
+    config["state_config"]["tool_execution"] = {"tools": {"crop_zoom_image": {"mode": "inline"}}}
+    config["state_config"]["tool_cache"] = tool_cache
+    env = MissionEnvironment(config=config, max_turns=10**9)
+    env.reset(seed=0)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(calls):
+        image = rng.choice(images)
+        env.step({"tool_name": "crop_zoom_image", "parameters": {"image": image, "bbox": rng.choice(QUADRANTS)}})
+    elapsed = time.perf_counter() - start
+    result = {"calls_per_sec": calls / elapsed}
+    if env.tool_cache is not None:
+        stats = env.tool_cache.stats()
+        result.update({key: stats[key] for key in ("hit_rate", "hits", "disk_hits", "misses", "entries", "bytes")})
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=20, help="Distinct dataset images.")
+    parser.add_argument("--disk-path", default=None, help="Also use the on-disk tier in this directory.")
+    args = parser.parse_args()
+    images = [
+        load_and_encode_image(f"{PACKAGE_DIR}/data/synthetic_dataset/sample_{i:04d}.jpg", augment=False)
+        for i in range(args.samples)
+    ]
+    cache_config = {"max_entries": 1024}
+    if args.disk_path:
+        cache_config["disk_path"] = args.disk_path
+    print(json.dumps({
+        "without_cache": run(False, images, args.calls),
+        "with_cache": run(cache_config, images, args.calls),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
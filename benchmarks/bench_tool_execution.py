@@ -0,0 +1,70 @@
+"""Compare execution modes of a CPU-heavy tool: inline, thread pool and process pool.
+
+Every step issues `--calls` crop_zoom_image calls on a bundled image as one multi-call turn, and
+reports steps per second with the offload metrics from info['tool_execution']. Independent inline
+tools use the thread pool within a multi-call turn, so `inline` mostly differs from `thread` in
+how single calls run.
+
+Usage: python benchmarks/bench_tool_execution.py [--calls 4] [--steps 50] [--process-workers N]
+"""
+
+import argparse
+import base64
+import json
+import statistics
+import sys
+import time
+
+from common import SYNTHETIC_IMAGE_PATH, env_config
+from uav_mission_env.environment import MissionEnvironment
+
+
+def measure(mode: str, calls: int, steps: int, process_workers) -> dict:
+    config = env_config("disabled")
+    config["state_config"]["states"]["execution"]["tools"] = ["crop_zoom_image"]
+    config["state_config"]["tool_execution"] = {
+        "process_workers": process_workers,
+        "tools": {"crop_zoom_image": {"mode": mode}},
+    }
+    # Every step repeats the same crops, which the result cache would answer without running the tool
+    config["state_config"]["tool_cache"] = False
+    env = MissionEnvironment(config=config, max_turns=10**9)
+    env.reset(seed=0)
+    with open(SYNTHETIC_IMAGE_PATH, "rb") as f:
+        image = base64.b64encode(f.read()).decode("ascii")
+    actions = [
+        {"tool_name": "crop_zoom_image",
+         "parameters": {"image": image, "bbox": {"x_min": i / calls, "y_min": 0.0, "x_max": (i + 1) / calls, "y_max": 1.0}}}
+        for i in range(calls)
+    ]
+    env.step(actions)  # start the pools
+    queue_seconds, run_seconds = [], []
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, _, _, info = env.step(actions)
+        if info.get("errors"):
+            raise RuntimeError(info["errors"])
+        for metrics in info.get("tool_execution", []):
+            queue_seconds.append(metrics["queue_seconds"])
+            run_seconds.append(metrics["run_seconds"])
+    elapsed = time.perf_counter() - start
+    return {
+        "steps_per_sec": steps / elapsed,
+        "median_queue_ms": 1000 * statistics.median(queue_seconds) if queue_seconds else None,
+        "median_run_ms": 1000 * statistics.median(run_seconds) if run_seconds else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=4, help="Crop calls per step.")
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--process-workers", type=int, default=None)
+    args = parser.parse_args()
+    results = {mode: measure(mode, args.calls, args.steps, args.process_workers) for mode in ("inline", "thread", "process")}
+    print(json.dumps({"calls_per_step": args.calls, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Compare frame sampling from a video by reading it sequentially and by seeking.
+
+Writes a synthetic video (numbered frames) and decodes the frames a video media item samples: by
+reading every frame up to the last sampled one, with video_utils.decode_frames (seek/grab), and
+again from the frame cache. Also checks that the seeked frames equal the sequentially read ones.
+
+Usage: python benchmarks/bench_video.py [--seconds N] [--fps N] [--stride N] [--start S] [--repeats N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import common  # noqa: F401 (puts the repository on sys.path)
+from uav_mission_env.utils import video_utils
+
+
+def write_video(path: str, seconds: int, fps: int, size=(1280, 720)) -> None:
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for index in range(seconds * fps):
+        frame = np.full((size[1], size[0], 3), (index * 7) % 256, np.uint8)
+        cv2.putText(frame, str(index), (100, 400), cv2.FONT_HERSHEY_SIMPLEX, 8, (255, 255, 255), 12)
+        writer.write(frame)
+    writer.release()
+
+
+def read_sequentially(path: str, frames: list) -> dict:
+    capture = cv2.VideoCapture(path)
+    wanted = set(frames)
+    images = {}
+    for index in range(max(frames) + 1):
+        ok, bgr = capture.read()
+        if index in wanted:
+            images[index] = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    capture.release()
+    return images
+
+
+def timed(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--stride", type=int, default=30, help="frames between samples")
+    parser.add_argument("--start", type=float, default=20.0, help="start of the time window in seconds")
+    parser.add_argument("--repeats", type=int, default=2)
+    args = parser.parse_args()
+    if args.seconds < 1 or args.fps < 1 or args.stride < 1 or args.repeats < 1:
+        parser.error("--seconds, --fps, --stride and --repeats must be at least 1")
+    if not 0 <= args.start < args.seconds:
+        parser.error(f"--start must be in [0, --seconds) = [0, {args.seconds}), got {args.start}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "flight.mp4")
+        write_video(path, args.seconds, args.fps)
+        item = {"type": "video", "path": path, "start": args.start, "stride": args.stride}
+        frames = video_utils.sample_frames(item, *video_utils.probe_video(path))
+
+        sequential = read_sequentially(path, frames)
+        cache = video_utils.FrameCache()
+        seeked = video_utils.decode_frames(path, frames, cache=cache)
+        mismatches = sum(not np.array_equal(np.asarray(seeked[frame]), sequential[frame]) for frame in frames)
+
+        def uncached():
+            cache.clear()
+            video_utils.decode_frames(path, frames, cache=cache)
+
+        sequential_seconds = timed(lambda: read_sequentially(path, frames), args.repeats)
+        seek_seconds = timed(uncached, args.repeats)
+        cached_seconds = timed(lambda: video_utils.decode_frames(path, frames, cache=cache), args.repeats)
+    print(json.dumps({
+        "frames_sampled": len(frames),
+        "sequential_ms": round(1000 * sequential_seconds, 2),
+        "seek_ms": round(1000 * seek_seconds, 2),
+        "cached_ms": round(1000 * cached_seconds, 3),
+        "speedup": round(sequential_seconds / seek_seconds, 2),
+        "mismatches": mismatches,
+    }, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Benchmark cases for the environment hot paths.
+
+Every case is a factory that performs its setup and returns a zero-argument callable timing exactly
+one operation. Factories are registered in `CASES` under a dotted name.
+"""
+
+import random
+from typing import Callable, Dict
+
+import numpy as np
+
+from common import DEMO_IMAGE_PATH, SYNTHETIC_IMAGE_PATH, env_config, scripted_action
+from uav_mission_env.environment import MissionEnvironment
+from uav_mission_env.missions.geometry import MissionGeometry
+from uav_mission_env.request_builder import RequestBuilder
+from uav_mission_env.state_manager import StateManager
+from uav_mission_env.utils.augmentations_utils import Augmentation_types
+from uav_mission_env.utils.config_loader import ConfigLoader
+from uav_mission_env.utils.media_utils import load_and_encode_image
+from uav_mission_env.utils.schema_utils import create_gbnf_grammar
+from uav_mission_env.vector_env import VectorMissionEnvironment
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def register(name: str):
+    def decorator(factory):
+        CASES[name] = factory
+        return factory
+    return decorator
+
+
+def _seed_everything(seed: int = 0) -> None:
+    # Augmentations draw from the global generators
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+@register("env.construction")
+def env_construction():
+    config = env_config("disabled")
+    return lambda: MissionEnvironment(config=config)
+
+
+@register("env.reset")
+def env_reset():
+    env = MissionEnvironment(config=env_config("disabled"))
+    seeds = iter(range(10**9))
+    return lambda: env.reset(seed=next(seeds))
+
+
+@register("env.reset.mission_queue")
+def env_reset_mission_queue():
+    config = env_config("disabled")
+    config["data_config"]["mission_queue"] = {"depth": 256, "batch_size": 32, "background": "thread"}
+    env = MissionEnvironment(config=config)
+    seeds = iter(range(10**9))
+    return lambda: env.reset(seed=next(seeds))
+
+
+def _env_step(media_mode: str):
+    _seed_everything()
+    env = MissionEnvironment(config=env_config(media_mode))
+    seeds = iter(range(10**9))
+    env.reset(seed=next(seeds))
+
+    def step():
+        _, _, terminated, truncated, _ = env.step(scripted_action(env))
+        if terminated or truncated:
+            env.reset(seed=next(seeds))
+    return step
+
+
+@register("env.step.text_only")
+def env_step_text_only():
+    return _env_step("disabled")
+
+
+@register("env.step.media_reference")
+def env_step_media_reference():
+    return _env_step("reference")
+
+
+@register("env.step.media_encode")
+def env_step_media_encode():
+    # The cost of a step depends on the waypoint's images and the augmentations drawn for them, so
+    # every episode replays the same mission with the same augmentations and repeats cover whole episodes
+    env = MissionEnvironment(config=env_config("encode"))
+    env.reset(seed=0)
+    mission = env.mission_manager.mission
+
+    def reset():
+        _seed_everything()
+        env.reset(seed=0, mission=mission)
+
+    def step():
+        _, _, terminated, truncated, _ = env.step(scripted_action(env))
+        if terminated or truncated:
+            reset()
+            return True
+        return False
+
+    reset()
+    step.period = 1
+    while not step():
+        step.period += 1
+    return step
+
+
+@register("env.step.large_mission")
+def env_step_large_mission():
+    _seed_everything()
+    config = env_config("disabled")
+    config["data_config"]["mission_size"] = 200
+    config["state_config"]["max_listed_waypoints"] = 10
+    env = MissionEnvironment(config=config)
+    seeds = iter(range(10**9))
+    env.reset(seed=next(seeds))
+
+    def step():
+        _, _, terminated, truncated, _ = env.step(scripted_action(env))
+        if terminated or truncated:
+            env.reset(seed=next(seeds))
+    return step
+
+
+@register("env.step.tool_calls")
+def env_step_tool_calls():
+    # Two independent calls (run on the tool thread pool) and the navigation call in one turn
+    _seed_everything()
+    config = env_config("disabled")
+    config["state_config"]["states"]["execution"]["tools"] += ["activate_tracking_mode", "navigate_to_new_landing_zone"]
+    env = MissionEnvironment(config=config)
+    seeds = iter(range(10**9))
+    env.reset(seed=next(seeds))
+    extra_calls = [
+        {"tool_name": "activate_tracking_mode", "parameters": {"target_description": "red car"}},
+        {"tool_name": "navigate_to_new_landing_zone", "parameters": {"direction": "top"}},
+    ]
+
+    def step():
+        action = scripted_action(env)
+        _, _, terminated, truncated, _ = env.step(extra_calls + [action] if env.current_state == "execution" else action)
+        if terminated or truncated:
+            env.reset(seed=next(seeds))
+    return step
+
+
+def _geometry_case(num_waypoints: int):
+    def factory():
+        random_generator = np.random.RandomState(0)
+        waypoint_ids = [f"waypoint_{i}" for i in range(num_waypoints)]
+        positions = random_generator.uniform(0.0, 500.0, size=(num_waypoints, 3))
+        return lambda: MissionGeometry(waypoint_ids, positions, cruise_speed=10.0)
+    return factory
+
+
+def _nearest_case(num_waypoints: int):
+    def factory():
+        random_generator = np.random.RandomState(0)
+        waypoint_ids = [f"waypoint_{i}" for i in range(num_waypoints)]
+        geometry = MissionGeometry(waypoint_ids, random_generator.uniform(0.0, 500.0, size=(num_waypoints, 3)))
+        mask = np.ones(len(geometry), dtype=bool)
+        mask[0] = False
+        return lambda: geometry.nearest("waypoint_0", mask, limit=10)
+    return factory
+
+
+for _num_waypoints in (10, 200):
+    register(f"geometry.build.{_num_waypoints}")(_geometry_case(_num_waypoints))
+    register(f"geometry.nearest.{_num_waypoints}")(_nearest_case(_num_waypoints))
+
+
+AUGMENTATIONS = {
+    "none": [],
+    "rotation": [Augmentation_types.RANDOM_ROTATION],
+    "additive_noise": [Augmentation_types.ADDITIVE_NOISE],
+    "salt_and_pepper": [Augmentation_types.SALT_AND_PEPPER_NOISE],
+    "blur": [Augmentation_types.BLUR],
+}
+IMAGES = {"synthetic": SYNTHETIC_IMAGE_PATH, "demo": DEMO_IMAGE_PATH}
+
+
+def _encode_image_case(image_path: str, augmentations: list):
+    def factory():
+        def encode():
+            # The same augmentation parameters (angle, noise) on every call
+            _seed_everything()
+            return load_and_encode_image(image_path, augmentations=augmentations)
+        return encode
+    return factory
+
+
+for _image_name, _image_path in IMAGES.items():
+    for _augmentation_name, _augmentations in AUGMENTATIONS.items():
+        register(f"media.encode.{_image_name}.{_augmentation_name}")(_encode_image_case(_image_path, _augmentations))
+
+
+def _media_observation() -> dict:
+    _seed_everything()
+    env = MissionEnvironment(config=env_config("encode"))
+    env.reset(seed=0)
+    observation, *_ = env.step(scripted_action(env))
+    return observation
+
+
+@register("request_builder.build")
+def request_builder_build():
+    observation = _media_observation()
+    builder = RequestBuilder(model="model", api_format="openai")
+    return lambda: builder.build(observation)
+
+
+@register("request_builder.conversation_turn")
+def request_builder_conversation_turn():
+    # One turn of a 10-turn conversation: serialize the new observation and emit the body
+    observation = _media_observation()
+    conversation = RequestBuilder(model="model", api_format="llamacpp").conversation()
+    for _ in range(9):
+        conversation.add_observation(observation)
+        conversation.add_response('{"justification": "", "tool_call": {}}')
+
+    def turn():
+        conversation.add_observation(observation)
+        conversation.body()
+        del conversation.messages[-1]
+    return turn
+
+
+@register("action_parser.parse")
+def action_parser_parse():
+    env = MissionEnvironment(config=env_config("disabled"))
+    text = (
+        "<think>The closest unvisited location is waypoint_3.</think>\n"
+        '{"justification": "Closest unvisited location.", '
+        '"tool_call": {"name": "next_goal", "parameters": {"next_goal": "waypoint_3"}}, '
+        '"information": "No target visible."}'
+    )
+    return lambda: env.action_parser.parse(text, "execution")
+
+
+@register("schema.gbnf_grammar")
+def schema_gbnf_grammar():
+    execution = ConfigLoader._load_default_state_config()['states']['execution']
+    output_keys = execution['output_keys']
+    tools = execution['tools']
+    return lambda: create_gbnf_grammar(output_keys, tools)
+
+
+@register("state_manager.transition")
+def state_manager_transition():
+    state_manager = StateManager(ConfigLoader._load_default_state_config())
+    context = {
+        "current_state": "execution",
+        "next_goal": "waypoint_3",
+        "locations_to_be_visited": ["waypoint_0", "waypoint_1", "waypoint_2", "waypoint_4"],
+        "past_locations": ["waypoint_3"],
+    }
+    return lambda: state_manager.get_next_state("execution", context)
+
+
+def _vector_step_case(num_envs: int):
+    def factory():
+        vector_env = VectorMissionEnvironment(num_envs, config=env_config("disabled"))
+        vector_env.reset(seed=0)
+        return lambda: vector_env.step([scripted_action(env) for env in vector_env.envs])
+    return factory
+
+
+for _num_envs in (1, 4, 16, 64):
+    register(f"vector_env.step.{_num_envs}")(_vector_step_case(_num_envs))
@@ -0,0 +1,50 @@
+"""Shared helpers for the benchmark scripts."""
+
+import copy
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from uav_mission_env.environment import MissionEnvironment
+from uav_mission_env.utils.config_loader import ConfigLoader
+
+PACKAGE_DIR = os.path.join(REPO_ROOT, "uav_mission_env")
+SYNTHETIC_METADATA_PATH = os.path.join(PACKAGE_DIR, "data", "synthetic_dataset", "metadata.json")
+SYNTHETIC_IMAGE_PATH = os.path.join(PACKAGE_DIR, "data", "synthetic_dataset", "sample_0000.jpg")
+DEMO_IMAGE_PATH = os.path.join(PACKAGE_DIR, "data", "demo", "sample_0.png")
+
+
+def env_config(media_mode: str = "encode", dataset_metadata_path: str = SYNTHETIC_METADATA_PATH) -> dict:
+    """Default environment config with the given media mode."""
+    state_config = copy.deepcopy(ConfigLoader._load_default_state_config())
+    state_config['media_mode'] = media_mode
+    return {
+        "state_config": state_config,
+        "data_config": {"dataset_metadata_path": dataset_metadata_path, "random_seed": 42},
+    }
+
+
+def scripted_action(env: MissionEnvironment) -> dict:
+    """Visit the waypoints in the presented order, land, then report a conclusion."""
+    if env.current_state == 'execution':
+        available = env.mission_manager.get_available_waypoints(limit=1)
+        next_goal = available[0] if available else "ground"
+        return {"tool_name": "next_goal", "parameters": {"next_goal": next_goal}}
+    return {
+        "tool_name": "report_final_conclusion",
+        "parameters": {"mission_completed_successfully": True, "conclusion": "", "waypoint": ""},
+    }
+
+
+def run_episode(env: MissionEnvironment, seed: int) -> int:
+    """Run one scripted episode and return the number of steps taken."""
+    env.reset(seed=seed)
+    steps = 0
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, _, terminated, truncated, _ = env.step(scripted_action(env))
+        steps += 1
+    return steps
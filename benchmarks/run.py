@@ -0,0 +1,186 @@
+"""Run the benchmark suite and compare it against a stored baseline.
+
+Results are printed to stdout as one JSON document; progress and the comparison go to stderr.
+The exit code is 1 if any benchmark is slower than the baseline by more than the threshold.
+Timings of one process vary by tens of percent on shared machines, so the suite runs in --runs
+separate processes and every case reports the run with its median time. The threshold applies on
+top of the spread between the runs recorded in the baseline, and cases that regress are measured
+again in fresh processes before they count.
+
+Usage:
+    python benchmarks/run.py                          # run everything, compare with baseline.json
+    python benchmarks/run.py -k env.step -k gbnf      # only cases whose name contains a pattern
+    python benchmarks/run.py --update-baseline --runs 5   # store the results as the new baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from cases import CASES
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+# Calls whose mean calibrates how many calls fill one repeat
+CALIBRATION_CALLS = 5
+
+
+def time_case(factory, min_time: float, repeats: int) -> dict:
+    """Best and median seconds per call over `repeats` repeats of at least `min_time` seconds.
+
+    Operations whose cost varies over a fixed cycle of calls (e.g. the steps of an episode) have a
+    `period` attribute; calibration and every repeat then cover whole cycles, so repeats do the same work.
+    """
+    operation = factory()
+    period = getattr(operation, "period", 1)
+    operation()  # warm up caches
+    calls = -(-CALIBRATION_CALLS // period) * period
+    start = time.perf_counter()
+    for _ in range(calls):
+        operation()
+    mean = (time.perf_counter() - start) / calls
+    number = max(1, int(min_time / max(mean, 1e-9)))
+    number = -(-number // period) * period
+
+    per_op = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        per_op.append((time.perf_counter() - start) / number)
+    best = min(per_op)
+    return {
+        "seconds_per_op": best,
+        "median_seconds_per_op": statistics.median(per_op),
+        "ops_per_sec": 1.0 / best if best > 0 else float("inf"),
+        "number": number,
+        "repeats": repeats,
+    }
+
+
+def run_in_processes(args, names: list, runs: int) -> dict:
+    """Per case, the result of the run with the median time, over `runs` runs in separate processes."""
+    run_results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(runs):
+            print(f"run {index + 1}/{runs}", file=sys.stderr)
+            path = os.path.join(directory, f"run_{index}.json")
+            command = [sys.executable, os.path.abspath(__file__), "--runs", "1", "--measure-only", "--output", path,
+                       "--min-time", str(args.min_time), "--repeats", str(args.repeats)]
+            for name in names:
+                command += ["-k", name]
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            with open(path) as f:
+                run_results.append(json.load(f)["results"])
+    results = {}
+    for name in names:
+        ordered = sorted((result[name] for result in run_results), key=lambda result: result["seconds_per_op"])
+        results[name] = {**ordered[(len(ordered) - 1) // 2], "runs": runs,
+                         "upper_quartile_seconds_per_op": ordered[len(ordered) * 3 // 4]["seconds_per_op"]}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (name, baseline, current, ratio) for every case slower than the baseline by more than threshold
+    plus the spread between the baseline's runs (upper quartile minus median)."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = result["seconds_per_op"] / reference["seconds_per_op"]
+        spread = reference.get("upper_quartile_seconds_per_op", reference["seconds_per_op"]) - reference["seconds_per_op"]
+        regressed = result["seconds_per_op"] > reference["seconds_per_op"] * (1.0 + threshold) + spread
+        marker = "REGRESSION" if regressed else "ok"
+        print(f"{name:<40} {reference['seconds_per_op']:>12.3e} -> {result['seconds_per_op']:>12.3e}  x{ratio:5.2f}  {marker}", file=sys.stderr)
+        if regressed:
+            regressions.append((name, reference["seconds_per_op"], result["seconds_per_op"], ratio))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the MissionEnvironment hot paths.")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="Only run cases whose name contains this pattern.")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3, help="Processes running the suite; each case reports the median run.")
+    parser.add_argument("--no-confirm", action="store_true", help="Do not re-measure cases that regressed in fresh processes.")
+    parser.add_argument("--measure-only", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before a case counts as a regression.")
+    parser.add_argument("--output", help="Also write the results to this file.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results into the baseline file instead of comparing.")
+    parser.add_argument("--list", action="store_true", help="List the available cases and exit.")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    names = [name for name in CASES if not args.filter or any(pattern in name for pattern in args.filter)]
+    if args.runs > 1:
+        results = run_in_processes(args, names, args.runs)
+    else:
+        results = {}
+        for name in names:
+            print(f"running {name} ...", file=sys.stderr)
+            results[name] = time_case(CASES[name], args.min_time, args.repeats)
+
+    baseline = None
+    if not args.update_baseline and not args.measure_only and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.threshold) if baseline is not None else []
+    if regressions and args.runs > 1 and not args.no_confirm:
+        # Slow periods of a shared host hit unrelated cases; a regression caused by the code reproduces
+        regressed = [name for name, *_ in regressions]
+        print(f"re-measuring {len(regressed)} case(s) in fresh processes", file=sys.stderr)
+        results.update(run_in_processes(args, regressed, args.runs))
+        regressions = compare({name: results[name] for name in regressed}, baseline, args.threshold)
+
+    report = {
+        "metadata": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.measure_only:
+        return 0
+    if args.update_baseline:
+        baseline = {"metadata": report["metadata"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline["results"] = json.load(f).get("results", {})
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if baseline is None:
+        print(f"no baseline at {args.baseline}, skipping comparison", file=sys.stderr)
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,5 +7,6 @@ __version__ = "0.1.0"
 __author__ = "KingJulien0709"
 
 from .environment import MissionEnvironment
+from .vector_env import VectorMissionEnvironment
 
-__all__ = ["__version__", "__author__", "MissionEnvironment"]
+__all__ = ["__version__", "__author__", "MissionEnvironment", "VectorMissionEnvironment"]
@@ -0,0 +1,190 @@
+"""Client for `uav_mission_env.server` with a pool of connections.
+
+`RemoteMissionEnvironment` mirrors the MissionEnvironment API (reset/step/close), so policies can
+switch between a local and a remote environment:
+
+    client = EnvClient("127.0.0.1:8765", pool_size=8)
+    env = client.create_env(max_turns=10)
+    observation = env.reset(seed=0)
+    observation, reward, terminated, truncated, info = env.step(action)
+"""
+
+from __future__ import annotations
+import itertools
+import socket
+import threading
+from typing import List, Optional, Sequence, Tuple, Union
+
+from .protocol import read_frame_sync, restore_media, send_frame_sync
+
+
+class RemoteEnvError(RuntimeError):
+    """An operation failed on the server."""
+
+
+class _Connection:
+    def __init__(self, address: Union[str, Tuple[str, int]], timeout: Optional[float]):
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address, timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+        self.rfile = self.sock.makefile("rb")
+        self._request_ids = itertools.count()
+
+    def request(self, header: dict):
+        header["id"] = request_id = next(self._request_ids)
+        send_frame_sync(self.sock, header)
+        response, blobs = read_frame_sync(self.rfile)
+        if response.get("id") != request_id:
+            raise ConnectionError(f"Response {response.get('id')} does not match request {request_id}.")
+        return response, blobs
+
+    def close(self) -> None:
+        self.rfile.close()
+        self.sock.close()
+
+
+def parse_address(address: Union[str, Tuple[str, int]]) -> Union[str, Tuple[str, int]]:
+    """'host:port' or (host, port) for TCP, anything else is a Unix socket path."""
+    if isinstance(address, tuple):
+        return address
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit() and "/" not in address:
+        return host, int(port)
+    return address
+
+
+class EnvClient:
+    """Thread-safe client; every request borrows one of up to `pool_size` connections.
+
+    With `raw_media`, encoded images in observations are returned as bytes instead of base64 strings.
+    """
+
+    def __init__(self, address: Union[str, Tuple[str, int]], pool_size: int = 4, timeout: Optional[float] = None,
+                 raw_media: bool = False):
+        self.address = parse_address(address)
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.raw_media = raw_media
+        # One slot per request in flight; a request reuses an idle connection or opens one, so at most
+        # `pool_size` connections are open and a slot freed by a failed request wakes a waiting caller
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._idle: List[_Connection] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> _Connection:
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return _Connection(self.address, self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: Optional[_Connection]) -> None:
+        """Give back the slot of a request, and its connection unless it was closed."""
+        if connection is not None:
+            with self._lock:
+                self._idle.append(connection)
+        self._slots.release()
+
+    def _call(self, header: dict):
+        connection = self._acquire()
+        try:
+            response, blobs = connection.request(header)
+        except BaseException:
+            # The stream may hold a partial frame, never reuse the connection
+            connection.close()
+            self._release(None)
+            raise
+        self._release(connection)
+        return response, blobs
+
+    def _restore(self, result: dict, blobs: List[bytes]) -> dict:
+        if "observation" in result:
+            restore_media(result["observation"], blobs, raw=self.raw_media)
+        return result
+
+    def request(self, op: str, **params) -> dict:
+        response, blobs = self._call({"op": op, **params})
+        if "error" in response:
+            raise RemoteEnvError(response["error"])
+        return self._restore(response["result"], blobs)
+
+    def batch(self, requests: Sequence[dict]) -> List[dict]:
+        """Execute several requests in one round trip. Failed entries raise RemoteEnvError."""
+        response, blobs = self._call({"op": "batch", "requests": list(requests)})
+        if "error" in response:
+            raise RemoteEnvError(response["error"])
+        results = []
+        for entry in response["result"]["results"]:
+            if "error" in entry:
+                raise RemoteEnvError(entry["error"])
+            results.append(self._restore(entry["result"], blobs))
+        return results
+
+    def create_env(self, config: Optional[str] = None, max_turns: int = 10) -> RemoteMissionEnvironment:
+        """A new session; `config` names one of the server's configs (default: "default")."""
+        params = {"max_turns": max_turns}
+        if config is not None:
+            params["config"] = config
+        return RemoteMissionEnvironment(self, self.request("create", **params)["session"])
+
+    def create_envs(self, num_envs: int, config: Optional[str] = None, max_turns: int = 10) -> List[RemoteMissionEnvironment]:
+        params = {"op": "create", "max_turns": max_turns}
+        if config is not None:
+            params["config"] = config
+        results = self.batch([params] * num_envs)
+        return [RemoteMissionEnvironment(self, result["session"]) for result in results]
+
+    def reset_batch(self, envs: Sequence[RemoteMissionEnvironment], seeds: Optional[Sequence[Optional[int]]] = None) -> List[dict]:
+        seeds = seeds if seeds is not None else [None] * len(envs)
+        requests = [{"op": "reset", "session": env.session_id, "seed": seed} for env, seed in zip(envs, seeds)]
+        return [result["observation"] for result in self.batch(requests)]
+
+    def step_batch(self, envs: Sequence[RemoteMissionEnvironment], actions: Sequence[dict]) -> list:
+        """Step several sessions in one round trip; returns one (obs, reward, terminated, truncated, info) per env."""
+        if len(envs) != len(actions):
+            raise ValueError(f"Expected {len(envs)} actions, got {len(actions)}.")
+        requests = [{"op": "step", "session": env.session_id, "action": action} for env, action in zip(envs, actions)]
+        return [RemoteMissionEnvironment._unpack_step(result) for result in self.batch(requests)]
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._idle = self._idle, []
+        for connection in connections:
+            connection.close()
+
+    def __enter__(self) -> EnvClient:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RemoteMissionEnvironment:
+    """A server-side MissionEnvironment session."""
+
+    def __init__(self, client: EnvClient, session_id: str):
+        self.client = client
+        self.session_id = session_id
+
+    @staticmethod
+    def _unpack_step(result: dict):
+        return result["observation"], result["reward"], result["terminated"], result["truncated"], result["info"]
+
+    def reset(self, seed: Optional[int] = None, custom_plan: str = None, target_criteria: dict = None) -> dict:
+        return self.client.request(
+            "reset", session=self.session_id, seed=seed, custom_plan=custom_plan, target_criteria=target_criteria
+        )["observation"]
+
+    def step(self, action: dict = {}):
+        return self._unpack_step(self.client.request("step", session=self.session_id, action=action))
+
+    def close(self) -> None:
+        self.client.request("close", session=self.session_id)
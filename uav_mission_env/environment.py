@@ -3,9 +3,11 @@ import numpy as np
 import yaml
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional, Type, List
-from .tools import Tool, ToolManager, ToolValidator
+from typing import Any, Dict, Optional, Type, List, Union
+from .tools import ActionError, ActionParser, ParsedAction, Tool, ToolExecutor, ToolManager, ToolPolicy, ToolResultCache, ToolValidator
+from .tools.result_cache import cache_key
 from .observations import Observation
+from .observations.observation import IMAGE_SELECTIONS, CurrentWaypointObservation, WaypointListObservation
 from .verifiers import Verifier
 from .missions.mission_manager import MissionManager
 from .missions.task import TaskRegistry
@@ -13,8 +15,14 @@ from .missions.mission_generator import MissionGenerator, ConfigMissionGenerator
 from .missions.mission import Mission
 from .missions.waypoint import Waypoint
 from .state_manager import StateManager
+from .profiling import StepProfiler, ProfilerHook
 from .utils.schema_utils import create_json_schema_from_keys, create_gbnf_grammar
 from .utils.config_loader import ConfigLoader
+from .utils.image_pyramid import ImagePyramidCache
+from .utils.media_utils import ImageEncoding
+from .utils.immutable import FrozenList, freeze
+from .utils.prompt_utils import PROMPT_LAYOUTS, PromptTemplate
+from .observation_delta import OBSERVATION_MODES, UNCHANGED, DeltaEncoder
 
 
 class MissionEnvironment():
@@ -25,16 +33,71 @@ class MissionEnvironment():
         self.state_config, self.task_registry, self.mission_manager = ConfigLoader.load_config(config=config)
             
         self.current_state = self.state_config.get('initial_state', 'execution')
+        # 'encode' (default), 'reference' or 'disabled', see CurrentWaypointObservation
+        self.media_mode = self.state_config.get('media_mode', 'encode')
+        # 'inline' (default) or 'static_first', see PromptTemplate.render_segments
+        self.prompt_layout = self.state_config.get('prompt_layout', 'inline')
+        if self.prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout '{self.prompt_layout}', expected one of {PROMPT_LAYOUTS}.")
+        # Also return the prompt as hashed segments in obs_payload['prompt_segments']
+        self.prompt_segments = bool(self.state_config.get('prompt_segments', False))
+        # 'full' (default) or 'delta': only what changed since the previous observation, see observation_delta
+        self.observation_mode = self.state_config.get('observation_mode', 'full')
+        if self.observation_mode not in OBSERVATION_MODES:
+            raise ValueError(f"Unknown observation mode '{self.observation_mode}', expected one of {OBSERVATION_MODES}.")
+        if self.observation_mode == 'delta' and (self.prompt_segments or self.prompt_layout != 'inline'):
+            raise ValueError("observation_mode 'delta' requires prompt_layout 'inline' without prompt_segments.")
+        self.delta_encoder = DeltaEncoder() if self.observation_mode == 'delta' else None
+        max_listed_waypoints = self.state_config.get('max_listed_waypoints')
+        if max_listed_waypoints is not None and (type(max_listed_waypoints) is not int or max_listed_waypoints < 1):
+            raise ValueError(f"max_listed_waypoints must be a positive integer, got {max_listed_waypoints!r}.")
+        # Per state: media items shown without a view_images request (all by default, see IMAGE_SELECTIONS)
+        # and how they are encoded (see ImageEncoding)
+        self._media_selection = {}
+        for name, state in self.state_config['states'].items():
+            image_selection = state.get('image_selection', self.state_config.get('image_selection', 'first'))
+            if image_selection not in IMAGE_SELECTIONS:
+                raise ValueError(f"Unknown image selection '{image_selection}' in state '{name}', expected one of {tuple(IMAGE_SELECTIONS)}.")
+            encoding_config = state.get('image_encoding', self.state_config.get('image_encoding'))
+            self._media_selection[name] = (
+                state.get('max_images', self.state_config.get('max_images')),
+                image_selection,
+                ImageEncoding.from_config(encoding_config) if encoding_config else None,
+            )
+        # Also check dict actions against the tools' parameter schemas (raw text actions always are)
+        self.validate_parameters = bool(self.state_config.get('validate_parameters', False))
+        # Pools for offloaded tool calls, shared with other environments (see tools.executor)
+        execution_config = self.state_config.get('tool_execution') or {}
+        self.tool_executor = ToolExecutor.shared(
+            thread_workers=execution_config.get('thread_workers', 8),
+            process_workers=execution_config.get('process_workers')
+        )
+        # Memoized outputs of cacheable tools, shared with other environments; `tool_cache: false` disables it
+        cache_config = self.state_config.get('tool_cache', {})
+        self.tool_cache = ToolResultCache.shared(**cache_config) if cache_config is not False else None
+        # Metrics of the offloaded calls of the current step, reported in info['tool_execution']
+        self._tool_metrics: Optional[list] = None
 
         self.state: dict = {}
         self.turns_performed = 0
+        self.profiler: Optional[StepProfiler] = None
         
         # Initialize tool manager and validator
         self.tool_manager = ToolManager()
         self.tool_validator = ToolValidator(self.tool_manager, self.state_config)
+        self.action_parser = ActionParser(self.tool_validator)
         
         # Initialize state manager for transitions
         self.state_manager = StateManager(self.state_config)
+
+        # Output schemas, tool specs and prompt templates only depend on the state config, so they are
+        # built once per state and shared (read-only) by every observation
+        self._observation_formats: Dict[str, dict] = {}
+        self._available_tool_specs: Dict[str, list] = {}
+        self._prompt_templates = {
+            name: PromptTemplate(state.get('prompt', ''))
+            for name, state in self.state_config['states'].items()
+        }
         
         self._setup_tools()
         self._setup_observations_tools()
@@ -53,6 +116,10 @@ class MissionEnvironment():
             tool = Tool.get_tool_by_name(name, mission_manager=self.mission_manager, state_config=self.state_config)
             tool.specification = self.tool_manager.get_spec(name)
             self.tools[name] = tool
+        tool_overrides = (self.state_config.get('tool_execution') or {}).get('tools') or {}
+        self.tool_policies = {
+            name: ToolPolicy.for_tool(tool, tool_overrides.get(name)) for name, tool in self.tools.items()
+        }
 
     def _setup_observations_tools(self) -> None:
         """Initialize observations with necessary dependencies."""
@@ -64,6 +131,24 @@ class MissionEnvironment():
         self.observations_tools = {}
         for observation_name in set(observation_list):
             self.observations_tools[observation_name] = Observation.get_observation_by_name(observation_name, mission_manager=self.mission_manager)
+        self.observations_tools["waypoint"] = CurrentWaypointObservation(mission_manager=self.mission_manager, media_mode=self.media_mode)
+        # Encoded images and crops are resized from cached image pyramids; `image_pyramid: false` disables them
+        pyramid_config = self.state_config.get('image_pyramid', {})
+        self.pyramid_cache = ImagePyramidCache.shared(**pyramid_config) if pyramid_config is not False else None
+        self.observations_tools["waypoint"].pyramid_cache = self.pyramid_cache
+        for tool in self.tools.values():
+            if hasattr(tool, 'waypoint_observation'):
+                tool.waypoint_observation = self.observations_tools["waypoint"]
+            if hasattr(tool, 'pyramid_cache'):
+                tool.pyramid_cache = self.pyramid_cache
+        # Optional window for waypoint lists in prompts of large missions
+        max_listed_waypoints = self.state_config.get('max_listed_waypoints')
+        for observation_tool in self.observations_tools.values():
+            if isinstance(observation_tool, WaypointListObservation):
+                observation_tool.max_items = max_listed_waypoints
+        for tool in self.tools.values():
+            if hasattr(tool, 'max_listed_waypoints'):
+                tool.max_listed_waypoints = max_listed_waypoints
 
     def _setup_verifiers(self) -> None:
         """Initialize verifiers with necessary dependencies."""
@@ -85,25 +170,43 @@ class MissionEnvironment():
         for verifier_name, reward_factor in verifier_configs.items():
             self.verifiers[verifier_name] = Verifier.get_verifier_by_name(verifier_name, reward_factor=reward_factor)
 
-    def reset(self, seed: Optional[int] = None, custom_plan: str = None, target_criteria: dict = None) -> dict:
+    def reset(self, seed: Optional[int] = None, custom_plan: str = None, target_criteria: dict = None,
+              mission: Optional[Mission] = None, waypoint_order: Optional[List[str]] = None) -> dict:
+        """Start a new episode. `mission` replaces the sampled or queued mission and `waypoint_order`
+        the shuffled presentation order of its waypoints (e.g. to replay a recorded episode)."""
         self.state.clear()
         if seed is not None:
             self.state["seed"] = seed
-        self.mission_manager.reset(seed=seed, custom_plan=custom_plan, target_criteria=target_criteria)
+        self.mission_manager.reset(seed=seed, custom_plan=custom_plan, target_criteria=target_criteria,
+                                   mission=mission, waypoint_order=waypoint_order)
+        self.observations_tools["waypoint"].reset()
         self.turns_performed = 0
         self.current_state = self.state_config.get('initial_state', 'execution')
+        if self.delta_encoder is not None:
+            self.delta_encoder.new_episode()
         return self._get_observation()
     
 
-    def step(self, action: dict = {}) -> dict:
+    def step(self, action: Union[dict, str, list] = {}) -> dict:
+        """Apply an action dict, or raw model output which is parsed with `parse_action` first.
+
+        A list of actions is executed as one turn (see `_act_tool_calls`): outputs are merged, and the
+        reward, transition and observation are computed once for the whole list.
+        """
+        if isinstance(action, list):
+            action = [self._ingest_action(call) for call in action]
+            last_action = action[-1] if action else {}
+        else:
+            action = last_action = self._ingest_action(action)
 
         action_outputs = self._act_tools(action)
         self._update_state(action_outputs)
 
         reward = self.verify(action_outputs)
 
-        # Perform state transition
-        transition_context = {**self._get_observation(), **self.state, **action}
+        # Perform state transition. Conditions only see bookkeeping values, so no observation
+        # (and no media) has to be built before the next state is known.
+        transition_context = {'current_state': self.current_state, **self.state, **last_action}
         self.current_state = self.state_manager.get_next_state(self.current_state, transition_context)
         
         # Get observation for the new state
@@ -112,6 +215,9 @@ class MissionEnvironment():
         terminated = self.current_state == 'end' or self.current_state == 'error'  # Check if we've reached the end state
         truncated = False  # Placeholder truncation condition
         info = action_outputs  # Include tool outputs in info
+        if self._tool_metrics:
+            info['tool_execution'] = self._tool_metrics
+            self._tool_metrics = None
 
         self.turns_performed += 1
         if self.turns_performed >= self.max_turns:  # Example max turns
@@ -121,9 +227,36 @@ class MissionEnvironment():
         
         return observation, reward, terminated, truncated, info
 
+    def parse_action(self, text: str, state: Optional[str] = None) -> ParsedAction:
+        """Parse raw model output (optionally with a <think> block) into a validated action."""
+        return self.action_parser.parse(text, state or self.current_state)
+
+    def _ingest_action(self, action: Union[dict, str]) -> dict:
+        if isinstance(action, str):
+            parsed = self.parse_action(action)
+            return parsed.action if parsed.ok else {'parse_error': parsed.error}
+        return action
+
     def close(self) -> None:
         """Clean up the environment when done."""
-        pass
+        self.mission_manager.close()
+        if self.tool_executor is not None:
+            self.tool_executor.release()
+            self.tool_executor = None
+
+    def enable_profiling(self, hooks: Optional[List[ProfilerHook]] = None) -> StepProfiler:
+        """Time every step phase; step() then reports them in info['timings'] (seconds)."""
+        if self.profiler is None:
+            self.profiler = StepProfiler(hooks=hooks).attach(self)
+        elif hooks:
+            self.profiler.hooks.extend(hooks)
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        """Detach the profiler and restore the uninstrumented code path."""
+        if self.profiler is not None:
+            self.profiler.detach()
+            self.profiler = None
 
     def get_available_tools(self, state: Optional[str] = None) -> list[dict]:
         """Get tool specifications for available tools in a state."""
@@ -142,66 +275,219 @@ class MissionEnvironment():
         inner_observations = {}
         # Return early if in 'end' state
         if self.current_state == 'end':
-            return observation_output
+            return self.delta_encoder.encode(self.current_state) if self.delta_encoder else observation_output
 
         for observation_name in self.state_config['states'][self.current_state].get('observations', []):
             observation_tool = self.observations_tools[observation_name]
             obs = observation_tool.execute(self.state)
             inner_observations.update(obs)
+        if self.delta_encoder is not None:
+            return self._get_delta_observation(inner_observations)
         
         #print(inner_observations)
         #print("-"*40)
         # Always include waypoint obs_payload(media and prompt)
-        waypoint_obs = self.observations_tools["waypoint"].execute(self.state)
-        observation_output.update(waypoint_obs)
+        if self.media_mode == 'disabled':
+            observation_output['obs_payload'] = {}
+        else:
+            waypoint_obs = self.observations_tools["waypoint"].execute(self.state, *self._media_selection[self.current_state])
+            observation_output.update(waypoint_obs)
         #print(observation_output)
         #print("-"*40)
 
-        available_tool_names = self.tool_validator.get_available_tools(self.current_state)
-        available_tools = self.tool_manager.get_specs(available_tool_names)
-        observation_output['available_tools'] = available_tools
+        observation_output['available_tools'] = self._get_available_tool_specs(self.current_state)
 
-        state_prompt = self.state_config['states'][self.current_state].get('prompt', '')
-        input_vars = self.state_config['states'][self.current_state]['observations']
-        #print(input_vars)
-        observation_output['obs_payload']['prompt'] = state_prompt.format(**{var: inner_observations[var] for var in input_vars})
+        prompt_template = self._prompt_templates[self.current_state]
+        if self.prompt_segments or self.prompt_layout != 'inline':
+            segments = prompt_template.render_segments(inner_observations, layout=self.prompt_layout)
+            observation_output['obs_payload']['prompt'] = "".join(segment['text'] for segment in segments)
+            if self.prompt_segments:
+                observation_output['obs_payload']['prompt_segments'] = segments
+        else:
+            observation_output['obs_payload']['prompt'] = prompt_template.render(inner_observations)
         observation_output['obs_payload']['output_schema'] = self.observe_format_for_state(self.current_state)
         return observation_output
+
+    def _get_delta_observation(self, values: dict) -> dict:
+        """Observation with only what changed since the previous one (observation_mode 'delta')."""
+        state = self.current_state
+        template = self._prompt_templates[state]
+        fields = template.field_texts(values)
+        media = UNCHANGED
+        # Media only changes with the waypoint, so it is not even encoded otherwise
+        waypoint_observation = self.observations_tools["waypoint"]
+        media_key = (self.mission_manager.current_waypoint_id, self._media_selection[state], waypoint_observation.requested_indices())
+        if self.media_mode != 'disabled' and self.delta_encoder.media_changed(media_key):
+            media = waypoint_observation.execute(self.state, *self._media_selection[state])['obs_payload']
+        return self.delta_encoder.encode(
+            state,
+            state_info=lambda: {
+                'prompt_template': template.template if fields is not None else None,
+                'output_schema': self.observe_format_for_state(state),
+                'available_tools': self._get_available_tool_specs(state),
+            },
+            fields=fields,
+            prompt=template.render(values) if fields is None else None,
+            media=media,
+        )
+
+    def reset_observation_stream(self) -> None:
+        """In delta mode, send the next observation in full (e.g. after a client lost its state)."""
+        if self.delta_encoder is not None:
+            self.delta_encoder.restart()
+
+    def _get_available_tool_specs(self, state: str) -> list:
+        specs = self._available_tool_specs.get(state)
+        if specs is None:
+            specs = FrozenList(self.get_available_tools(state))
+            self._available_tool_specs[state] = specs
+        return specs
     
-    def _act_tools(self, action: dict) -> dict:
+    def _act_tools(self, action: Union[dict, list]) -> dict:
         """Execute tools based on action, with validation.
         
         Expected action format: {'tool_name': 'example_tool', 'parameters': {'param_0': 'param_0_value'}}
         """
-        outputs = {}
-        errors = []
-        
+        if isinstance(action, list):
+            return self._act_tool_calls(action)
+        action, error = self._prepare_tool_call(action)
+        outputs, error = self._run_tool(action) if error is None else ({}, error)
+        if error:
+            outputs['errors'] = [error.to_dict()]
+        return outputs
+
+    def _check_tool_call(self, action: dict) -> Optional[ActionError]:
+        """Error of an invalid tool call, None if it can be executed."""
         # Extract tool_name and parameters from the new action structure
         tool_name = action.get('tool_name')
-        parameters = action.get('parameters', {})
-        
         if not tool_name:
-            errors.append("Missing 'tool_name' in action")
-            outputs['errors'] = errors
-            return outputs
+            return action.get('parse_error') or ActionError("invalid_tool_call", "Missing 'tool_name' in action")
         
         # Validate that each tool action has correct arguments
-        error = self.tool_validator.validate(tool_name, parameters, self.current_state)
+        error = self.tool_validator.validate(tool_name, action.get('parameters', {}), self.current_state, self.validate_parameters)
         if error:
-            errors.append(f"{tool_name}: {error}")
+            return error
+        if tool_name not in self.tools:
+            return ActionError("unknown_tool", f"Tool '{tool_name}' not found in environment tools")
+        return None
+
+    def _prepare_tool_call(self, action: dict):
+        """(action with the parameters resolved by Tool.prepare, ActionError or None)."""
+        error = self._check_tool_call(action)
+        if error is not None:
+            return action, error
+        return self._prepare_checked_call(action)
+
+    def _prepare_checked_call(self, action: dict):
+        """As _prepare_tool_call, for a call that passed _check_tool_call."""
+        tool = self.tools[action['tool_name']]
+        parameters = action.get('parameters', {})
+        try:
+            prepared = tool.prepare(parameters)
+        except Exception as e:
+            return action, ActionError("invalid_parameters", f"{tool.name}: {str(e)}", "parameters")
+        if prepared is not parameters:
+            action = {**action, 'parameters': prepared}
+        return action, None
+
+    def _run_tool(self, action: dict):
+        """Execute a checked tool call according to its policy. Returns (outputs, ActionError or None)."""
+        key, cached = self._cache_lookup(action)
+        if cached is not None:
+            return dict(cached), None
+        tool_name = action['tool_name']
+        if self.tool_policies[tool_name].mode == "inline":
+            try:
+                outputs, error = dict(self.tools[tool_name].use(action.get('parameters', {}))), None
+            except Exception as e:
+                outputs, error = {}, ActionError("tool_error", f"{tool_name}: {str(e)}")
         else:
-            # Execute the tool
-            if tool_name in self.tools:
-                try:
-                    outputs.update(self.tools[tool_name].use(parameters))
-                except Exception as e:
-                    errors.append(f"{tool_name}: {str(e)}")
+            outputs, error = self._collect(self._submit_tool(action))
+        if key is not None and error is None:
+            self.tool_cache.put(key, outputs)
+        return outputs, error
+
+    def _cache_lookup(self, action: dict):
+        """(cache key, cached outputs) for cacheable tools, (None, None) otherwise."""
+        tool = self.tools[action['tool_name']]
+        if not tool.cacheable or self.tool_cache is None:
+            return None, None
+        key = cache_key(tool.name, action.get('parameters', {}), tool.media_id())
+        return key, self.tool_cache.get(key)
+
+    def _submit_tool(self, action: dict, policy: Optional[ToolPolicy] = None):
+        tool_name = action['tool_name']
+        return self.tool_executor.submit(
+            self.tools[tool_name], action.get('parameters', {}), policy or self.tool_policies[tool_name]
+        )
+
+    def _collect(self, call):
+        outputs, error, metrics = call.result()
+        if self._tool_metrics is None:
+            self._tool_metrics = []
+        self._tool_metrics.append(metrics)
+        return outputs, ActionError("tool_error", error) if error is not None else None
+
+    def _act_tool_calls(self, actions: list) -> dict:
+        """Execute several tool calls in one turn.
+
+        Calls are handled in list order. Each one is prepared (Tool.prepare) once the calls before it
+        have run, so e.g. a crop_zoom_image `image_index` after a next_goal refers to the new waypoint.
+        Calls of tools marked `independent` are then started and run concurrently with the calls after
+        them: offloaded tools on their pool, inline tools on the thread pool. The others run on the
+        calling thread. Outputs are merged in list order (later calls win on equal keys) and also
+        returned per call in 'tool_calls'; errors are listed in list order.
+        """
+        if not actions:
+            return {'tool_calls': [], 'errors': [ActionError("invalid_tool_call", "Empty list of tool calls").to_dict()]}
+        checks = [self._check_tool_call(action) for action in actions]
+        independent = [error is None and self.tools[action['tool_name']].independent for action, error in zip(actions, checks)]
+        # A single independent inline call gains nothing from the thread pool
+        offload_inline = sum(independent) > 1
+        actions = list(actions)
+        results = [({}, error) if error is not None else None for error in checks]
+        calls = {}
+        cache_keys = {}
+        for index in range(len(actions)):
+            if results[index] is not None:
+                continue
+            action, error = self._prepare_checked_call(actions[index])
+            actions[index] = action
+            if error is not None:
+                results[index] = ({}, error)
+                continue
+            policy = self.tool_policies[action['tool_name']]
+            if not independent[index] or (policy.mode == "inline" and not offload_inline):
+                results[index] = self._run_tool(action)
+                continue
+            key, cached = self._cache_lookup(action)
+            if cached is not None:
+                results[index] = (dict(cached), None)
+                continue
+            if policy.mode == "inline":
+                policy = ToolPolicy("thread", policy.timeout, policy.max_concurrency)
+            calls[index] = self._submit_tool(action, policy)
+            cache_keys[index] = key
+
+        merged: dict = {}
+        tool_calls = []
+        errors = []
+        for index, (action, result) in enumerate(zip(actions, results)):
+            if result is None:
+                result = self._collect(calls[index])
+                if cache_keys[index] is not None and result[1] is None:
+                    self.tool_cache.put(cache_keys[index], result[0])
+            outputs, error = result
+            merged.update(outputs)
+            if error:
+                errors.append(error.to_dict())
+                tool_calls.append({'tool_name': action.get('tool_name'), 'error': errors[-1]})
             else:
-                errors.append(f"Tool '{tool_name}' not found in environment tools")
-        
+                tool_calls.append({'tool_name': action['tool_name'], 'outputs': outputs})
+        merged['tool_calls'] = tool_calls
         if errors:
-            outputs['errors'] = errors
-        return outputs
+            merged['errors'] = errors
+        return merged
     
     def _update_state(self, tool_outputs: dict) -> None:
         """Update the internal state of the environment based on tool outputs."""
@@ -221,6 +507,13 @@ class MissionEnvironment():
     
     def observe_format_for_state(self, state: str) -> dict:
         """Get the required observation format for a given state."""
+        observation_format = self._observation_formats.get(state)
+        if observation_format is None:
+            observation_format = freeze(self._build_observation_format(state))
+            self._observation_formats[state] = observation_format
+        return observation_format
+
+    def _build_observation_format(self, state: str) -> dict:
         output_keys = self.state_config['states'][state].get('output_keys', [])
         json_schema = create_json_schema_from_keys(output_keys)
         available_tools = self.tool_validator.get_available_tools(state)
@@ -0,0 +1,33 @@
+"""Materialize sampled missions into a mission dataset file.
+
+Usage:
+    python -m uav_mission_env.export_missions --num-missions 100000 --output missions.jsonl [--seed 0]
+"""
+
+import argparse
+
+from .missions.mission_dataset import materialize_missions
+from .missions.mission_generator import RandomMissionGenerator
+from .missions.mission_queue import MissionBatchGenerator
+from .missions.task import TaskRegistry
+from .utils.config_loader import ConfigLoader
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Materialize sampled missions into a mission dataset file.")
+    parser.add_argument("--num-missions", type=int, required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the mission stream.")
+    parser.add_argument("--dataset-metadata-path", default=None, help="Defaults to the bundled synthetic dataset.")
+    parser.add_argument("--task-config-path", default=None, help="Defaults to the bundled tasks.yaml.")
+    args = parser.parse_args()
+
+    dataset_metadata_path = args.dataset_metadata_path or ConfigLoader._load_default_data_config()["dataset_metadata_path"]
+    task_registry = TaskRegistry(args.task_config_path or ConfigLoader._load_default_task_config_path())
+    generator = RandomMissionGenerator(dataset_metadata_path=dataset_metadata_path, task_registry=task_registry)
+    written = materialize_missions(MissionBatchGenerator(generator, seed=args.seed), args.num_missions, args.output)
+    print(f"wrote {written} missions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
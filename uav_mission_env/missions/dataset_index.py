@@ -0,0 +1,67 @@
+"""Column store of a dataset's metadata, loaded once per process and shared by all generators."""
+
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..utils.immutable import freeze
+
+_cache: Dict[str, "DatasetIndex"] = {}
+_cache_lock = threading.Lock()
+
+
+class DatasetIndex:
+    """Metadata entries split into columns; row `i` is entry `i` of the metadata JSON.
+
+    Ground truth and media are frozen, since waypoints of every mission sampled in the process
+    reference them instead of copies. `positions` is an (N, D) array with NaN rows for entries
+    without a `position`, or None if no entry has one.
+    """
+
+    def __init__(self, metadata: List[dict], path: Optional[str] = None):
+        self.path = path
+        self._mtime = None
+        self.gt_entities = [freeze(entry.get("gt_entities", {})) for entry in metadata]
+        self.media = [freeze(entry.get("media", [])) for entry in metadata]
+        self.positions = None
+        entry_positions = [entry.get("position") for entry in metadata]
+        dims = {len(position) for position in entry_positions if position is not None}
+        if len(dims) > 1:
+            raise ValueError(f"Dataset positions have mixed dimensions {sorted(dims)}: {path}")
+        if dims:
+            self.positions = np.full((len(metadata), dims.pop()), np.nan)
+            for row, position in enumerate(entry_positions):
+                if position is not None:
+                    self.positions[row] = position
+        self.positions_missing = None if self.positions is None else np.isnan(self.positions).any(axis=1)
+
+    @classmethod
+    def load(cls, path: str) -> DatasetIndex:
+        """Shared index of the metadata file at `path` (reloaded if the file changed)."""
+        key = os.path.abspath(path)
+        mtime = os.path.getmtime(key)
+        with _cache_lock:
+            index = _cache.get(key)
+            if index is None or index._mtime != mtime:
+                with open(key, "r") as f:
+                    index = cls(json.load(f), path=key)
+                index._mtime = mtime
+                _cache[key] = index
+        return index
+
+    def __len__(self) -> int:
+        return len(self.gt_entities)
+
+    def position(self, row: int):
+        if self.positions is None or self.positions_missing[row]:
+            return None
+        return self.positions[row]
+
+    def __reduce__(self):
+        if self.path is None:
+            return super().__reduce__()
+        return (DatasetIndex.load, (self.path,))
@@ -0,0 +1,85 @@
+"""Waypoint geometry: pairwise distances and travel costs of a mission, computed once per reset."""
+
+from __future__ import annotations
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .mission import Mission
+
+HOME_WAYPOINT_ID = "ground"
+
+
+def pairwise_distances(positions: np.ndarray) -> np.ndarray:
+    """Euclidean distance matrix of an (N, D) array of positions."""
+    difference = positions[:, None, :] - positions[None, :, :]
+    return np.sqrt(np.einsum("ijk,ijk->ij", difference, difference))
+
+
+class MissionGeometry:
+    """Distance and travel-cost matrices between the home position and the mission waypoints.
+
+    Row/column 0 is the home position (the "ground" waypoint the UAV starts from and lands at),
+    rows 1..N are the mission waypoints in mission order. Travel costs are travel times in seconds
+    when a cruise speed is given, otherwise distances.
+    """
+
+    def __init__(self, waypoint_ids: Sequence[str], positions: np.ndarray,
+                 home_position: Optional[Sequence[float]] = None, cruise_speed: Optional[float] = None):
+        positions = np.asarray(positions, dtype=np.float64).reshape(len(waypoint_ids), -1)
+        home = np.zeros(positions.shape[1]) if home_position is None else np.asarray(home_position, dtype=np.float64)
+        if home.shape != (positions.shape[1],):
+            raise ValueError(f"Home position must have {positions.shape[1]} coordinates, got {home.shape[0]}.")
+        if cruise_speed is not None and cruise_speed <= 0:
+            raise ValueError(f"Cruise speed must be positive, got {cruise_speed}.")
+
+        self.waypoint_ids = np.array([HOME_WAYPOINT_ID, *waypoint_ids], dtype=object)
+        self.index = {waypoint_id: i for i, waypoint_id in enumerate(self.waypoint_ids)}
+        self.positions = np.vstack([home, positions])
+        self.distances = pairwise_distances(self.positions)
+        self.cruise_speed = cruise_speed
+        self.travel_costs = self.distances / cruise_speed if cruise_speed else self.distances
+        # Largest single leg, used to normalize path-length penalties
+        self.cost_scale = float(self.travel_costs.max()) or 1.0
+
+    @classmethod
+    def from_mission(cls, mission: Mission, home_position: Optional[Sequence[float]] = None,
+                     cruise_speed: Optional[float] = None) -> Optional[MissionGeometry]:
+        """Geometry of a mission, or None if any of its waypoints has no position."""
+        if not mission.waypoints or any(wp.position is None for wp in mission.waypoints):
+            return None
+        return cls(
+            [wp.waypoint_id for wp in mission.waypoints],
+            [wp.position for wp in mission.waypoints],
+            home_position=home_position,
+            cruise_speed=cruise_speed
+        )
+
+    def __len__(self) -> int:
+        return len(self.waypoint_ids)
+
+    def travel_cost(self, from_id: Optional[str], to_id: str) -> float:
+        """Cost of one leg; an unknown start (before the first move) is the home position."""
+        return float(self.travel_costs[self.index.get(from_id, 0), self.index[to_id]])
+
+    def route_cost(self, waypoint_ids: List[str]) -> float:
+        """Cost of flying from home along `waypoint_ids`."""
+        route = np.fromiter((self.index[waypoint_id] for waypoint_id in waypoint_ids), dtype=np.intp, count=len(waypoint_ids))
+        route = np.concatenate(([0], route))
+        return float(self.travel_costs[route[:-1], route[1:]].sum())
+
+    def nearest(self, from_id: Optional[str], mask: np.ndarray, limit: Optional[int] = None):
+        """Ids and distances of the waypoints selected by the boolean `mask`, nearest first.
+
+        With `limit`, only the `limit` nearest are selected (partial sort); a `limit` of 0 or less selects none.
+        """
+        candidates = np.flatnonzero(mask)
+        if limit is not None and limit <= 0:
+            candidates = candidates[:0]
+        distances = self.distances[self.index.get(from_id, 0), candidates]
+        if limit is not None and limit < len(candidates):
+            closest = np.argpartition(distances, limit - 1)[:limit]
+            order = closest[np.argsort(distances[closest], kind="stable")]
+        else:
+            order = np.argsort(distances, kind="stable")
+        return self.waypoint_ids[candidates[order]], distances[order]
@@ -2,12 +2,16 @@ from dataclasses import dataclass
 from typing import List, Optional
 from .waypoint import Waypoint
 
-@dataclass
+@dataclass(slots=True)
 class Mission:
     instruction: str
     waypoints: List[Waypoint]
     target_waypoint: Waypoint
     id: Optional[str] = None
+    # Provenance of sampled missions
+    task_name: Optional[str] = None
+    difficulty: Optional[str] = None
+    seed: Optional[int] = None
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Mission':
@@ -19,7 +23,8 @@ class Mission:
                 waypoint_id=wp_data['waypoint_id'],
                 gt_entities=wp_data.get('gt_entities', {}),
                 is_target=wp_data.get('is_target', False),
-                media=wp_data.get('media', {})
+                media=wp_data.get('media', {}),
+                position=wp_data.get('position')
             )
             waypoints.append(wp)
             if wp.is_target:
@@ -29,5 +34,18 @@ class Mission:
             instruction=data['instruction'],
             waypoints=waypoints,
             target_waypoint=target_waypoint,
-            id=data.get('id')
+            id=data.get('id'),
+            task_name=data.get('task_name'),
+            difficulty=data.get('difficulty'),
+            seed=data.get('seed')
         )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "instruction": self.instruction,
+            "waypoints": [wp.to_dict() for wp in self.waypoints],
+            "task_name": self.task_name,
+            "difficulty": self.difficulty,
+            "seed": self.seed
+        }
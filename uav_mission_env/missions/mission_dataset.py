@@ -0,0 +1,124 @@
+"""Materialized mission datasets: JSONL missions plus a binary offset index for O(1) random access.
+
+A dataset `missions.jsonl` is accompanied by `missions.jsonl.idx`, which holds N + 1 little-endian
+uint64 byte offsets (start of every line and the end of the file).
+
+Export from the command line:
+    python -m uav_mission_env.export_missions --num-missions 100000 --output missions.jsonl
+"""
+
+from __future__ import annotations
+import json
+import os
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from .mission import Mission
+from .mission_generator import MissionGenerator
+
+INDEX_SUFFIX = ".idx"
+_OFFSET_DTYPE = np.dtype("<u8")
+
+
+def export_missions(missions: Iterable[Mission], path: str) -> int:
+    """Write missions to `path` and its offset index. Returns the number of missions written."""
+    offsets = [0]
+    with open(path, "wb") as f:
+        for mission in missions:
+            f.write(json.dumps(mission.to_dict(), separators=(",", ":")).encode("utf-8"))
+            f.write(b"\n")
+            offsets.append(f.tell())
+    np.asarray(offsets, dtype=_OFFSET_DTYPE).tofile(path + INDEX_SUFFIX)
+    return len(offsets) - 1
+
+
+def materialize_missions(batch_generator, num_missions: int, path: str, batch_size: int = 1024) -> int:
+    """Export the first `num_missions` missions of a MissionBatchGenerator stream, batch by batch."""
+    def stream() -> Iterator[Mission]:
+        for start in range(0, num_missions, batch_size):
+            yield from batch_generator(start, min(batch_size, num_missions - start))
+    return export_missions(stream(), path)
+
+
+class MissionDataset:
+    """Random access to an exported mission file. Opened lazily, so it can be sent to worker processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        index_path = path + INDEX_SUFFIX
+        if not os.path.exists(path) or not os.path.exists(index_path):
+            raise FileNotFoundError(f"Mission dataset or its index not found: {path}")
+        self._offsets = None
+        self._file = None
+
+    @property
+    def offsets(self) -> np.ndarray:
+        if self._offsets is None:
+            self._offsets = np.memmap(self.path + INDEX_SUFFIX, dtype=_OFFSET_DTYPE, mode="r")
+        return self._offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def read_dict(self, index: int) -> dict:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Mission index {index} out of range for {len(self)} missions.")
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        self._file.seek(start)
+        return json.loads(self._file.read(end - start))
+
+    def __getitem__(self, index: int) -> Mission:
+        return Mission.from_dict(self.read_dict(index))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._offsets = None
+
+    def __getstate__(self):
+        return {"path": self.path, "_offsets": None, "_file": None}
+
+
+class DatasetMissionGenerator(MissionGenerator):
+    """Streams missions from an exported dataset.
+
+    The dataset is sharded by worker: rank `r` of `world_size` serves the missions with
+    `index % world_size == r`. Missions are served in order, or in a per-epoch permutation when
+    `shuffle` is set, and the shard repeats after it is exhausted.
+    """
+
+    def __init__(self, dataset_path: str, rank: int = 0, world_size: int = 1, shuffle: bool = False, seed: int = 0):
+        if not 0 <= rank < world_size:
+            raise ValueError(f"rank must be in [0, {world_size}), got {rank}.")
+        self.dataset = MissionDataset(dataset_path)
+        self.rank = rank
+        self.world_size = world_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.shard_size = len(range(rank, len(self.dataset), world_size))
+        if self.shard_size == 0:
+            raise ValueError(f"Shard {rank}/{world_size} of {dataset_path} is empty.")
+        self.epoch = 0
+        self._position = 0
+        self._order: Optional[np.ndarray] = None
+
+    def get_mission(self, shard_index: int) -> Mission:
+        """Mission at position `shard_index` of this worker's shard."""
+        return self.dataset[self.rank + shard_index * self.world_size]
+
+    def generate_mission(self, **kwargs) -> Mission:
+        if self._position >= self.shard_size:
+            self._position = 0
+            self.epoch += 1
+            self._order = None
+        shard_index = self._position
+        if self.shuffle:
+            if self._order is None:
+                self._order = np.random.RandomState([self.seed, self.rank, self.epoch]).permutation(self.shard_size)
+            shard_index = int(self._order[shard_index])
+        self._position += 1
+        return self.get_mission(shard_index)
@@ -1,40 +1,69 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-import json
 import yaml
 import os
 import numpy as np
 from .mission import Mission
-from .waypoint import Waypoint
+from .waypoint import DatasetWaypoint
+from .dataset_index import DatasetIndex
 from .task import TaskRegistry, Task
 
 class MissionGenerator(ABC):
     @abstractmethod
-    def generate_mission(self) -> Mission:
+    def generate_mission(self, **kwargs) -> Mission:
+        """Return the next mission. Sampling options (num_samples, custom_plan, ...) may be ignored."""
         pass
 
 class RandomMissionGenerator(MissionGenerator):
-    def __init__(self, dataset_metadata_path: str, task_registry: Optional[TaskRegistry] = None, random_generator: np.random = np.random.RandomState()):
+    def __init__(self, dataset_metadata_path: str, task_registry: Optional[TaskRegistry] = None, random_generator: np.random = np.random.RandomState(),
+                 area_size: Optional[List[float]] = None):
         self.dataset_metadata_path = dataset_metadata_path
         self.task_registry = task_registry
         self.random_generator = random_generator
+        # Extent of the mission area in meters, e.g. [500, 500] or [500, 500, 50]. Waypoints without a
+        # position in the metadata are placed uniformly at random inside it.
+        self.area_size = area_size
+        self._dataset_index = None
+        self._waypoint_id_cache: List[str] = []
 
-    def _sample_from_metadata(self, num_samples: int):
-        with open(self.dataset_metadata_path, 'r') as f:
-            metadata = json.load(f)
-        sampled_missions = self.random_generator.choice(metadata, size=num_samples, replace=False)
-        return sampled_missions
+    @property
+    def dataset_index(self) -> DatasetIndex:
+        # Loaded once per process and shared with every other generator of the same dataset
+        if self._dataset_index is None:
+            self._dataset_index = DatasetIndex.load(self.dataset_metadata_path)
+        return self._dataset_index
 
-    def generate_mission(self, num_samples: int = 5, custom_plan: str = None, target_criteria: dict = None) -> Mission:
-        sampled_missions = self._sample_from_metadata(num_samples)
+    def _waypoint_ids(self, num_samples: int) -> List[str]:
+        # Interned once, shared by all missions of this generator
+        if len(self._waypoint_id_cache) < num_samples:
+            self._waypoint_id_cache = [f"waypoint_{i}" for i in range(num_samples)]
+        return self._waypoint_id_cache[:num_samples]
+
+    def _sample_from_metadata(self, num_samples: int, random_generator: np.random = None) -> np.ndarray:
+        """Rows of the dataset index to build a mission from."""
+        random_generator = random_generator if random_generator is not None else self.random_generator
+        dataset_size = len(self.dataset_index)
+        # Missions larger than the dataset reuse samples
+        return random_generator.choice(dataset_size, size=num_samples, replace=num_samples > dataset_size)
+
+    def generate_mission(self, num_samples: int = 5, custom_plan: str = None, target_criteria: dict = None,
+                         task_name: str = None, random_generator: np.random = None, **kwargs) -> Mission:
+        """Sample a mission from the dataset.
+
+        `task_name` forces a task instead of drawing one, `random_generator` replaces the generator's
+        own random state for this call (used for per-mission seeding by the MissionQueue).
+        """
+        random_generator = random_generator if random_generator is not None else self.random_generator
+        dataset_index = self.dataset_index
+        rows = self._sample_from_metadata(num_samples, random_generator).tolist()
         
         target_index = -1
         if target_criteria:
             # Find index matching criteria
-            for i, mission in enumerate(sampled_missions):
+            for i, row in enumerate(rows):
                 match = True
                 for k, v in target_criteria.items():
-                    if mission.get("gt_entities", {}).get(k) != v:
+                    if dataset_index.gt_entities[row].get(k) != v:
                         match = False
                         break
                 if match:
@@ -43,49 +72,54 @@ class RandomMissionGenerator(MissionGenerator):
         
         if target_index == -1:
             # Randomly select which waypoint will be the target
-            target_index = self.random_generator.randint(0, num_samples)
-
-        mission_instruction = ""
-        waypoints = []
-        target_waypoint = None
-
-        for i, mission_data in enumerate(sampled_missions):
-            is_target = (i == target_index)
-            waypoint = Waypoint(
-                waypoint_id=f"waypoint_{i}",
-                gt_entities=mission_data.get("gt_entities", {}),
-                is_target=is_target,
-                media=mission_data.get("media", [])
-            )
-            waypoints.append(waypoint)
-            
-            if is_target:
-                target_waypoint = waypoint
-                if custom_plan:
-                    mission_instruction = custom_plan
-                else:
-                    # Select a random task
-                    task_names = self.task_registry.list_tasks() if self.task_registry else []
-                    if not task_names:
-                        # Fallback if no tasks configured
-                        mission_instruction = f"Find the box with number {mission_data['gt_entities'].get('number', 'unknown')}."
-                    else:
-                        task_name = self.random_generator.choice(task_names)
-                        task_config = self.task_registry.get_task_config(task_name)
-                        task = Task(task_config, mission_data.get("gt_entities", {}))
-                        mission_instruction = task.instruction
+            target_index = random_generator.randint(0, num_samples)
+
+        positions = None
+        if dataset_index.positions is not None:
+            positions = [dataset_index.position(row) for row in rows]
+        if self.area_size is not None:
+            sampled_positions = random_generator.uniform(0.0, 1.0, size=(num_samples, len(self.area_size))) * np.asarray(self.area_size, dtype=np.float64)
+            positions = sampled_positions if positions is None else [
+                position if position is not None else sampled for position, sampled in zip(positions, sampled_positions)
+            ]
+
+        # Waypoints are views into the shared dataset index, nothing is copied per mission
+        waypoint_ids = self._waypoint_ids(num_samples)
+        waypoints = [DatasetWaypoint(waypoint_id, dataset_index, row) for waypoint_id, row in zip(waypoint_ids, rows)]
+        if positions is not None:
+            for waypoint, position in zip(waypoints, positions):
+                if position is not None:
+                    waypoint.position = tuple(position.tolist())
+        target_waypoint = waypoints[target_index]
+        target_waypoint.is_target = True
+
+        if custom_plan:
+            mission_instruction = custom_plan
+        else:
+            # Select a random task
+            task_names = self.task_registry.list_tasks() if self.task_registry else []
+            if not task_names:
+                # Fallback if no tasks configured
+                mission_instruction = f"Find the box with number {target_waypoint.gt_entities.get('number', 'unknown')}."
+            else:
+                if task_name is None:
+                    task_name = str(random_generator.choice(task_names))
+                task_config = self.task_registry.get_task_config(task_name)
+                task = Task(task_config, target_waypoint.gt_entities)
+                mission_instruction = task.instruction
 
         return Mission(
             instruction=mission_instruction,
             waypoints=waypoints,
-            target_waypoint=target_waypoint
+            target_waypoint=target_waypoint,
+            task_name=task_name
         )
 
 class PresampledMissionGenerator(MissionGenerator):
     def __init__(self, mission: Mission):
         self.mission = mission
 
-    def generate_mission(self) -> Mission:
+    def generate_mission(self, **kwargs) -> Mission:
         return self.mission
 
 class ConfigMissionGenerator(MissionGenerator):
@@ -102,5 +136,5 @@ class ConfigMissionGenerator(MissionGenerator):
             
         return Mission.from_dict(data)
 
-    def generate_mission(self) -> Mission:
+    def generate_mission(self, **kwargs) -> Mission:
         return self.mission
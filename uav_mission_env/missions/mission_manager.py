@@ -1,17 +1,30 @@
 import numpy as np
 import json
 import os
-from typing import Optional
+import bisect
+from itertools import accumulate, islice
+from typing import List, Optional, Union
 from .waypoint import Waypoint, WaypointManager
 from .task import Task, TaskRegistry
 from .mission_generator import MissionGenerator, RandomMissionGenerator
+from .mission import Mission
+from .mission_queue import MissionQueue
+from .geometry import MissionGeometry
 
 class MissionManager:
-    def  __init__(self, dataset_metadata_path: str, random_generator: np.random = np.random.RandomState(), task_registry: TaskRegistry = None, mission_generator: Optional[MissionGenerator] = None):
+    def  __init__(self, dataset_metadata_path: str, random_generator: np.random = np.random.RandomState(), task_registry: TaskRegistry = None, mission_generator: Optional[MissionGenerator] = None, mission_queue: Optional[MissionQueue] = None, mission_size: Union[int, dict] = 5,
+                  home_position: Optional[List[float]] = None, cruise_speed: Optional[float] = None):
         self.dataset_metadata_path = dataset_metadata_path
         self.random_generator = random_generator
         self.waypoint_manager = WaypointManager()
         self.task_registry = task_registry
+        # Pre-generated missions; bypassed when reset asks for a custom plan or target
+        self.mission_queue = mission_queue
+        # Number of waypoints per sampled mission: an int, {"min": a, "max": b} or {"choices": [...], "weights": [...]}
+        self.mission_size = mission_size
+        # Travel costs are available for missions whose waypoints all have positions
+        self.home_position = home_position
+        self.cruise_speed = cruise_speed
 
         if mission_generator:
             self.mission_generator = mission_generator
@@ -22,42 +35,93 @@ class MissionManager:
                 random_generator=random_generator
             )
 
-        self.reset()
+        # The first mission of a queue is shown without taking it, so the first reset still gets it
+        self.reset(mission=self.mission_queue.peek() if self.mission_queue is not None else None)
+
+    @property
+    def available_waypoints(self) -> list:
+        """Unvisited waypoint ids in presentation order (a copy)."""
+        return list(self._available_waypoints)
+
+    @available_waypoints.setter
+    def available_waypoints(self, waypoint_ids: list):
+        # Insertion-ordered dict used as an ordered set: O(1) membership and removal, stable order
+        self._available_waypoints = dict.fromkeys(waypoint_ids)
+
+    @property
+    def num_available_waypoints(self) -> int:
+        return len(self._available_waypoints)
+
+    def get_available_waypoints(self, limit: Optional[int] = None) -> list:
+        """The first `limit` unvisited waypoint ids without copying the full list."""
+        if limit is None:
+            return list(self._available_waypoints)
+        return list(islice(self._available_waypoints, limit))
 
     def visit_waypoint(self, waypoint_id: str):
-        if waypoint_id in self.available_waypoints:
-            self.available_waypoints.remove(waypoint_id)
+        if waypoint_id in self._available_waypoints:
+            del self._available_waypoints[waypoint_id]
             self.visited_waypoints.append(waypoint_id)
-            self.current_waypoint_id = waypoint_id
-        elif waypoint_id == "ground":
-            self.current_waypoint_id = waypoint_id
-        else:
+        elif waypoint_id != "ground":
             raise ValueError(f"Waypoint {waypoint_id} has already been visited or does not exist.")
+        if self.geometry is not None:
+            self.last_travel_cost = self.geometry.travel_cost(self.current_waypoint_id, waypoint_id)
+            self.path_cost += self.last_travel_cost
+            self.unvisited_mask[self.geometry.index[waypoint_id]] = False
+        self.current_waypoint_id = waypoint_id
         
 
-    def reset(self, num_samples: int = 5, seed: int = None, custom_plan: str = None, target_criteria: dict = None):
+    def sample_mission_size(self) -> int:
+        size = self.mission_size
+        if isinstance(size, dict):
+            if 'choices' in size:
+                # Same draw as random_generator.choice(p=...), without the temporary arrays
+                choices = size['choices']
+                cumulative = list(accumulate(size.get('weights') or [1.0] * len(choices)))
+                draw = self.random_generator.random_sample() * cumulative[-1]
+                return int(choices[min(bisect.bisect_right(cumulative, draw), len(choices) - 1)])
+            return int(self.random_generator.randint(size['min'], size['max'] + 1))
+        return int(size)
+
+    def reset(self, num_samples: Optional[int] = None, seed: int = None, custom_plan: str = None, target_criteria: dict = None,
+              mission: Optional[Mission] = None, waypoint_order: Optional[List[str]] = None):
         if seed is not None:
             self.random_generator.seed(seed)
-        self.waypoint_manager.reset(seed=seed)
-        
-        # Generate mission using the generator
-        if isinstance(self.mission_generator, RandomMissionGenerator):
-             mission = self.mission_generator.generate_mission(num_samples=num_samples, custom_plan=custom_plan, target_criteria=target_criteria)
-        else:
-             mission = self.mission_generator.generate_mission()
+        if num_samples is None and mission is None:
+            num_samples = self.sample_mission_size()
+
+        # Take a ready mission from the queue or generate one using the generator
+        if mission is None and self.mission_queue is not None and custom_plan is None and target_criteria is None:
+            # A seed selects mission `seed` of the stream, popped when it is the next one
+            mission = self.mission_queue.get(seed) if seed is not None else self.mission_queue.pop()
+        elif mission is None:
+            mission = self.mission_generator.generate_mission(num_samples=num_samples, custom_plan=custom_plan, target_criteria=target_criteria)
 
         # Update internal state
+        self.mission = mission
         self.current_mission = mission.instruction
         self.target_waypoint = mission.target_waypoint
         
-        # Add waypoints to manager
-        for wp in mission.waypoints:
-            self.waypoint_manager.add_waypoint(wp)
-            
-        self.waypoints = self.waypoint_manager.get_random_waypoint_id_list()
-        self.available_waypoints = self.waypoints.copy()
+        # Episode-scoped waypoint storage, presented in shuffled order
+        self.waypoints = self.waypoint_manager.reset(seed=seed, waypoints=mission.waypoints)
+        if waypoint_order is not None:
+            # A recorded presentation order replaces the shuffled one (the shuffle still advances the random state)
+            if len(waypoint_order) != len(self.waypoints) or set(waypoint_order) != set(self.waypoints):
+                raise ValueError("waypoint_order must list every waypoint id of the mission exactly once.")
+            self.waypoints = list(waypoint_order)
+        self.available_waypoints = self.waypoints
         self.visited_waypoints = []
         self.current_waypoint_id = None
 
+        # Pairwise travel costs are computed once per mission
+        self.geometry = MissionGeometry.from_mission(mission, home_position=self.home_position, cruise_speed=self.cruise_speed)
+        self.path_cost = 0.0
+        self.last_travel_cost = 0.0
+        self.unvisited_mask = None
+        if self.geometry is not None:
+            self.unvisited_mask = np.ones(len(self.geometry), dtype=bool)
+            self.unvisited_mask[0] = False
 
-        
\ No newline at end of file
+    def close(self):
+        if self.mission_queue is not None:
+            self.mission_queue.close()
@@ -0,0 +1,216 @@
+"""Bulk mission pre-generation with weighted task/difficulty mixtures."""
+
+from __future__ import annotations
+import bisect
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .mission import Mission
+from .mission_generator import RandomMissionGenerator
+from .task import DifficultyConfig, TaskRegistry
+
+DEFAULT_NUM_SAMPLES = 5
+_MASK_64 = (1 << 64) - 1
+
+
+class MissionBatchGenerator:
+    """Generates missions as a pure function of (seed, mission index).
+
+    Every mission draws its task, difficulty and samples from its own random state derived from
+    the stream seed and its index, so the stream does not depend on batching or threading.
+    """
+
+    def __init__(self, mission_generator: RandomMissionGenerator, seed: int = 0,
+                 task_weights: Optional[Dict[str, float]] = None,
+                 difficulties: Optional[List[DifficultyConfig]] = None):
+        self.mission_generator = mission_generator
+        self.seed = seed
+        task_registry: Optional[TaskRegistry] = mission_generator.task_registry
+
+        if task_weights is None and task_registry is not None:
+            task_weights = {name: config.weight for name, config in task_registry.tasks.items()}
+        self.task_names = list(task_weights) if task_weights else []
+        self.task_probabilities = self._normalize([task_weights[name] for name in self.task_names]) if self.task_names else None
+
+        if difficulties is None and task_registry is not None and task_registry.difficulties:
+            difficulties = list(task_registry.difficulties.values())
+        self.difficulties = difficulties or [DifficultyConfig(name="default", num_samples=DEFAULT_NUM_SAMPLES)]
+        self.difficulty_probabilities = self._normalize([difficulty.weight for difficulty in self.difficulties])
+
+        # Creating a RandomState is expensive, re-seeding one is cheap
+        self._random_generator = np.random.RandomState()
+
+    @staticmethod
+    def _normalize(weights: List[float]) -> List[float]:
+        """Cumulative distribution of the weights, for sampling with bisect."""
+        weights = np.asarray(weights, dtype=np.float64)
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("Mixture weights must be non-negative and sum to a positive value.")
+        return np.cumsum(weights / weights.sum()).tolist()
+
+    @staticmethod
+    def _draw(cumulative: List[float], random_generator: np.random.RandomState) -> int:
+        return min(bisect.bisect_right(cumulative, random_generator.random_sample()), len(cumulative) - 1)
+
+    def mission_seed(self, index: int) -> int:
+        # splitmix64 of (seed, index), truncated to the 32 bits accepted by RandomState
+        z = ((self.seed << 32) ^ index) + 0x9E3779B97F4A7C15 & _MASK_64
+        z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK_64
+        z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK_64
+        return (z ^ (z >> 31)) & 0xFFFFFFFF
+
+    def generate(self, index: int, random_generator: Optional[np.random.RandomState] = None) -> Mission:
+        mission_seed = self.mission_seed(index)
+        random_generator = random_generator if random_generator is not None else self._random_generator
+        random_generator.seed(mission_seed)
+        difficulty = self.difficulties[self._draw(self.difficulty_probabilities, random_generator)]
+        task_name = None
+        if self.task_names:
+            task_name = self.task_names[self._draw(self.task_probabilities, random_generator)]
+        mission = self.mission_generator.generate_mission(
+            num_samples=difficulty.num_samples,
+            task_name=task_name,
+            random_generator=random_generator
+        )
+        mission.id = f"{self.seed}-{index}"
+        mission.difficulty = difficulty.name
+        mission.seed = mission_seed
+        return mission
+
+    def __call__(self, start_index: int, count: int) -> List[Mission]:
+        return [self.generate(index) for index in range(start_index, start_index + count)]
+
+
+def _produce_missions(batch_generator: MissionBatchGenerator, start_index: int, batch_size: int, missions, stop_event) -> None:
+    """Producer loop run in the background thread or process."""
+    index = start_index
+    while not stop_event.is_set():
+        batch = batch_generator(index, batch_size)
+        index += batch_size
+        while not stop_event.is_set():
+            try:
+                missions.put(batch, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class MissionQueue:
+    """Keeps up to `depth` missions of a deterministic stream ready for MissionManager.reset.
+
+    background: 'thread' or 'process' pre-generate in the background, None generates a batch of
+    `batch_size` missions synchronously whenever the buffer runs empty.
+    """
+
+    BACKGROUND_MODES = (None, "thread", "process")
+
+    def __init__(self, batch_generator: MissionBatchGenerator, depth: int = 64, batch_size: int = 16,
+                 background: Optional[str] = "thread"):
+        if background not in self.BACKGROUND_MODES:
+            raise ValueError(f"Unknown background mode '{background}', expected one of {self.BACKGROUND_MODES}.")
+        self.batch_generator = batch_generator
+        self.batch_size = max(1, batch_size)
+        self.depth = max(self.batch_size, depth)
+        self.background = background
+        self._buffer: deque = deque()
+        self._next_index = 0
+        # Missions requested out of stream order are generated on the caller's thread with their own random state
+        self._random_generator = np.random.RandomState()
+        self._missions = None
+        self._stop_event = None
+        self._worker = None
+
+    @classmethod
+    def from_config(cls, mission_generator: RandomMissionGenerator, queue_config: dict, seed: int = 0) -> MissionQueue:
+        difficulties = queue_config.get('difficulties')
+        if difficulties is not None:
+            difficulties = [
+                DifficultyConfig(name=name, num_samples=int(info['num_samples']), weight=float(info.get('weight', 1.0)))
+                for name, info in difficulties.items()
+            ]
+        batch_generator = MissionBatchGenerator(
+            mission_generator,
+            seed=queue_config.get('seed', seed),
+            task_weights=queue_config.get('task_weights'),
+            difficulties=difficulties
+        )
+        return cls(
+            batch_generator,
+            depth=queue_config.get('depth', 64),
+            batch_size=queue_config.get('batch_size', 16),
+            background=queue_config.get('background', 'thread')
+        )
+
+    def start(self) -> None:
+        if self.background is None or self._worker is not None:
+            return
+        maxsize = max(1, self.depth // self.batch_size)
+        if self.background == "thread":
+            self._missions = queue.Queue(maxsize=maxsize)
+            self._stop_event = threading.Event()
+            self._worker = threading.Thread(
+                target=_produce_missions,
+                args=(self.batch_generator, self._next_index, self.batch_size, self._missions, self._stop_event),
+                daemon=True
+            )
+        else:
+            self._missions = multiprocessing.Queue(maxsize=maxsize)
+            self._stop_event = multiprocessing.Event()
+            self._worker = multiprocessing.Process(
+                target=_produce_missions,
+                args=(self.batch_generator, self._next_index, self.batch_size, self._missions, self._stop_event),
+                daemon=True
+            )
+        self._worker.start()
+
+    @property
+    def next_index(self) -> int:
+        """Stream index of the mission the next `pop` returns."""
+        return self._next_index - len(self._buffer)
+
+    def _fill(self) -> None:
+        if self.background is None:
+            self._buffer.extend(self.batch_generator(self._next_index, self.batch_size))
+            self._next_index += self.batch_size
+        else:
+            self.start()
+            batch = self._missions.get()
+            self._buffer.extend(batch)
+            # A restarted producer continues after the last batch that was taken
+            self._next_index += len(batch)
+
+    def pop(self) -> Mission:
+        if not self._buffer:
+            self._fill()
+        return self._buffer.popleft()
+
+    def peek(self) -> Mission:
+        """The mission the next `pop` returns, without taking it."""
+        if not self._buffer:
+            self._fill()
+        return self._buffer[0]
+
+    def get(self, index: int) -> Mission:
+        """Mission `index` of the stream: popped when it is the next one, generated directly otherwise."""
+        if index == self.next_index:
+            return self.pop()
+        return self.batch_generator.generate(index, random_generator=self._random_generator)
+
+    def close(self) -> None:
+        if self._worker is None:
+            return
+        self._stop_event.set()
+        if self.background == "process":
+            # Do not block on data still buffered in the pipe of the process queue
+            self._missions.cancel_join_thread()
+        self._worker.join(timeout=5)
+        if self.background == "process" and self._worker.is_alive():
+            self._worker.terminate()
+        self._worker = None
+        self._missions = None
+        self._stop_event = None
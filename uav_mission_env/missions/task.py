@@ -9,6 +9,13 @@ class TaskConfig:
     description: str
     template: str
     required_keys: List[str]
+    weight: float = 1.0
+
+@dataclass
+class DifficultyConfig:
+    name: str
+    num_samples: int
+    weight: float = 1.0
 
 class Task:
     def __init__(self, config: TaskConfig, target_attributes: Dict[str, Any]):
@@ -27,7 +34,9 @@ class Task:
 
 class TaskRegistry:
     def __init__(self, config_path: str):
-        self.tasks: Dict[str, TaskConfig] = self._load_tasks(config_path)
+        self.tasks: Dict[str, TaskConfig] = {}
+        self.difficulties: Dict[str, DifficultyConfig] = {}
+        self._load_tasks(config_path)
 
     def _load_tasks(self, config_path: str) -> Dict[str, TaskConfig]:
         if not os.path.exists(config_path):
@@ -36,13 +45,21 @@ class TaskRegistry:
         with open(config_path, 'r') as f:
             data = yaml.safe_load(f)
         
-        tasks = {}
+        tasks = self.tasks
         for name, info in data.get('tasks', {}).items():
             tasks[name] = TaskConfig(
                 name=name,
                 description=info.get('description', ''),
                 template=info.get('template', ''),
-                required_keys=info.get('required_keys', [])
+                required_keys=info.get('required_keys', []),
+                weight=float(info.get('weight', 1.0))
+            )
+        # Optional mission difficulties (number of sampled waypoints) used by the MissionQueue
+        for name, info in (data.get('difficulties') or {}).items():
+            self.difficulties[name] = DifficultyConfig(
+                name=name,
+                num_samples=int(info['num_samples']),
+                weight=float(info.get('weight', 1.0))
             )
         return tasks
 
@@ -51,3 +68,6 @@ class TaskRegistry:
 
     def list_tasks(self) -> List[str]:
         return list(self.tasks.keys())
+
+    def list_difficulties(self) -> List[str]:
+        return list(self.difficulties.keys())
@@ -1,30 +1,85 @@
 import numpy as np
+from typing import Iterable, Optional, Sequence
+
+from ..utils.immutable import FrozenDict, FrozenList
 
 class Waypoint:
+    # Missions with hundreds of waypoints in many environments add up, so no per-instance __dict__
+    __slots__ = ("waypoint_id", "gt_entities", "is_target", "media", "position")
+
     def __init__(
             self, waypoint_id: str, 
             gt_entities: dict = None,
             is_target: bool = False, 
-            media: dict = None):
+            media: dict = None,
+            position: Optional[Sequence[float]] = None):
         self.waypoint_id = waypoint_id
         self.gt_entities = gt_entities if gt_entities is not None else {}  # dictionary containing information about the waypoint, for verifiable rewards
         self.is_target = is_target  # True if this waypoint is the target, False otherwise
         self.media = media if media is not None else {}  # dictionary containing media information related to the waypoint
+        self.position = tuple(float(c) for c in position) if position is not None else None  # optional (x, y[, z]) coordinates in meters
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "waypoint_id": self.waypoint_id,
             "gt_entities": self.gt_entities,
             "is_target": self.is_target,
             "media": self.media
         }
+        if self.position is not None:
+            data["position"] = list(self.position)
+        return data
     
 class GroundWaypoint(Waypoint):
+    """The home/landing location. There is a single, read-only instance."""
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            Waypoint.__init__(instance, "ground", FrozenDict(), False, FrozenDict())
+            cls._instance = instance
+        return cls._instance
+
     def __init__(self):
-        super().__init__("ground", None, False, None)
+        pass
+
+    def __reduce__(self):
+        return (GroundWaypoint, ())
+
+
+class DatasetWaypoint(Waypoint):
+    """Waypoint whose ground truth and media are a view into a row of a shared DatasetIndex."""
+    __slots__ = ("dataset_index", "row")
+
+    def __init__(self, waypoint_id: str, dataset_index, row: int, is_target: bool = False,
+                 position: Optional[Sequence[float]] = None):
+        self.waypoint_id = waypoint_id
+        self.dataset_index = dataset_index
+        self.row = row
+        self.is_target = is_target
+        self.position = tuple(float(c) for c in position) if position is not None else None
+
+    @property
+    def gt_entities(self) -> dict:
+        return self.dataset_index.gt_entities[self.row]
+
+    @property
+    def media(self) -> list:
+        return self.dataset_index.media[self.row]
+
+    def __reduce__(self):
+        # The index pickles as a reference to its file, not as its columns
+        return (DatasetWaypoint, (self.waypoint_id, self.dataset_index, self.row, self.is_target, self.position))
+
+
+GROUND_WAYPOINT = GroundWaypoint()
 
 
 class WaypointManager:
+    """Waypoints of the current episode, keyed by id. The storage is replaced at every reset."""
+
     def __init__(self, random_generator: np.random = None):
         self.waypoints = {}
         self.random_generator = random_generator if random_generator is not None else np.random.RandomState()
@@ -34,7 +89,7 @@ class WaypointManager:
 
     def get_waypoint(self, waypoint_id: str) -> Waypoint:
         if waypoint_id == "ground":
-            return GroundWaypoint()
+            return GROUND_WAYPOINT
         return self.waypoints.get(waypoint_id)
 
     def remove_waypoint(self, waypoint_id: str):
@@ -46,12 +101,16 @@ class WaypointManager:
         self.random_generator.shuffle(waypoint_ids)
         return waypoint_ids
     
-    def reset(self, seed: int = None):
+    def reset(self, seed: int = None, waypoints: Optional[Iterable[Waypoint]] = None) -> list:
+        """Start a new episode with `waypoints` and return their ids in shuffled order.
+
+        The previous episode's waypoints are dropped by swapping in a new dict, so the cost does not
+        depend on how many episodes ran before.
+        """
         if seed is not None:
             self.random_generator.seed(seed)
-        waypoint_ids = list(self.waypoints.keys())
-        self.random_generator.shuffle(waypoint_ids)
-        return waypoint_ids
+        self.waypoints = {waypoint.waypoint_id: waypoint for waypoint in waypoints} if waypoints is not None else {}
+        return self.get_random_waypoint_id_list()
             
 
     
@@ -0,0 +1,125 @@
+"""Scripted stand-in for a VLM policy, for throughput measurements without a model.
+
+`MockAgent.act(observation)` returns raw model output: an optional `<think>` block followed by a
+JSON object that follows the state's output schema (`obs_payload['output_schema']`), with a tool
+call for one of `available_tools` whose parameters are generated from the tool's JSON schema.
+Location-like string parameters (names containing goal, waypoint or location) are drawn from the
+unvisited locations listed in the prompt, falling back to "ground". A share of the outputs can be
+made malformed to exercise error paths, and a think time emulates inference latency.
+
+    agent = MockAgent(seed=0, think_time=0.05, error_rate=0.1)
+    observation = env.reset(seed=0)
+    observation, reward, terminated, truncated, info = env.step(agent.act(observation))
+"""
+
+from __future__ import annotations
+import ast
+import json
+import random
+import time
+from typing import List, Optional, Sequence, Tuple, Union
+
+ERROR_KINDS = ("truncated_json", "no_json", "unknown_tool", "wrong_type", "unclosed_think")
+LOCATION_HINTS = ("goal", "waypoint", "location")
+
+_FILLER = (
+    "The image shows a parking area with several vehicles. No box with a visible number is in view. "
+    "The closest unvisited location should be checked next according to the plan. "
+)
+
+
+def unvisited_locations(prompt: str) -> List[str]:
+    """Ids of the first list after 'Unvisited' in a prompt, e.g. "['waypoint_2', 'waypoint_0']"."""
+    label = prompt.find("Unvisited")
+    start = prompt.find("[", label) if label >= 0 else -1
+    end = prompt.find("]", start)
+    if start < 0 or end < 0:
+        return []
+    try:
+        values = ast.literal_eval(prompt[start:end + 1])
+    except (ValueError, SyntaxError):
+        return []
+    return [value for value in values if isinstance(value, str)]
+
+
+class MockAgent:
+    """Produces schema-valid outputs for any state. think_time: seconds, or (low, high) for a uniform draw."""
+
+    def __init__(self, seed: Optional[int] = None, think_time: Union[float, Tuple[float, float]] = 0.0,
+                 error_rate: float = 0.0, think_chars: int = 200, land_probability: float = 0.0):
+        self.rng = random.Random(seed)
+        self.think_time = think_time
+        self.error_rate = error_rate
+        self.think_chars = think_chars
+        self.land_probability = land_probability
+        self.outputs = 0
+        self.malformed = 0
+
+    def _think(self) -> None:
+        think_time = self.think_time
+        if isinstance(think_time, (tuple, list)):
+            think_time = self.rng.uniform(*think_time)
+        if think_time > 0:
+            time.sleep(think_time)
+
+    def _text(self, max_length: Optional[int]) -> str:
+        text = _FILLER[:self.rng.randrange(20, len(_FILLER))]
+        return text[:max_length] if max_length is not None else text
+
+    def _value(self, name: str, schema: dict, locations: Sequence[str]):
+        if schema.get("enum"):
+            return self.rng.choice(list(schema["enum"]))
+        schema_type = schema.get("type", "string")
+        if schema_type == "boolean":
+            return self.rng.random() < 0.5
+        if schema_type in ("number", "float"):
+            return round(self.rng.random(), 3)
+        if schema_type == "integer":
+            return self.rng.randrange(10)
+        if schema_type == "object":
+            return {key: self._value(key, sub_schema, locations) for key, sub_schema in (schema.get("properties") or {}).items()}
+        if schema_type == "array":
+            return [self._value(name, schema.get("items") or {}, locations)]
+        if any(hint in name for hint in LOCATION_HINTS):
+            if not locations or self.rng.random() < self.land_probability:
+                return "ground"
+            return self.rng.choice(locations)
+        return self._text(schema.get("maxLength", schema.get("max_length")))
+
+    def output(self, observation: dict) -> dict:
+        """The output object for an observation, before serialization."""
+        payload = observation.get("obs_payload") or {}
+        tools = observation.get("available_tools") or []
+        locations = unvisited_locations(payload.get("prompt", ""))
+        schema = (payload.get("output_schema") or {}).get("json_schema") or {}
+        properties = schema.get("properties") or {"tool_call": {"type": "object"}}
+        output = {}
+        for key, key_schema in properties.items():
+            if key == "tool_call":
+                tool = self.rng.choice(tools) if tools else {"name": "", "parameters": {}}
+                output[key] = {"name": tool["name"], "parameters": self._value("", tool.get("parameters") or {}, locations)}
+            else:
+                output[key] = self._value(key, key_schema, locations)
+        return output
+
+    def act(self, observation: dict) -> str:
+        """Raw model output for an observation (after the think time)."""
+        self._think()
+        self.outputs += 1
+        output = self.output(observation)
+        thinking = "<think>" + (_FILLER * (1 + self.think_chars // len(_FILLER)))[:self.think_chars] + "</think>\n"
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.malformed += 1
+            kind = self.rng.choice(ERROR_KINDS)
+            if kind == "no_json":
+                return thinking + "I could not decide on an action."
+            if kind == "unclosed_think":
+                return thinking[:-len("</think>\n")] + json.dumps(output)
+            if kind == "truncated_json":
+                return thinking + json.dumps(output)[:-3]
+            tool_call = output.get("tool_call") or {}
+            if kind == "unknown_tool":
+                tool_call["name"] = "fly_somewhere"
+            else:
+                tool_call["parameters"] = {key: 0 for key in tool_call.get("parameters") or {"value": 0}}
+        return thinking + json.dumps(output)
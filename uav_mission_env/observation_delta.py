@@ -0,0 +1,151 @@
+"""Delta observations: only what changed since the previous observation of the same environment.
+
+With `observation_mode: delta` in the state config, every observation of an environment is a delta
+against the one before it (its stream), numbered by `version`:
+
+    {
+      "current_state": "execution",
+      "version": 7,
+      "base_version": 6,                        # None: start of a stream, caches are cleared
+      "state_info": {...},                      # first observation of a state in the stream:
+                                                #   prompt_template, output_schema, available_tools
+      "obs_payload": {
+        "prompt_fields": {"current_location": "waypoint_3", ...},   # changed field texts only
+        "prompt": "...",                        # only for templates without fields, when changed
+        "media": [...],                         # only when the shown media changed (None: no media)
+        "media_catalog": [...]                  # with media, when not all images are shown
+      }
+    }
+
+Per-state data is sent once per stream, so later episodes only carry field values and new media.
+`DeltaDecoder.apply` rebuilds the full observation on the client side:
+
+    decoder = DeltaDecoder()
+    observation = decoder.apply(env.reset(seed=0))
+    observation = decoder.apply(env.step(action)[0])
+"""
+
+from __future__ import annotations
+from typing import Callable, Dict, Optional
+
+from .utils.prompt_utils import PromptTemplate
+
+OBSERVATION_MODES = ("full", "delta")
+
+# Marker for "media not re-computed" (the waypoint and the selected images did not change)
+UNCHANGED = object()
+
+
+class DeltaMismatchError(RuntimeError):
+    """A delta does not apply to the decoder's last observation (lost or reordered observations)."""
+
+
+class DeltaEncoder:
+    """Server side: remembers what the stream's receiver already has."""
+
+    def __init__(self):
+        self.version = 0
+        self.restart()
+
+    def restart(self) -> None:
+        """Start a new stream: the next observation is sent in full."""
+        self._base_version: Optional[int] = None
+        self._states_sent = set()
+        self._fields: Dict[str, str] = {}
+        self._prompt: Optional[str] = None
+        self._media_key = UNCHANGED
+
+    def media_changed(self, media_key) -> bool:
+        """Whether media for `media_key` (e.g. the current waypoint and selection) has to be sent; records it as sent."""
+        if self._media_key is not UNCHANGED and self._media_key == media_key:
+            return False
+        self._media_key = media_key
+        return True
+
+    def new_episode(self) -> None:
+        # Waypoint ids repeat across episodes, so the first observation of an episode always has media
+        self._media_key = UNCHANGED
+
+    def encode(self, current_state: str, state_info: Optional[Callable[[], dict]] = None,
+               fields: Optional[dict] = None, prompt: Optional[str] = None, media=UNCHANGED) -> dict:
+        self.version += 1
+        observation = {'current_state': current_state, 'version': self.version, 'base_version': self._base_version}
+        self._base_version = self.version
+        if state_info is None:
+            return observation
+        if current_state not in self._states_sent:
+            self._states_sent.add(current_state)
+            observation['state_info'] = state_info()
+        payload = {}
+        if fields:
+            changed = {key: text for key, text in fields.items() if self._fields.get(key) != text}
+            if changed:
+                self._fields.update(changed)
+                payload['prompt_fields'] = changed
+        if prompt is not None and prompt != self._prompt:
+            self._prompt = prompt
+            payload['prompt'] = prompt
+        if media is not UNCHANGED:
+            # The waypoint observation's payload: media and an optional media_catalog
+            payload['media'] = media.get('media')
+            if media.get('media_catalog') is not None:
+                payload['media_catalog'] = media['media_catalog']
+        observation['obs_payload'] = payload
+        return observation
+
+
+class DeltaDecoder:
+    """Client side: applies the deltas of one stream and returns full observations."""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._states: Dict[str, dict] = {}
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._fields: Dict[str, str] = {}
+        self._prompt: Optional[str] = None
+        self._media = None
+        self._media_catalog = None
+
+    def apply(self, delta: dict) -> dict:
+        """Full observation for `delta`, in the format of `observation_mode: full`."""
+        base_version = delta.get('base_version')
+        if base_version is None:
+            self.__init__()
+        elif base_version != self.version:
+            raise DeltaMismatchError(f"Delta applies to version {base_version}, the decoder is at {self.version}.")
+        self.version = delta['version']
+        state = delta['current_state']
+        if 'state_info' in delta:
+            self._states[state] = delta['state_info']
+        observation = {'current_state': state}
+        payload_delta = delta.get('obs_payload')
+        if payload_delta is None:
+            return observation
+
+        info = self._states.get(state)
+        if info is None:
+            raise DeltaMismatchError(f"No state info for '{state}' in this stream.")
+        self._fields.update(payload_delta.get('prompt_fields') or {})
+        if 'prompt' in payload_delta:
+            self._prompt = payload_delta['prompt']
+        if 'media' in payload_delta:
+            self._media = payload_delta['media']
+            self._media_catalog = payload_delta.get('media_catalog')
+
+        payload = {}
+        if self._media is not None:
+            payload['media'] = self._media
+        if self._media_catalog is not None:
+            payload['media_catalog'] = self._media_catalog
+        template_text = info.get('prompt_template')
+        if template_text is None:
+            payload['prompt'] = self._prompt
+        else:
+            template = self._templates.get(template_text)
+            if template is None:
+                template = self._templates[template_text] = PromptTemplate(template_text)
+            payload['prompt'] = template.render_texts(self._fields)
+        payload['output_schema'] = info['output_schema']
+        observation['obs_payload'] = payload
+        observation['available_tools'] = info['available_tools']
+        return observation
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from ..missions.mission_manager import MissionManager
 from ..missions.waypoint import Waypoint
+from ..utils.media_utils import ImageEncoding, MediaHandle, expand_media
 
 
 class Observation:
@@ -44,52 +47,190 @@ class PlanObservation(Observation):
         plan = self.mission_manager.current_mission if self.mission_manager else "no plan available"
         return {self.name: plan}
 
-class LocationsToBeVisitedObservation(Observation):
-    def __init__(self, mission_manager: MissionManager = None):
-        super().__init__(name="locations_to_be_visited", mission_manager=mission_manager)
+class WaypointListObservation(Observation):
+    """Base for observations listing waypoint ids.
+
+    With `max_items` set, long lists are rendered as a window of `max_items` ids plus a count of the
+    omitted ones, so the prompt size does not grow with the mission size.
+    """
+
+    def __init__(self, name: str, mission_manager: MissionManager = None, max_items: int = None):
+        super().__init__(name=name, mission_manager=mission_manager)
+        self.max_items = max_items
+
+class LocationsToBeVisitedObservation(WaypointListObservation):
+    def __init__(self, mission_manager: MissionManager = None, max_items: int = None):
+        super().__init__(name="locations_to_be_visited", mission_manager=mission_manager, max_items=max_items)
 
     def execute(self, state: dict) -> str:
-        locations = self.mission_manager.available_waypoints if self.mission_manager else []
-        return {self.name: locations}
+        if not self.mission_manager:
+            return {self.name: []}
+        total = self.mission_manager.num_available_waypoints
+        if self.max_items is None or total <= self.max_items:
+            return {self.name: self.mission_manager.available_waypoints}
+        shown = self.mission_manager.get_available_waypoints(self.max_items)
+        return {self.name: f"{shown} (+{total - len(shown)} more, {total} in total)"}
 
-class PastLocationsObservation(Observation):
-    def __init__(self, mission_manager: MissionManager = None):
-        super().__init__(name="past_locations", mission_manager=mission_manager)
+class PastLocationsObservation(WaypointListObservation):
+    def __init__(self, mission_manager: MissionManager = None, max_items: int = None):
+        super().__init__(name="past_locations", mission_manager=mission_manager, max_items=max_items)
 
     def execute(self, state: dict) -> str:
         past_locations = self.mission_manager.visited_waypoints if self.mission_manager else []
-        return {self.name: past_locations}
+        total = len(past_locations)
+        if self.max_items is None or total <= self.max_items:
+            return {self.name: past_locations}
+        # The most recent visits are the relevant ones
+        shown = past_locations[total - self.max_items:]
+        return {self.name: f"(+{total - len(shown)} earlier, {total} in total) {shown}"}
     
+def _select_first(count: int, max_images: int):
+    return range(min(count, max_images))
+
+def _select_last(count: int, max_images: int):
+    return range(max(0, count - max_images), count)
+
+def _select_spread(count: int, max_images: int):
+    # Evenly spaced frames, including the first and the last
+    if max_images >= count:
+        return range(count)
+    if max_images <= 1:
+        return range(max_images)
+    return sorted({round(i * (count - 1) / (max_images - 1)) for i in range(max_images)})
+
+# Which `max_images` of a waypoint's media items are shown without being requested
+IMAGE_SELECTIONS = {
+    "first": _select_first,
+    "last": _select_last,
+    "spread": _select_spread,
+}
+
 class CurrentWaypointObservation(Observation):
-    def __init__(self, mission_manager: MissionManager = None):
+    # encode: load and base64-encode every image, reference: only return media references, disabled: no media
+    MEDIA_MODES = ("encode", "reference", "disabled")
+
+    def __init__(self, mission_manager: MissionManager = None, media_mode: str = "encode"):
         super().__init__(name="waypoint", mission_manager=mission_manager)
+        if media_mode not in self.MEDIA_MODES:
+            raise ValueError(f"Unknown media mode '{media_mode}', expected one of {self.MEDIA_MODES}.")
+        self.media_mode = media_mode
+        # Optional ImagePyramidCache that encoded images are resized from (set by the environment)
+        self.pyramid_cache = None
+        # Current visit: [waypoint, media items (videos expanded to frames), (image resolution, encoding),
+        # handles, indices requested with view_images]
+        self._visit = None
 
-    def execute(self, state: dict):
+    def reset(self) -> None:
+        self._visit = None
+
+    def _current_waypoint(self) -> Optional[Waypoint]:
         if self.mission_manager and self.mission_manager.current_waypoint_id is not None:
-            waypoint = self.mission_manager.waypoint_manager.get_waypoint(self.mission_manager.current_waypoint_id)
-            if waypoint:
-                #get image resolution from config
-                image_res_config = state.get("image_resolution", {})
-                width = image_res_config.get("width", 640)
-                height = image_res_config.get("height", 480)
-                
-                obs_payload = {"media": self.encode_media(waypoint.media, image_resolution=(width, height)),}
-                return {"obs_payload": obs_payload}
+            return self.mission_manager.waypoint_manager.get_waypoint(self.mission_manager.current_waypoint_id)
+        return None
+
+    def _visit_of(self, waypoint: Waypoint) -> list:
+        if self._visit is None or self._visit[0] is not waypoint:
+            self._visit = [waypoint, expand_media(waypoint.media), None, None, set()]
+        return self._visit
+
+    def _handles(self, waypoint: Waypoint, image_resolution, encoding: Optional[ImageEncoding] = None) -> tuple:
+        visit = self._visit_of(waypoint)
+        if visit[3] is None or visit[2] != (image_resolution, encoding):
+            visit[2] = (image_resolution, encoding)
+            visit[3] = [MediaHandle(index, item, image_resolution, encoding) for index, item in enumerate(visit[1])]
+        return visit[3], visit[4]
+
+    def request(self, indices: list) -> list:
+        """Show the media items `indices` of the current waypoint in the following observations of this
+        visit. Returns all requested indices; raises ValueError for unknown ones."""
+        waypoint = self._current_waypoint()
+        if not waypoint:
+            raise ValueError("No current waypoint")
+        visit = self._visit_of(waypoint)
+        count = len(visit[1])
+        invalid = [index for index in indices if not isinstance(index, int) or not 0 <= index < count]
+        if invalid:
+            raise ValueError(f"Unknown image indices {invalid}, the waypoint has {count} images")
+        requested = visit[4]
+        requested.update(indices)
+        return sorted(requested)
+
+    def requested_indices(self) -> tuple:
+        visit = self._visit
+        if visit is None or visit[0] is not self._current_waypoint():
+            return ()
+        return tuple(sorted(visit[4]))
+
+    def execute(self, state: dict, max_images: Optional[int] = None, image_selection: str = "first",
+                encoding: Optional[ImageEncoding] = None):
+        waypoint = self._current_waypoint()
+        if waypoint:
+            #get image resolution from config
+            image_res_config = state.get("image_resolution", {})
+            width = image_res_config.get("width", 640)
+            height = image_res_config.get("height", 480)
+
+            handles, requested = self._handles(waypoint, (width, height), encoding)
+            if max_images is None or max_images >= len(handles):
+                selected = handles
+            else:
+                indices = set(IMAGE_SELECTIONS[image_selection](len(handles), max_images))
+                indices.update(requested)
+                selected = [handle for handle in handles if handle.index in indices]
+            if self.media_mode == "reference":
+                media = [handle.reference() for handle in selected]
+            else:
+                missing = [handle for handle in selected if handle.encoded is None]
+                if missing:
+                    encoded = self.encode_media([handle.item for handle in missing], image_resolution=(width, height), encoding=encoding)
+                    for handle, item in zip(missing, encoded):
+                        handle.encoded = item
+                media = [handle.encoded for handle in selected]
+            obs_payload = {"media": media,}
+            if len(selected) < len(handles):
+                shown = {handle.index for handle in selected}
+                obs_payload["media_catalog"] = [handle.describe(handle.index in shown) for handle in handles]
+            return {"obs_payload": obs_payload}
         return {"obs_payload": {}}
 
-    def encode_media(self, media_list: list, image_resolution=(640, 480)) -> dict:
-        # Encode media items from the waypoint
-        from ..utils.media_utils import load_and_encode_image
+    def reference_media(self, media_list: list, image_resolution=(640, 480)) -> list:
+        # Describe media items without loading them, see media_utils.encode_media_reference
+        return [MediaHandle(index, media, image_resolution).reference() for index, media in enumerate(expand_media(media_list))]
+
+    def encode_media(self, media_list: list, image_resolution=(640, 480), encoding: Optional[ImageEncoding] = None) -> dict:
+        # Encode media items from the waypoint; video frames are decoded with one pass per video first
+        from ..utils.media_utils import load_and_encode_image, prefetch_frames
+        media_list = expand_media(media_list)
+        prefetch_frames(media_list)
         encoded_media = []
         for media in media_list:
-            encoded_media.append({"type": media.get("type"), "media": load_and_encode_image(media.get("path"), image_resolution=image_resolution)})    
+            encoded_media.append({"type": media.get("type"), "media": load_and_encode_image(media.get("path"), image_resolution=image_resolution, frame=media.get("frame"), pyramid=self.pyramid_cache, encoding=encoding)})    
         return encoded_media
 
+class DistancesToUnvisitedObservation(WaypointListObservation):
+    """Distances in meters from the current location to the unvisited waypoints, nearest first."""
+
+    def __init__(self, mission_manager: MissionManager = None, max_items: int = None):
+        super().__init__(name="distances_to_unvisited", mission_manager=mission_manager, max_items=max_items)
+
+    def execute(self, state: dict) -> str:
+        geometry = self.mission_manager.geometry if self.mission_manager else None
+        if geometry is None:
+            return {self.name: "unknown (waypoints have no positions)"}
+        mask = self.mission_manager.unvisited_mask
+        waypoint_ids, distances = geometry.nearest(self.mission_manager.current_waypoint_id, mask, limit=self.max_items)
+        nearest = dict(zip(waypoint_ids.tolist(), distances.round(1).tolist()))
+        total = self.mission_manager.num_available_waypoints
+        if len(nearest) < total:
+            return {self.name: f"{nearest} (+{total - len(nearest)} farther, {total} in total)"}
+        return {self.name: nearest}
+
 Observation.registry = {
     "current_location": CurrentLocationObservation,
     "plan": PlanObservation,
     "locations_to_be_visited": LocationsToBeVisitedObservation,
     "past_locations": PastLocationsObservation,
+    "distances_to_unvisited": DistancesToUnvisitedObservation,
     "waypoint": CurrentWaypointObservation,
 }
 
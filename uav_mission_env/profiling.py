@@ -0,0 +1,184 @@
+"""Opt-in per-phase timing of MissionEnvironment steps.
+
+The profiler wraps the phase methods of a single environment instance, so an environment without
+an attached profiler runs exactly the original code path.
+"""
+
+from __future__ import annotations
+import bisect
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Upper bounds (seconds) of the histogram buckets, roughly logarithmic from 1us to 10s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class PhaseHistogram:
+    """Aggregates wall times per phase into fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: Dict[str, List[int]] = {}
+        self.sums: Dict[str, float] = {}
+        self.minimums: Dict[str, float] = {}
+        self.maximums: Dict[str, float] = {}
+
+    def observe(self, phase: str, seconds: float) -> None:
+        counts = self.counts.get(phase)
+        if counts is None:
+            # One extra slot for values above the largest bucket (+Inf)
+            counts = self.counts[phase] = [0] * (len(self.buckets) + 1)
+            self.sums[phase] = 0.0
+            self.minimums[phase] = seconds
+            self.maximums[phase] = seconds
+        counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sums[phase] += seconds
+        if seconds < self.minimums[phase]:
+            self.minimums[phase] = seconds
+        if seconds > self.maximums[phase]:
+            self.maximums[phase] = seconds
+
+    def reset(self) -> None:
+        self.counts.clear()
+        self.sums.clear()
+        self.minimums.clear()
+        self.maximums.clear()
+
+    def to_dict(self) -> dict:
+        result = {}
+        for phase, counts in self.counts.items():
+            total = sum(counts)
+            result[phase] = {
+                "count": total,
+                "sum": self.sums[phase],
+                "mean": self.sums[phase] / total,
+                "min": self.minimums[phase],
+                "max": self.maximums[phase],
+                # Non-cumulative counts per bucket upper bound, the last entry is +Inf
+                "buckets": [[le, count] for le, count in zip(list(self.buckets) + ["+Inf"], counts)],
+            }
+        return result
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, metric_name: str = "uav_env_phase_seconds") -> str:
+        """Render the histogram in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {metric_name} Wall time of MissionEnvironment phases in seconds.",
+            f"# TYPE {metric_name} histogram",
+        ]
+        for phase, counts in self.counts.items():
+            cumulative = 0
+            for le, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{metric_name}_bucket{{phase="{phase}",le="{le:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{metric_name}_bucket{{phase="{phase}",le="+Inf"}} {cumulative}')
+            lines.append(f'{metric_name}_sum{{phase="{phase}"}} {self.sums[phase]!r}')
+            lines.append(f'{metric_name}_count{{phase="{phase}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+
+class ProfilerHook:
+    """Base class for callbacks around every profiled phase. Override either method."""
+
+    def before_phase(self, phase: str) -> None:
+        pass
+
+    def after_phase(self, phase: str, seconds: float) -> None:
+        pass
+
+
+class StepProfiler:
+    """Times the phases of a MissionEnvironment and reports them in `info['timings']`.
+
+    Phases: step, reset, tool_execution, verification, transition, observation and media_encoding.
+    Phases nest (e.g. media_encoding is part of observation, everything is part of step); a phase
+    that runs several times within one step reports the sum of its durations.
+    """
+
+    PHASES = {
+        "tool_execution": "_act_tools",
+        "verification": "verify",
+        "observation": "_get_observation",
+    }
+
+    def __init__(self, hooks: Optional[List[ProfilerHook]] = None, histogram: Optional[PhaseHistogram] = None):
+        self.hooks: List[ProfilerHook] = list(hooks) if hooks else []
+        self.histogram = histogram if histogram is not None else PhaseHistogram()
+        self._step_timings: Dict[str, float] = {}
+        self._patched: List[Tuple[object, str, bool, object]] = []
+        self.env = None
+
+    def add_hook(self, hook: ProfilerHook) -> None:
+        self.hooks.append(hook)
+
+    def attach(self, env) -> StepProfiler:
+        if self.env is not None:
+            raise RuntimeError("StepProfiler is already attached to an environment.")
+        self.env = env
+        for phase, method_name in self.PHASES.items():
+            self._patch(env, method_name, phase)
+        self._patch(env.state_manager, "get_next_state", "transition")
+        self._patch(env.observations_tools["waypoint"], "encode_media", "media_encoding")
+        self._patch_entry_points(env)
+        return self
+
+    def detach(self) -> None:
+        for obj, name, had_instance_attribute, original in reversed(self._patched):
+            if had_instance_attribute:
+                setattr(obj, name, original)
+            else:
+                delattr(obj, name)
+        self._patched.clear()
+        self.env = None
+
+    def _patch(self, obj, name: str, phase: str) -> None:
+        original = getattr(obj, name)
+        self._patched.append((obj, name, name in vars(obj), original))
+        setattr(obj, name, self._timed(phase, original))
+
+    def _patch_entry_points(self, env) -> None:
+        step = env.step
+        reset = env.reset
+        timed_step = self._timed("step", step)
+        timed_reset = self._timed("reset", reset)
+
+        def profiled_step(*args, **kwargs):
+            self._step_timings = {}
+            observation, reward, terminated, truncated, info = timed_step(*args, **kwargs)
+            info['timings'] = self._step_timings
+            return observation, reward, terminated, truncated, info
+
+        def profiled_reset(*args, **kwargs):
+            self._step_timings = {}
+            return timed_reset(*args, **kwargs)
+
+        self._patched.append((env, "step", "step" in vars(env), step))
+        self._patched.append((env, "reset", "reset" in vars(env), reset))
+        env.step = profiled_step
+        env.reset = profiled_reset
+
+    def _timed(self, phase: str, func: Callable) -> Callable:
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            for hook in self.hooks:
+                hook.before_phase(phase)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                timings = self._step_timings
+                timings[phase] = timings.get(phase, 0.0) + elapsed
+                self.histogram.observe(phase, elapsed)
+                for hook in self.hooks:
+                    hook.after_phase(phase, elapsed)
+        return wrapper
@@ -0,0 +1,110 @@
+"""Wire format shared by the environment server and client.
+
+Every message is one frame: a JSON header followed by binary blobs.
+
+    u32 header length | u32 number of blobs | header (UTF-8 JSON) | (u32 blob length | blob bytes)*
+
+Encoded images travel as raw bytes in blobs instead of base64 strings inside the JSON: in an
+observation, `obs_payload['media'][i]['media']` is replaced by `{"$blob": index}`.
+"""
+
+from __future__ import annotations
+import base64
+import json
+import socket
+import struct
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+FRAME_HEADER = struct.Struct("!II")
+BLOB_HEADER = struct.Struct("!I")
+MAX_FRAME_PART = 1 << 30
+BLOB_KEY = "$blob"
+
+
+def _json_default(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def pack_frame(header: dict, blobs: Optional[List[bytes]] = None) -> List[bytes]:
+    """Buffers of one frame, ready for `writelines`/`sendmsg`."""
+    blobs = blobs or []
+    encoded = json.dumps(header, separators=(",", ":"), default=_json_default).encode("utf-8")
+    buffers = [FRAME_HEADER.pack(len(encoded), len(blobs)), encoded]
+    for blob in blobs:
+        buffers.append(BLOB_HEADER.pack(len(blob)))
+        buffers.append(blob)
+    return buffers
+
+
+def _check_length(length: int) -> int:
+    if length > MAX_FRAME_PART:
+        raise ValueError(f"Frame part of {length} bytes exceeds the limit of {MAX_FRAME_PART} bytes.")
+    return length
+
+
+async def read_frame(reader) -> Tuple[dict, List[bytes]]:
+    """Read one frame from an asyncio StreamReader."""
+    header_length, num_blobs = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    header = json.loads(await reader.readexactly(_check_length(header_length)))
+    blobs = []
+    for _ in range(num_blobs):
+        (blob_length,) = BLOB_HEADER.unpack(await reader.readexactly(BLOB_HEADER.size))
+        blobs.append(await reader.readexactly(_check_length(blob_length)))
+    return header, blobs
+
+
+def _recv_exactly(rfile, length: int) -> bytes:
+    data = rfile.read(length)
+    if data is None or len(data) < length:
+        raise ConnectionError("Connection closed while reading a frame.")
+    return data
+
+
+def read_frame_sync(rfile) -> Tuple[dict, List[bytes]]:
+    """Read one frame from a buffered binary file (e.g. `socket.makefile('rb')`)."""
+    header_length, num_blobs = FRAME_HEADER.unpack(_recv_exactly(rfile, FRAME_HEADER.size))
+    header = json.loads(_recv_exactly(rfile, _check_length(header_length)))
+    blobs = []
+    for _ in range(num_blobs):
+        (blob_length,) = BLOB_HEADER.unpack(_recv_exactly(rfile, BLOB_HEADER.size))
+        blobs.append(_recv_exactly(rfile, _check_length(blob_length)))
+    return header, blobs
+
+
+def send_frame_sync(sock: socket.socket, header: dict, blobs: Optional[List[bytes]] = None) -> None:
+    sock.sendall(b"".join(pack_frame(header, blobs)))
+
+
+def extract_media(observation: dict, blobs: List[bytes]) -> dict:
+    """Copy of `observation` with encoded images moved into `blobs` as raw bytes."""
+    payload = observation.get("obs_payload") if isinstance(observation, dict) else None
+    media = payload.get("media") if payload else None
+    if not media:
+        return observation
+    moved = []
+    for item in media:
+        encoded = item.get("media") if isinstance(item, dict) else None
+        if isinstance(encoded, str):
+            blobs.append(base64.b64decode(encoded))
+            item = {**item, "media": {BLOB_KEY: len(blobs) - 1}}
+        moved.append(item)
+    return {**observation, "obs_payload": {**payload, "media": moved}}
+
+
+def restore_media(observation: dict, blobs: List[bytes], raw: bool = False) -> dict:
+    """Inverse of `extract_media`, in place. With `raw`, images stay bytes instead of base64 strings."""
+    payload = observation.get("obs_payload") if isinstance(observation, dict) else None
+    for item in (payload or {}).get("media") or []:
+        reference = item.get("media") if isinstance(item, dict) else None
+        if isinstance(reference, dict) and BLOB_KEY in reference:
+            blob = blobs[reference[BLOB_KEY]]
+            item["media"] = blob if raw else base64.b64encode(blob).decode("ascii")
+    return observation
@@ -0,0 +1,173 @@
+"""Episode recording and deterministic, media-free replay for the mission environment."""
+
+from __future__ import annotations
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional
+
+from .environment import MissionEnvironment
+from .missions.mission import Mission
+
+
+def _observation_text(observation: dict) -> Optional[str]:
+    """Extract the textual part of an observation (the rendered prompt)."""
+    return observation.get('obs_payload', {}).get('prompt')
+
+
+def load_episodes(log_path: str) -> Iterator[dict]:
+    """Iterate over the episodes stored in a JSONL episode log."""
+    with open(log_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class EpisodeRecorder:
+    """Wraps a MissionEnvironment and appends every finished episode as one JSON line to a log file.
+
+    Each record contains the mission, the seed, the waypoint order presented to the agent and,
+    per step, the action together with the observation text, next state, reward and done flags.
+    """
+
+    def __init__(self, env: MissionEnvironment, log_path: str):
+        self.env = env
+        self.log_path = Path(log_path)
+        self._file = open(self.log_path, 'a')
+        self._episode: Optional[dict] = None
+
+    def reset(self, seed: Optional[int] = None, custom_plan: str = None, target_criteria: dict = None,
+              mission: Optional[Mission] = None) -> dict:
+        self._write_episode()
+        observation = self.env.reset(seed=seed, custom_plan=custom_plan, target_criteria=target_criteria, mission=mission)
+        mission_manager = self.env.mission_manager
+        self._episode = {
+            "seed": seed,
+            "max_turns": self.env.max_turns,
+            "mission": mission_manager.mission.to_dict(),
+            "waypoint_order": list(mission_manager.waypoints),
+            "reset": {
+                "current_state": observation['current_state'],
+                "prompt": _observation_text(observation),
+            },
+            "steps": [],
+        }
+        return observation
+
+    def step(self, action: dict = {}):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        if self._episode is not None:
+            self._episode["steps"].append({
+                "action": action,
+                "current_state": observation['current_state'],
+                "prompt": _observation_text(observation),
+                "reward": reward,
+                "terminated": terminated,
+                "truncated": truncated,
+            })
+            if terminated or truncated:
+                self._write_episode()
+        return observation, reward, terminated, truncated, info
+
+    def close(self, close_env: bool = True) -> None:
+        self._write_episode()
+        self._file.close()
+        if close_env:
+            self.env.close()
+
+    def _write_episode(self) -> None:
+        if self._episode is None:
+            return
+        self._file.write(json.dumps(self._episode) + "\n")
+        self._file.flush()
+        self._episode = None
+
+
+@dataclass
+class StepDivergence:
+    """A mismatch between a logged episode and its replay.
+
+    `step` is the number of actions applied before the comparison, so 0 refers to the reset observation.
+    """
+    episode: int
+    step: int
+    field: str
+    expected: Any
+    actual: Any
+
+
+@dataclass
+class ReplayReport:
+    episodes: int = 0
+    steps: int = 0
+    divergences: List[StepDivergence] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.divergences
+
+
+class ReplayEngine:
+    """Re-executes logged episodes through a single MissionEnvironment without touching any media.
+
+    The mission of every episode is rebuilt from the log with its media stripped and passed to
+    `reset` together with the recorded waypoint order, so observations never load or encode images.
+    The environment is built once from `config`, which must describe the same states as the recording.
+    """
+
+    def __init__(self, config: Optional[dict] = None, env: Optional[MissionEnvironment] = None):
+        self.env = env if env is not None else MissionEnvironment(config=config)
+
+    def replay_file(self, log_path: str) -> ReplayReport:
+        return self.replay(load_episodes(log_path))
+
+    def replay(self, episodes: Iterable[dict]) -> ReplayReport:
+        report = ReplayReport()
+        for episode_index, episode in enumerate(episodes):
+            report.divergences.extend(self.replay_episode(episode, episode_index))
+            report.episodes += 1
+            report.steps += len(episode.get('steps', []))
+        return report
+
+    def replay_episode(self, episode: dict, episode_index: int = 0) -> List[StepDivergence]:
+        env = self.env
+        divergences = []
+
+        observation = self._reset(episode)
+        expected = episode.get('reset', {})
+        self._compare(divergences, episode_index, 0, 'current_state', expected.get('current_state'), observation['current_state'])
+        self._compare(divergences, episode_index, 0, 'prompt', expected.get('prompt'), _observation_text(observation))
+
+        for step_index, logged in enumerate(episode.get('steps', []), start=1):
+            try:
+                observation, reward, terminated, truncated, _ = env.step(logged['action'])
+            except Exception as e:
+                divergences.append(StepDivergence(episode_index, step_index, 'exception', None, f"{type(e).__name__}: {e}"))
+                break
+            self._compare(divergences, episode_index, step_index, 'current_state', logged.get('current_state'), observation['current_state'])
+            self._compare(divergences, episode_index, step_index, 'prompt', logged.get('prompt'), _observation_text(observation))
+            if not math.isclose(logged.get('reward', 0.0), reward, abs_tol=1e-9):
+                divergences.append(StepDivergence(episode_index, step_index, 'reward', logged.get('reward'), reward))
+            self._compare(divergences, episode_index, step_index, 'terminated', logged.get('terminated'), terminated)
+            self._compare(divergences, episode_index, step_index, 'truncated', logged.get('truncated'), truncated)
+            if terminated and not logged.get('terminated'):
+                # The environment reached a terminal state early; later actions cannot be applied meaningfully
+                break
+        return divergences
+
+    def _reset(self, episode: dict) -> dict:
+        env = self.env
+        mission_data = episode['mission']
+        mission = Mission.from_dict({
+            **mission_data,
+            "waypoints": [{**wp, "media": []} for wp in mission_data.get('waypoints', [])],
+        })
+        env.max_turns = episode.get('max_turns', env.max_turns)
+        # The recorded order is what the agent saw, also for unseeded episodes and logs of older versions
+        return env.reset(seed=episode.get('seed'), mission=mission, waypoint_order=episode.get('waypoint_order'))
+
+    @staticmethod
+    def _compare(divergences: list, episode: int, step: int, name: str, expected: Any, actual: Any) -> None:
+        if expected != actual:
+            divergences.append(StepDivergence(episode, step, name, expected, actual))
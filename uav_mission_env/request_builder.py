@@ -0,0 +1,214 @@
+"""Ready-to-send chat completion request bodies for OpenAI-compatible and llama.cpp servers.
+
+Bodies are assembled from pre-serialized byte fragments:
+- per state, the tool specification text, the output constraint (`response_format` JSON schema for
+  OpenAI, GBNF `grammar` for llama.cpp) and optional native `tools` are serialized once;
+- images are inserted as data URLs directly from the observation's base64 payload (or raw bytes);
+- a `Conversation` keeps every earlier message serialized, so a turn only serializes what is new.
+
+    builder = RequestBuilder(model="qwen2.5-vl", api_format="llamacpp")
+    conversation = builder.conversation()
+    conversation.add_observation(observation)
+    body = conversation.body()                       # bytes for POST /v1/chat/completions
+    conversation.add_response(completion_text)
+"""
+
+from __future__ import annotations
+import base64
+import json
+from typing import Callable, Dict, List, Optional, Union
+
+from .utils.prompt_utils import VALUES_HEADER
+
+Chunks = List[bytes]
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _openai_constraint(state: str, output_schema: dict) -> dict:
+    return {"response_format": {
+        "type": "json_schema",
+        "json_schema": {"name": f"{state}_response", "schema": output_schema.get("json_schema", {})},
+    }}
+
+
+def _llamacpp_constraint(state: str, output_schema: dict) -> dict:
+    return {"grammar": output_schema.get("gbnf_grammar", "")}
+
+
+# How each server format constrains the output to the state's schema
+API_FORMATS: Dict[str, Callable[[str, dict], dict]] = {
+    "openai": _openai_constraint,
+    "llamacpp": _llamacpp_constraint,
+}
+
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "/9j/", "image/jpeg"),
+    (b"\x89PNG", "iVBOR", "image/png"),
+    (b"GIF8", "R0lG", "image/gif"),
+    (b"RIFF", "UklG", "image/webp"),
+)
+
+
+def _mime_type(data: Union[str, bytes]) -> str:
+    for raw_prefix, base64_prefix, mime_type in _IMAGE_SIGNATURES:
+        if data.startswith(raw_prefix if isinstance(data, bytes) else base64_prefix):
+            return mime_type
+    return "image/jpeg"
+
+
+def image_part_chunks(data: Union[str, bytes]) -> Chunks:
+    """Chunks of an `image_url` content part for a base64 string or raw image bytes."""
+    mime_type = _mime_type(data)
+    payload = base64.b64encode(data) if isinstance(data, bytes) else data.encode("ascii")
+    return [
+        b'{"type":"image_url","image_url":{"url":"data:' + mime_type.encode("ascii") + b';base64,',
+        payload,
+        b'"}}',
+    ]
+
+
+class _StateFragments:
+    """Serialized parts that only depend on the state."""
+
+    def __init__(self, state: str, observation: dict, api_format: str, tools_in_prompt: bool, native_tools: bool):
+        available_tools = observation.get("available_tools") or []
+        output_schema = observation.get("obs_payload", {}).get("output_schema") or {}
+        self.tools_part = None
+        if tools_in_prompt and available_tools:
+            self.tools_part = _dumps({"type": "text", "text": "\n" + json.dumps(available_tools, indent=2)})
+        suffix = dict(API_FORMATS[api_format](state, output_schema))
+        if native_tools and available_tools:
+            suffix["tools"] = [{"type": "function", "function": tool} for tool in available_tools]
+        # `"key":value,...` without braces, appended after the messages
+        self.suffix = _dumps(suffix)[1:-1]
+
+
+class RequestBuilder:
+    """Builds request bodies for one environment configuration (fragments are cached per state name).
+
+    tools_in_prompt: append the state's tool specifications to the prompt (the default prompts end
+    with a tool specification heading). native_tools: also send them as OpenAI `tools`.
+    """
+
+    def __init__(self, model: Optional[str] = None, api_format: str = "openai", system_prompt: Optional[str] = None,
+                 params: Optional[dict] = None, tools_in_prompt: bool = True, native_tools: bool = False):
+        if api_format not in API_FORMATS:
+            raise ValueError(f"Unknown API format '{api_format}', expected one of {list(API_FORMATS)}.")
+        self.api_format = api_format
+        self.tools_in_prompt = tools_in_prompt
+        self.native_tools = native_tools
+        head = {"model": model} if model is not None else {}
+        head.update(params or {})
+        # `{"model":...,"messages":[` with the system message already in place
+        self._prefix = (_dumps(head)[:-1] + (b"," if head else b"") + b'"messages":[')
+        self._system_message = _dumps({"role": "system", "content": system_prompt}) if system_prompt else None
+        self._states: Dict[str, _StateFragments] = {}
+
+    def state_fragments(self, observation: dict) -> _StateFragments:
+        state = observation.get("current_state")
+        fragments = self._states.get(state)
+        if fragments is None:
+            fragments = _StateFragments(state, observation, self.api_format, self.tools_in_prompt, self.native_tools)
+            self._states[state] = fragments
+        return fragments
+
+    @staticmethod
+    def _split_values_block(payload: dict):
+        """(static text, values block) of a 'static_first' prompt with segments, otherwise None."""
+        segments = payload.get("prompt_segments")
+        for index, segment in enumerate(segments or ()):
+            if segment["static"] and segment["text"] == VALUES_HEADER:
+                return (
+                    "".join(segment["text"] for segment in segments[:index]),
+                    "".join(segment["text"] for segment in segments[index:]),
+                )
+        return None
+
+    def user_message_chunks(self, observation: dict, include_media: bool = True) -> Chunks:
+        payload = observation.get("obs_payload", {})
+        tools_part = self.state_fragments(observation).tools_part
+        split = self._split_values_block(payload) if tools_part is not None else None
+        if split is not None:
+            # Tool specs are static: keep them in front of the changing values for prefix caching
+            static_text, values_text = split
+            chunks = [b'{"role":"user","content":[', _dumps({"type": "text", "text": static_text}),
+                      b",", tools_part, b",", _dumps({"type": "text", "text": values_text})]
+        else:
+            chunks = [b'{"role":"user","content":[', _dumps({"type": "text", "text": payload.get("prompt", "")})]
+            if tools_part is not None:
+                chunks += [b",", tools_part]
+        if include_media:
+            for item in payload.get("media") or []:
+                data = item.get("media") if isinstance(item, dict) else None
+                if item.get("type") == "image" and isinstance(data, (str, bytes)):
+                    chunks.append(b",")
+                    chunks += image_part_chunks(data)
+        chunks.append(b"]}")
+        return chunks
+
+    @staticmethod
+    def assistant_message_chunks(content: str) -> Chunks:
+        return [_dumps({"role": "assistant", "content": content})]
+
+    def body_chunks(self, messages: List[Chunks], observation: dict) -> Chunks:
+        """Body made of already serialized messages, constrained for the observation's state."""
+        chunks = [self._prefix]
+        if self._system_message is not None:
+            chunks.append(self._system_message)
+            if messages:
+                chunks.append(b",")
+        for i, message in enumerate(messages):
+            if i:
+                chunks.append(b",")
+            chunks += message
+        chunks += [b"],", self.state_fragments(observation).suffix, b"}"]
+        return chunks
+
+    def build(self, observation: dict) -> bytes:
+        """Single-turn request body for an observation."""
+        return b"".join(self.body_chunks([self.user_message_chunks(observation)], observation))
+
+    def conversation(self, keep_media: str = "all") -> Conversation:
+        return Conversation(self, keep_media=keep_media)
+
+
+class Conversation:
+    """Multi-turn request state. keep_media: 'all' keeps the images of every turn, 'last' only of the latest."""
+
+    KEEP_MEDIA = ("all", "last")
+
+    def __init__(self, builder: RequestBuilder, keep_media: str = "all"):
+        if keep_media not in self.KEEP_MEDIA:
+            raise ValueError(f"Unknown keep_media '{keep_media}', expected one of {self.KEEP_MEDIA}.")
+        self.builder = builder
+        self.keep_media = keep_media
+        self.messages: List[Chunks] = []
+        self._last_observation: Optional[dict] = None
+        self._last_user_index: Optional[int] = None
+
+    def add_observation(self, observation: dict) -> None:
+        if self.keep_media == "last" and self._last_user_index is not None:
+            # Earlier turns keep their text only
+            self.messages[self._last_user_index] = self.builder.user_message_chunks(self._last_observation, include_media=False)
+        self._last_user_index = len(self.messages)
+        self._last_observation = observation
+        self.messages.append(self.builder.user_message_chunks(observation))
+
+    def add_response(self, content: str) -> None:
+        self.messages.append(self.builder.assistant_message_chunks(content))
+
+    def body_chunks(self) -> Chunks:
+        if self._last_observation is None:
+            raise RuntimeError("Add an observation before building a request.")
+        return self.builder.body_chunks(self.messages, self._last_observation)
+
+    def body(self) -> bytes:
+        return b"".join(self.body_chunks())
+
+    def reset(self) -> None:
+        self.messages.clear()
+        self._last_observation = None
+        self._last_user_index = None
@@ -0,0 +1,471 @@
+"""Sharded rollout generation on many machines, coordinated through a shared directory.
+
+The coordinator splits a run into work units, each a disjoint seed range and (for a mission
+dataset) a contiguous slice of one dataset shard, and writes them to a filesystem queue. Workers
+on any number of nodes claim units with an atomic rename, step a batch of environments in lockstep
+and record every episode with an EpisodeRecorder:
+
+    python -m uav_mission_env.rollouts plan --root /shared/rollouts --episodes 100000 --unit-size 500 [--config env.yaml]
+    python -m uav_mission_env.rollouts work --root /shared/rollouts --num-envs 8    # on every node
+    python -m uav_mission_env.rollouts status --root /shared/rollouts
+    python -m uav_mission_env.rollouts merge --root /shared/rollouts --output episodes.jsonl
+
+Layout of the root directory:
+
+    plan.json                               run settings and all units (written last, so a plan is complete)
+    pending/<unit>.json                     units waiting for a worker
+    claimed/<unit>@<worker>.json            claimed units; the file's mtime is the worker's heartbeat
+    done/<unit>.json                        finished units
+    logs/<unit>@<worker>.partial.jsonl      episodes recorded so far by one worker
+    logs/<unit>.jsonl                       the episodes of a finished unit, ordered by seed
+
+Claims whose heartbeat is older than the lease are put back into the queue by whichever worker
+looks for work next, and the new worker skips the seeds already recorded in partial logs. Every
+episode is a function of its seed alone (the mission, the waypoint order and the policy are seeded
+from it), so resumed units and merged outputs are identical to an uninterrupted run.
+"""
+
+from __future__ import annotations
+import argparse
+import glob
+import importlib
+import json
+import os
+import socket
+import tempfile
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional
+
+import yaml
+
+from .environment import MissionEnvironment
+from .missions.mission import Mission
+from .missions.mission_dataset import DatasetMissionGenerator, MissionDataset
+from .missions.mission_generator import RandomMissionGenerator
+from .missions.mission_queue import MissionBatchGenerator
+from .replay import EpisodeRecorder
+
+DEFAULT_POLICY = "uav_mission_env.mock_agent:MockAgent"
+
+
+class ClaimLostError(RuntimeError):
+    """The claim of a unit was requeued (expired lease) while its worker was still running."""
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """Episodes with seeds `seed_start` to `seed_start + num_episodes - 1`.
+
+    With a mission dataset, the episode with seed `seed_start + k` runs mission `mission_offset + k`
+    of shard `shard` of `num_shards` (wrapping around the shard).
+    """
+    unit_id: str
+    seed_start: int
+    num_episodes: int
+    shard: int = 0
+    num_shards: int = 1
+    mission_offset: int = 0
+
+    @property
+    def seeds(self) -> range:
+        return range(self.seed_start, self.seed_start + self.num_episodes)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> WorkUnit:
+        return cls(**data)
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Write and rename, so readers (also on other nodes) never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _read_log(path: str) -> Iterator[dict]:
+    """Episodes of a log; a torn last line (crashed writer) is skipped."""
+    with open(path, "r") as f:
+        for line in f:
+            if line.endswith("\n") and line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def _load_policy(spec: str):
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class RolloutCoordinator:
+    """Plans a run into work units and tracks, recovers and merges them through the root directory."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.pending_dir = os.path.join(self.root, "pending")
+        self.claimed_dir = os.path.join(self.root, "claimed")
+        self.done_dir = os.path.join(self.root, "done")
+        self.logs_dir = os.path.join(self.root, "logs")
+        self.plan_path = os.path.join(self.root, "plan.json")
+        self._plan: Optional[dict] = None
+
+    def plan(self, num_episodes: int, unit_size: int, seed: int = 0, num_shards: int = 1, config: Optional[dict] = None,
+             max_turns: int = 10, policy: str = DEFAULT_POLICY, policy_kwargs: Optional[dict] = None,
+             lease_seconds: float = 60.0) -> List[WorkUnit]:
+        """Write the units of a run. Planning again with the same settings (after a crash) is a no-op."""
+        if num_episodes < 1 or unit_size < 1:
+            raise ValueError("num_episodes and unit_size must be at least 1.")
+        config = config or {}
+        data_config = config.get("data_config") or {}
+        dataset_path = data_config.get("mission_dataset_path")
+        if num_shards > 1 and dataset_path is None:
+            raise ValueError("num_shards requires a mission dataset (data_config.mission_dataset_path).")
+        settings = {
+            "num_episodes": num_episodes, "unit_size": unit_size, "seed": seed, "num_shards": num_shards,
+            "config": config, "max_turns": max_turns, "policy": policy, "policy_kwargs": policy_kwargs or {},
+            "lease_seconds": lease_seconds,
+        }
+        if os.path.exists(self.plan_path):
+            existing = self.load_plan()
+            if {key: existing.get(key) for key in settings} != json.loads(json.dumps(settings)):
+                raise ValueError(f"{self.root} already holds a different plan.")
+            return self.units()
+
+        units = []
+        seed_start = seed
+        dataset_size = len(MissionDataset(dataset_path)) if dataset_path is not None else None
+        for shard in range(num_shards):
+            shard_episodes = num_episodes // num_shards + (shard < num_episodes % num_shards)
+            if dataset_size is not None and shard_episodes and shard >= dataset_size:
+                raise ValueError(f"Shard {shard}/{num_shards} of {dataset_path} is empty.")
+            for mission_offset in range(0, shard_episodes, unit_size):
+                count = min(unit_size, shard_episodes - mission_offset)
+                units.append(WorkUnit(f"{len(units):06d}", seed_start, count, shard, num_shards, mission_offset))
+                seed_start += count
+
+        for directory in (self.pending_dir, self.claimed_dir, self.done_dir, self.logs_dir):
+            os.makedirs(directory, exist_ok=True)
+        for unit in units:
+            _write_atomic(os.path.join(self.pending_dir, f"{unit.unit_id}.json"), json.dumps(unit.to_dict()))
+        _write_atomic(self.plan_path, json.dumps({**settings, "units": [unit.to_dict() for unit in units]}, indent=2))
+        self._plan = None
+        return units
+
+    def load_plan(self) -> dict:
+        if self._plan is None:
+            with open(self.plan_path, "r") as f:
+                self._plan = json.load(f)
+        return self._plan
+
+    def units(self) -> List[WorkUnit]:
+        return [WorkUnit.from_dict(unit) for unit in self.load_plan()["units"]]
+
+    def claims(self) -> Dict[str, str]:
+        """Claim file per claimed unit id."""
+        claims = {}
+        for name in os.listdir(self.claimed_dir):
+            if name.endswith(".json"):
+                claims[name[:-len(".json")].partition("@")[0]] = os.path.join(self.claimed_dir, name)
+        return claims
+
+    def done_units(self) -> List[str]:
+        return sorted(name[:-len(".json")] for name in os.listdir(self.done_dir) if name.endswith(".json"))
+
+    def requeue_expired(self, now: Optional[float] = None) -> List[str]:
+        """Move claims without a heartbeat for `lease_seconds` back to pending; returns their unit ids."""
+        now = time.time() if now is None else now
+        lease_seconds = self.load_plan()["lease_seconds"]
+        requeued = []
+        for unit_id, path in self.claims().items():
+            try:
+                if now - os.stat(path).st_mtime < lease_seconds:
+                    continue
+                os.rename(path, os.path.join(self.pending_dir, f"{unit_id}.json"))
+            except FileNotFoundError:
+                # Finished, or requeued by another process in the meantime
+                continue
+            requeued.append(unit_id)
+        return requeued
+
+    def status(self) -> dict:
+        plan = self.load_plan()
+        now = time.time()
+        claims = self.claims()
+        stale = 0
+        for path in claims.values():
+            try:
+                stale += now - os.stat(path).st_mtime >= plan["lease_seconds"]
+            except FileNotFoundError:
+                continue
+        done = self.done_units()
+        units = {unit.unit_id: unit for unit in self.units()}
+        return {
+            "units": len(units),
+            "pending": sum(name.endswith(".json") for name in os.listdir(self.pending_dir)),
+            "claimed": len(claims),
+            "stale_claims": stale,
+            "done": len(done),
+            "episodes": plan["num_episodes"],
+            "episodes_done": sum(units[unit_id].num_episodes for unit_id in done if unit_id in units),
+        }
+
+    def finished(self) -> bool:
+        return len(self.done_units()) == len(self.load_plan()["units"])
+
+    def merge(self, output_path: str) -> int:
+        """Concatenate the unit logs in unit order (so in seed order) into one log; returns the episode count."""
+        units = self.units()
+        missing = sorted(set(unit.unit_id for unit in units) - set(self.done_units()))
+        if missing:
+            raise RuntimeError(f"{len(missing)} units are not finished yet: {missing[:10]}")
+        output_path = os.path.abspath(output_path)
+        episodes = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as output:
+                for unit in units:
+                    with open(os.path.join(self.logs_dir, f"{unit.unit_id}.jsonl"), "r") as f:
+                        for line in f:
+                            output.write(line)
+                            episodes += 1
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return episodes
+
+
+class RolloutWorker:
+    """Claims units from a coordinator's root directory and records their episodes.
+
+    `num_envs` environments are stepped in lockstep like a VectorMissionEnvironment, but every reset
+    takes the next unrecorded seed of the unit, so a resumed unit runs only the missing episodes.
+    The policy is `plan['policy']` ("module:attribute"), called as `policy(seed=episode_seed,
+    **plan['policy_kwargs'])` for every episode; it must return an object with `act(observation)`.
+    """
+
+    def __init__(self, root: str, worker_id: Optional[str] = None, num_envs: int = 4, poll_interval: float = 1.0):
+        if num_envs < 1:
+            raise ValueError("num_envs must be at least 1.")
+        self.coordinator = RolloutCoordinator(root)
+        self.worker_id = (worker_id or f"{socket.gethostname()}-{os.getpid()}").replace("@", "_")
+        self.num_envs = num_envs
+        self.poll_interval = poll_interval
+        self.envs: Optional[List[MissionEnvironment]] = None
+        self._batch_generator: Optional[MissionBatchGenerator] = None
+        self._shards: Dict[tuple, DatasetMissionGenerator] = {}
+        self._claim_path: Optional[str] = None
+        self._last_heartbeat = 0.0
+
+    def _make_envs(self, plan: dict) -> List[MissionEnvironment]:
+        config = json.loads(json.dumps(plan["config"]))
+        # Missions are pinned per episode, a background mission stream would only be wasted work
+        (config.get("data_config") or {}).pop("mission_queue", None)
+        envs = [MissionEnvironment(config=config, max_turns=plan["max_turns"]) for _ in range(self.num_envs)]
+        mission_generator = envs[0].mission_manager.mission_generator
+        if isinstance(mission_generator, RandomMissionGenerator):
+            random_seed = (config.get("data_config") or {}).get("random_seed", 42)
+            self._batch_generator = MissionBatchGenerator(mission_generator, seed=random_seed)
+        return envs
+
+    def mission_for(self, unit: WorkUnit, seed: int) -> Optional[Mission]:
+        """The mission of the episode with `seed`; None for fixed (presampled) missions."""
+        dataset_path = (self.coordinator.load_plan()["config"].get("data_config") or {}).get("mission_dataset_path")
+        if dataset_path is not None:
+            key = (unit.shard, unit.num_shards)
+            shard = self._shards.get(key)
+            if shard is None:
+                shard = self._shards[key] = DatasetMissionGenerator(dataset_path, rank=unit.shard, world_size=unit.num_shards)
+            return shard.get_mission((unit.mission_offset + seed - unit.seed_start) % shard.shard_size)
+        if self._batch_generator is not None:
+            return self._batch_generator.generate(seed)
+        return None
+
+    def claim(self) -> Optional[WorkUnit]:
+        """Claim the first pending unit (after requeueing expired claims), or None if none is pending."""
+        coordinator = self.coordinator
+        coordinator.requeue_expired()
+        for name in sorted(os.listdir(coordinator.pending_dir)):
+            if not name.endswith(".json"):
+                continue
+            claim_path = os.path.join(coordinator.claimed_dir, f"{name[:-len('.json')]}@{self.worker_id}.json")
+            try:
+                # Only one worker's rename of a pending file succeeds
+                os.rename(os.path.join(coordinator.pending_dir, name), claim_path)
+            except FileNotFoundError:
+                continue
+            os.utime(claim_path)
+            self._claim_path = claim_path
+            self._last_heartbeat = time.monotonic()
+            with open(claim_path, "r") as f:
+                return WorkUnit.from_dict(json.load(f))
+        return None
+
+    def heartbeat(self, force: bool = False) -> None:
+        """Renew the claim (at most every quarter lease unless forced)."""
+        now = time.monotonic()
+        if not force and now - self._last_heartbeat < self.coordinator.load_plan()["lease_seconds"] / 4:
+            return
+        try:
+            os.utime(self._claim_path)
+        except FileNotFoundError:
+            raise ClaimLostError(f"The claim {os.path.basename(self._claim_path)} was requeued.") from None
+        self._last_heartbeat = now
+
+    def run(self, max_units: Optional[int] = None) -> int:
+        """Work until every unit of the plan is done (or `max_units` were finished); returns the units finished."""
+        finished = 0
+        while max_units is None or finished < max_units:
+            unit = self.claim()
+            if unit is None:
+                if self.coordinator.finished():
+                    break
+                # Units claimed by others may still expire and come back
+                time.sleep(self.poll_interval)
+                continue
+            try:
+                finished += self.run_unit(unit)
+            except ClaimLostError:
+                continue
+        if self.envs is not None:
+            for env in self.envs:
+                env.close()
+            self.envs = None
+        return finished
+
+    def _partial_logs(self, unit: WorkUnit) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.coordinator.logs_dir, f"{glob.escape(unit.unit_id)}@*.partial.jsonl")))
+
+    def _recorded(self, unit: WorkUnit) -> Dict[int, dict]:
+        """Episodes of the unit recorded by any worker so far, by seed."""
+        episodes = {}
+        for path in self._partial_logs(unit):
+            for episode in _read_log(path):
+                steps = episode.get("steps")
+                # Closing a recorder also writes the episode in progress, e.g. after a lost claim
+                if steps and (steps[-1]["terminated"] or steps[-1]["truncated"]):
+                    episodes.setdefault(episode["seed"], episode)
+        return episodes
+
+    def run_unit(self, unit: WorkUnit) -> bool:
+        """Record the missing episodes of a claimed unit and finish it; False if another worker finished it first."""
+        plan = self.coordinator.load_plan()
+        if self.envs is None:
+            self.envs = self._make_envs(plan)
+        policy = _load_policy(plan["policy"])
+        policy_kwargs = plan["policy_kwargs"]
+        recorded = self._recorded(unit)
+        seeds = deque(seed for seed in unit.seeds if seed not in recorded)
+
+        partial_path = os.path.join(self.coordinator.logs_dir, f"{unit.unit_id}@{self.worker_id}.partial.jsonl")
+        recorders = [EpisodeRecorder(env, partial_path) for env in self.envs]
+        agents = [None] * self.num_envs
+        observations = [None] * self.num_envs
+
+        def start(index: int) -> None:
+            seed = seeds.popleft()
+            observations[index] = recorders[index].reset(seed=seed, mission=self.mission_for(unit, seed))
+            agents[index] = policy(seed=seed, **policy_kwargs)
+
+        try:
+            active = []
+            for index in range(self.num_envs):
+                if seeds:
+                    start(index)
+                    active.append(index)
+            while active:
+                still_active = []
+                for index in active:
+                    observation, _, terminated, truncated, _ = recorders[index].step(agents[index].act(observations[index]))
+                    if not (terminated or truncated):
+                        observations[index] = observation
+                        still_active.append(index)
+                    elif seeds:
+                        start(index)
+                        still_active.append(index)
+                active = still_active
+                self.heartbeat()
+        finally:
+            for recorder in recorders:
+                recorder.close(close_env=False)
+        self.heartbeat(force=True)
+        return self._finish(unit)
+
+    def _finish(self, unit: WorkUnit) -> bool:
+        coordinator = self.coordinator
+        recorded = self._recorded(unit)
+        missing = [seed for seed in unit.seeds if seed not in recorded]
+        if missing:
+            raise RuntimeError(f"Unit {unit.unit_id} is missing the episodes with seeds {missing[:10]}.")
+        lines = "".join(json.dumps(recorded[seed]) + "\n" for seed in unit.seeds)
+        _write_atomic(os.path.join(coordinator.logs_dir, f"{unit.unit_id}.jsonl"), lines)
+        try:
+            os.rename(self._claim_path, os.path.join(coordinator.done_dir, f"{unit.unit_id}.json"))
+        except FileNotFoundError:
+            # Requeued meanwhile; whoever finishes it writes the same log
+            return False
+        finally:
+            self._claim_path = None
+        for path in self._partial_logs(unit):
+            os.unlink(path)
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate rollouts on many nodes through a shared work queue directory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = subparsers.add_parser("plan", help="Split a run into work units.")
+    plan_parser.add_argument("--root", required=True)
+    plan_parser.add_argument("--episodes", type=int, required=True)
+    plan_parser.add_argument("--unit-size", type=int, default=500)
+    plan_parser.add_argument("--seed", type=int, default=0, help="First episode seed.")
+    plan_parser.add_argument("--num-shards", type=int, default=1, help="Dataset shards (requires a mission dataset).")
+    plan_parser.add_argument("--config", help="Environment config as a YAML or JSON file.")
+    plan_parser.add_argument("--max-turns", type=int, default=10)
+    plan_parser.add_argument("--policy", default=DEFAULT_POLICY, help="module:attribute called with seed=<episode seed>.")
+    plan_parser.add_argument("--policy-kwargs", default="{}", help="JSON object of extra policy arguments.")
+    plan_parser.add_argument("--lease", type=float, default=60.0, help="Seconds without heartbeat before a claim is requeued.")
+
+    work_parser = subparsers.add_parser("work", help="Claim and run units until the plan is done.")
+    work_parser.add_argument("--root", required=True)
+    work_parser.add_argument("--num-envs", type=int, default=4)
+    work_parser.add_argument("--worker-id", default=None)
+    work_parser.add_argument("--max-units", type=int, default=None)
+
+    status_parser = subparsers.add_parser("status", help="Print the progress of the run.")
+    status_parser.add_argument("--root", required=True)
+
+    merge_parser = subparsers.add_parser("merge", help="Merge the unit logs into one episode log.")
+    merge_parser.add_argument("--root", required=True)
+    merge_parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    coordinator = RolloutCoordinator(args.root)
+    if args.command == "plan":
+        config = None
+        if args.config:
+            with open(args.config, "r") as f:
+                config = yaml.safe_load(f)
+        units = coordinator.plan(args.episodes, args.unit_size, seed=args.seed, num_shards=args.num_shards, config=config,
+                                 max_turns=args.max_turns, policy=args.policy, policy_kwargs=json.loads(args.policy_kwargs),
+                                 lease_seconds=args.lease)
+        print(f"planned {len(units)} units in {coordinator.root}")
+    elif args.command == "work":
+        worker = RolloutWorker(args.root, worker_id=args.worker_id, num_envs=args.num_envs)
+        print(f"{worker.worker_id} finished {worker.run(max_units=args.max_units)} units")
+    elif args.command == "status":
+        print(json.dumps(coordinator.status(), indent=2))
+    else:
+        print(f"merged {coordinator.merge(args.output)} episodes into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
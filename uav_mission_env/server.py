@@ -0,0 +1,240 @@
+"""Asyncio server exposing MissionEnvironment sessions over TCP or a Unix socket.
+
+Sessions live on the server, independent of connections, so a client can spread requests over a
+pool of connections. Requests are frames (see `protocol`) with a JSON header
+`{"id": ..., "op": ..., **params}`; the response echoes `id` and carries `result` or `error`.
+
+Operations:
+    create  {config?, max_turns?}                  -> {session}   (config: name of a server-side config)
+    reset   {session, seed?, custom_plan?, target_criteria?} -> {observation}
+    step    {session, action}                      -> {observation, reward, terminated, truncated, info}
+    close   {session}                              -> {}
+    batch   {requests: [{op, ...}, ...]}           -> {results: [{result} | {error}, ...]}
+    stats   {}                                     -> {sessions}
+
+Clients select one of the configs the server was started with by name ("default" is the bundled
+config). Config dicts from clients are rejected: the transition conditions of a state config are
+evaluated as Python expressions, so accepting them would let any client run code on the server.
+
+Run with:
+    python -m uav_mission_env.server --port 8765
+    python -m uav_mission_env.server --unix /tmp/uav_env.sock --config eval=configs/eval.yaml
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import contextlib
+import copy
+import itertools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from .environment import MissionEnvironment
+from .protocol import extract_media, pack_frame, read_frame
+
+logger = logging.getLogger(__name__)
+
+
+class SessionError(RuntimeError):
+    pass
+
+
+class MissionEnvServer:
+    """Holds the sessions and executes requests.
+
+    The event loop only moves frames; environment calls run on a thread pool of `workers` threads,
+    so a session busy encoding media does not stall the other connections. Requests touching the
+    same session (a batch touches all of its sessions) run one at a time in arrival order.
+    """
+
+    def __init__(self, configs: Optional[Dict[str, Optional[dict]]] = None, max_sessions: int = 10000,
+                 workers: Optional[int] = None):
+        # Sessions are created from these configs only; None is the bundled default config
+        self.configs: Dict[str, Optional[dict]] = {"default": None, **(configs or {})}
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, MissionEnvironment] = {}
+        self._session_ids = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="env-session")
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._handlers: Dict[str, Callable[[dict, List[bytes]], dict]] = {
+            "create": self._create,
+            "reset": self._reset,
+            "step": self._step,
+            "close": self._close,
+            "batch": self._batch,
+            "stats": self._stats,
+        }
+
+    def _session(self, request: dict) -> MissionEnvironment:
+        session_id = request.get("session")
+        env = self.sessions.get(session_id)
+        if env is None:
+            raise SessionError(f"Unknown session '{session_id}'.")
+        return env
+
+    def _create(self, request: dict, blobs: List[bytes]) -> dict:
+        if len(self.sessions) >= self.max_sessions:
+            raise SessionError(f"Session limit of {self.max_sessions} reached.")
+        name = request.get("config", "default")
+        if not isinstance(name, str):
+            raise SessionError("Select a config by name; the server does not accept config dicts from clients.")
+        if name not in self.configs:
+            raise SessionError(f"Unknown config '{name}', expected one of {sorted(self.configs)}.")
+        env = MissionEnvironment(config=copy.deepcopy(self.configs[name]), max_turns=request.get("max_turns", 10))
+        session_id = str(next(self._session_ids))
+        self.sessions[session_id] = env
+        return {"session": session_id}
+
+    def _reset(self, request: dict, blobs: List[bytes]) -> dict:
+        observation = self._session(request).reset(
+            seed=request.get("seed"),
+            custom_plan=request.get("custom_plan"),
+            target_criteria=request.get("target_criteria")
+        )
+        return {"observation": extract_media(observation, blobs)}
+
+    def _step(self, request: dict, blobs: List[bytes]) -> dict:
+        observation, reward, terminated, truncated, info = self._session(request).step(request.get("action") or {})
+        return {
+            "observation": extract_media(observation, blobs),
+            "reward": reward,
+            "terminated": terminated,
+            "truncated": truncated,
+            "info": info,
+        }
+
+    def _close(self, request: dict, blobs: List[bytes]) -> dict:
+        env = self.sessions.pop(request.get("session"), None)
+        if env is not None:
+            env.close()
+        return {}
+
+    def _batch(self, request: dict, blobs: List[bytes]) -> dict:
+        # Sub-requests share the blob list of the response; failures do not abort the batch
+        results = []
+        for sub_request in request.get("requests", []):
+            if sub_request.get("op") == "batch":
+                results.append({"error": "Nested batches are not supported."})
+                continue
+            ok, value = self.execute(sub_request, blobs)
+            results.append({"result": value} if ok else {"error": value})
+        return {"results": results}
+
+    def _stats(self, request: dict, blobs: List[bytes]) -> dict:
+        return {"sessions": len(self.sessions)}
+
+    def execute(self, request: dict, blobs: List[bytes]):
+        """Run one request. Returns (True, result) or (False, error message)."""
+        handler = self._handlers.get(request.get("op"))
+        if handler is None:
+            return False, f"Unknown operation '{request.get('op')}'."
+        try:
+            return True, handler(request, blobs)
+        except Exception as e:
+            return False, f"{type(e).__name__}: {e}"
+
+    @staticmethod
+    def _request_sessions(request: dict) -> List[str]:
+        if request.get("op") == "batch":
+            sessions = {sub_request.get("session") for sub_request in request.get("requests", []) if isinstance(sub_request, dict)}
+        else:
+            sessions = {request.get("session")}
+        # A fixed order, so batches locking several sessions cannot deadlock
+        return sorted(str(session) for session in sessions if session is not None)
+
+    async def execute_async(self, request: dict, blobs: List[bytes]):
+        """Run one request on the thread pool, after earlier requests for the same sessions."""
+        sessions = self._request_sessions(request)
+        async with contextlib.AsyncExitStack() as stack:
+            for session_id in sessions:
+                # asyncio.Lock wakes waiters in FIFO order
+                await stack.enter_async_context(self._session_locks.setdefault(session_id, asyncio.Lock()))
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, self.execute, request, blobs)
+        for session_id in sessions:
+            lock = self._session_locks.get(session_id)
+            # Session ids are never reused, so the lock of a closed or unknown session can go
+            if lock is not None and session_id not in self.sessions and not lock.locked():
+                del self._session_locks[session_id]
+        return result
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request, _ = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                blobs: List[bytes] = []
+                ok, value = await self.execute_async(request, blobs)
+                response = {"id": request.get("id"), "result" if ok else "error": value}
+                try:
+                    frame = pack_frame(response, blobs)
+                except (TypeError, ValueError) as e:
+                    # e.g. an info value that is not JSON serializable; the client still gets an answer
+                    frame = pack_frame({"id": request.get("id"), "error": f"Cannot serialize the response: {e}"})
+                writer.writelines(frame)
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.warning("Dropping connection: %s", e)
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for env in self.sessions.values():
+            env.close()
+        self.sessions.clear()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                    ready: Optional[Callable[[str], None]] = None) -> None:
+        """Serve until cancelled. `ready` is called with the bound address once listening."""
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+            address = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+            bound_host, bound_port = server.sockets[0].getsockname()[:2]
+            address = f"{bound_host}:{bound_port}"
+        if ready is not None:
+            ready(address)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+            if unix_path and os.path.exists(unix_path):
+                os.unlink(unix_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve MissionEnvironment sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port, 0 picks a free one.")
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None, help="Threads running environment calls.")
+    parser.add_argument("--config", action="append", default=[], metavar="NAME=PATH",
+                        help="Offer the environment config in a YAML or JSON file under NAME (repeatable).")
+    args = parser.parse_args()
+
+    configs = {}
+    for entry in args.config:
+        name, separator, path = entry.partition("=")
+        if not separator or not name:
+            parser.error(f"--config expects NAME=PATH, got '{entry}'.")
+        with open(path, "r") as f:
+            configs[name] = yaml.safe_load(f)
+    server = MissionEnvServer(configs=configs, max_sessions=args.max_sessions, workers=args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix, ready=lambda address: print(f"listening on {address}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
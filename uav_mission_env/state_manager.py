@@ -1,8 +1,48 @@
 """Lightweight state transition manager for the mission environment."""
 
+import keyword
+from functools import lru_cache
+from string import Formatter
 from typing import Dict, Any, Optional
 
 
+@lru_cache(maxsize=256)
+def _compile_condition_template(condition: str):
+    """Compile a condition once, turning every {placeholder} into a variable of the same name.
+
+    Returns (code, names), or None if a placeholder is not a plain name (e.g. "{a[0]}" or "{a!r}"),
+    in which case the condition is evaluated by string substitution.
+    """
+    parts = []
+    names = set()
+    try:
+        for literal, field, format_spec, conversion in Formatter().parse(condition):
+            parts.append(literal)
+            if field is not None:
+                if not field.isidentifier() or keyword.iskeyword(field) or format_spec or conversion:
+                    return None
+                parts.append(field)
+                names.add(field)
+        return compile("".join(parts), "<condition>", "eval"), tuple(names)
+    except (ValueError, SyntaxError):
+        return None
+
+
+@lru_cache(maxsize=256)
+def _condition_fields(condition: str) -> tuple:
+    """Names of the placeholders referenced by a condition template."""
+    names = set()
+    for _, field, _, _ in Formatter().parse(condition):
+        if field:
+            names.add(field.split('.')[0].split('[')[0])
+    return tuple(names)
+
+
+@lru_cache(maxsize=4096)
+def _compile_condition(expression: str):
+    return compile(expression, "<condition>", "eval")
+
+
 class StateManager:
     """Handles state transitions based on conditions defined in state config."""
     
@@ -56,10 +96,20 @@ class StateManager:
         Returns:
             Boolean result of the condition evaluation
         """
+        compiled = _compile_condition_template(condition)
+        if compiled is not None:
+            code, names = compiled
+            try:
+                # Bind the context values directly instead of formatting their reprs into the expression
+                variables = {name: context[name] for name in names}
+                return bool(eval(code, {"__builtins__": {}}, variables))
+            except (KeyError, ValueError, NameError):
+                return False
         try:
             # Format the condition with context values
             format_dict = {}
-            for key, value in context.items():
+            for key in _condition_fields(condition):
+                value = context[key]
                 if isinstance(value, str):
                     format_dict[key] = repr(value)  # Add quotes around strings
                 elif isinstance(value, list):
@@ -70,7 +120,7 @@ class StateManager:
             formatted_condition = condition.format(**format_dict)
             
             # Evaluate with restricted builtins for safety
-            result = eval(formatted_condition, {"__builtins__": {}}, {})
+            result = eval(_compile_condition(formatted_condition), {"__builtins__": {}}, {})
             return bool(result)
         except (KeyError, ValueError, SyntaxError, NameError) as e:
             # If evaluation fails, return False to skip this condition
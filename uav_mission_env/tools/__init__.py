@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+from .action_parser import ActionError, ActionParser, ParsedAction
+from .executor import ToolExecutor, ToolPolicy
+from .result_cache import ToolResultCache
 from .tool import Tool
 from .tool_manager import ToolManager
 from .tool_validator import ToolValidator
 
-__all__ = ["Tool", "ToolManager", "ToolValidator"]
+__all__ = ["ActionError", "ActionParser", "ParsedAction", "Tool", "ToolExecutor", "ToolPolicy", "ToolResultCache", "ToolManager", "ToolValidator"]
 
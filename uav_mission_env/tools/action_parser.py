@@ -0,0 +1,163 @@
+"""Action Parser - Turns raw model output into validated environment actions.
+
+Model output follows the state's `output_keys`, optionally preceded by a `<think>...</think>` block:
+
+    <think>...</think>
+    {"justification": "...", "tool_call": {"name": "next_goal", "parameters": {"next_goal": "waypoint_3"}}}
+
+The thinking block is split off with two substring searches and the first JSON object is decoded in
+place (no regex, no copies of the text before it). Output and parameter schemas are compiled into
+validators once per state and tool, so a parse is one JSON decode plus a few type checks.
+"""
+
+from __future__ import annotations
+import json
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from ..utils.schema_utils import Validator, compile_validator, create_json_schema_from_keys
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# Codes of ActionError, in the order the checks run
+ERROR_CODES = (
+    "unterminated_thinking",  # <think> without </think>
+    "no_json",                # no JSON object in the output
+    "invalid_json",           # the JSON object does not decode
+    "invalid_output",         # the object does not match the state's output keys
+    "invalid_tool_call",      # tool_call is missing or malformed
+    "unknown_tool",           # no tool with that name
+    "unavailable_tool",       # the tool is not available in the current state
+    "invalid_parameters",     # parameters do not match the tool's JSON schema
+    "tool_error",             # the tool call failed, timed out or was rejected by the executor
+)
+
+_decoder = json.JSONDecoder()
+
+
+@dataclass(frozen=True, slots=True)
+class ActionError:
+    code: str
+    message: str
+    # Location of the offending value, e.g. 'parameters.next_goal'
+    path: Optional[str] = None
+
+    def __str__(self) -> str:
+        return f"{self.code}: {self.path}: {self.message}" if self.path else f"{self.code}: {self.message}"
+
+    def to_dict(self) -> dict:
+        """The form reported in info['errors']."""
+        return {'code': self.code, 'path': self.path, 'message': self.message}
+
+
+@dataclass(slots=True)
+class ParsedAction:
+    """Result of parsing one model output: `action` on success, `error` otherwise."""
+    action: Optional[dict] = None
+    error: Optional[ActionError] = None
+    # Other output keys (e.g. justification, information)
+    fields: dict = field(default_factory=dict)
+    thinking: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def split_thinking(text: str) -> Tuple[Optional[str], int]:
+    """(thinking text, offset of the answer). A missing `<think>` tag is allowed when the chat template
+    opened it in the prompt. Raises ValueError for an unterminated thinking block."""
+    open_at = text.find(THINK_OPEN)
+    close_at = text.find(THINK_CLOSE, open_at + len(THINK_OPEN) if open_at >= 0 else 0)
+    if close_at >= 0:
+        start = open_at + len(THINK_OPEN) if 0 <= open_at < close_at else 0
+        return text[start:close_at], close_at + len(THINK_CLOSE)
+    if open_at >= 0:
+        raise ValueError("'<think>' is never closed")
+    return None, 0
+
+
+class _StateRules:
+    """Compiled checks for one state."""
+
+    def __init__(self, state: str, state_config: dict):
+        state_entry = state_config['states'][state]
+        output_keys = state_entry.get('output_keys', [])
+        output_schema = create_json_schema_from_keys(output_keys)
+        # tool_call is checked in detail by the parser
+        output_schema['properties'].pop('tool_call', None)
+        self.validate_output: Validator = compile_validator(output_schema)
+        self.tools: FrozenSet[str] = frozenset(state_entry.get('tools', []))
+
+
+class ActionParser:
+    """Parses raw model output for a state into `{'tool_name', 'parameters'}` actions."""
+
+    def __init__(self, tool_validator):
+        self.tool_validator = tool_validator
+        self._states: Dict[str, _StateRules] = {}
+
+    def _rules(self, state: str) -> _StateRules:
+        rules = self._states.get(state)
+        if rules is None:
+            rules = _StateRules(state, self.tool_validator.state_config)
+            self._states[state] = rules
+        return rules
+
+    def parse(self, text: str, state: str) -> ParsedAction:
+        """Parse and validate one model output for `state`. Never raises for malformed output."""
+        try:
+            thinking, offset = split_thinking(text)
+        except ValueError as e:
+            return ParsedAction(error=ActionError("unterminated_thinking", str(e)))
+
+        start = text.find("{", offset)
+        if start < 0:
+            return ParsedAction(error=ActionError("no_json", "No JSON object found in the output"), thinking=thinking)
+        try:
+            output, _ = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            return ParsedAction(error=ActionError("invalid_json", f"{e.msg} at position {e.pos}"), thinking=thinking)
+        result = self.parse_output(output, state)
+        result.thinking = thinking
+        return result
+
+    def parse_output(self, output, state: str) -> ParsedAction:
+        """Validate an already decoded output object for `state`."""
+        if not isinstance(output, dict):
+            return ParsedAction(error=ActionError("invalid_output", f"Expected a JSON object, got {type(output).__name__}"))
+        rules = self._rules(state)
+
+        if 'tool_call' in output:
+            error = rules.validate_output(output, "output")
+            fields = {key: value for key, value in output.items() if key != 'tool_call'}
+            if error:
+                return ParsedAction(error=ActionError("invalid_output", error[1], error[0]), fields=fields)
+            tool_call = output['tool_call']
+            if not isinstance(tool_call, dict):
+                return ParsedAction(error=ActionError("invalid_tool_call", "'tool_call' must be an object"), fields=fields)
+            tool_name = tool_call.get('name')
+            parameters = tool_call.get('parameters', {})
+        elif 'tool_name' in output:
+            # Already in the environment's action format
+            fields = {key: value for key, value in output.items() if key not in ('tool_name', 'parameters')}
+            tool_name = output['tool_name']
+            parameters = output.get('parameters', {})
+        else:
+            return ParsedAction(error=ActionError("invalid_tool_call", "Missing 'tool_call'"), fields=output)
+
+        if not isinstance(tool_name, str) or not tool_name:
+            return ParsedAction(error=ActionError("invalid_tool_call", "Tool name must be a non-empty string"), fields=fields)
+        if not isinstance(parameters, dict):
+            return ParsedAction(error=ActionError("invalid_tool_call", "'parameters' must be an object"), fields=fields)
+        if tool_name not in rules.tools:
+            if self.tool_validator.tool_manager.get_spec(tool_name) is None:
+                return ParsedAction(error=ActionError("unknown_tool", f"Tool '{tool_name}' not found"), fields=fields)
+            return ParsedAction(
+                error=ActionError("unavailable_tool", f"Tool '{tool_name}' not available in state '{state}'"), fields=fields
+            )
+        error = self.tool_validator.validate_parameters(tool_name, parameters)
+        if error:
+            return ParsedAction(error=error, fields=fields)
+        return ParsedAction(action={'tool_name': tool_name, 'parameters': parameters}, fields=fields)
@@ -0,0 +1,258 @@
+"""Tool Executor - Runs tool calls inline, on a thread pool or on a process pool.
+
+Tools declare their workload with the `workload` class attribute: 'cpu' tools (e.g. image
+processing) and 'io' tools (e.g. remote services) go to the thread pool and tools without a workload
+run inline on the environment thread. The process pool is opt-in, since its workers import the main
+module of the program. The state config can override the mode per tool, together with a timeout and a
+concurrency limit:
+
+    tool_execution:
+      thread_workers: 8
+      process_workers: 2
+      tools:
+        crop_zoom_image: {mode: process, timeout: 5.0, max_concurrency: 2}
+
+Executors are shared by every environment of a process that uses the same pool sizes, so the pools
+and the per-tool concurrency limits span environments. Pools are started on first use and shut down
+when the last environment using them is closed, or at interpreter exit. Pool processes are started
+with 'forkserver' (or 'spawn'), never forked from a process running threads. A pool that breaks (e.g.
+a worker process dies) fails its calls with an error and is replaced by a new one on the next call.
+"""
+
+from __future__ import annotations
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .tool import Tool
+
+EXECUTION_MODES = ("inline", "thread", "process")
+# Process mode is never a default: workers of a script without a `__main__` guard fail to start
+WORKLOAD_MODES = {None: "inline", "io": "thread", "cpu": "thread"}
+
+
+@dataclass(frozen=True, slots=True)
+class ToolPolicy:
+    mode: str = "inline"
+    # Seconds from submission until the result must be available (offloaded modes only)
+    timeout: Optional[float] = None
+    # Calls of this tool running at the same time, over all environments sharing the executor
+    max_concurrency: Optional[int] = None
+
+    @classmethod
+    def for_tool(cls, tool: Tool, overrides: Optional[dict] = None) -> ToolPolicy:
+        overrides = overrides or {}
+        mode = overrides.get('mode', WORKLOAD_MODES.get(getattr(tool, 'workload', None), "inline"))
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}' for tool '{tool.name}', expected one of {EXECUTION_MODES}.")
+        if mode == "process" and not tool.independent:
+            raise ValueError(f"Tool '{tool.name}' uses mission state and cannot run in a process pool.")
+        return cls(
+            mode=mode,
+            timeout=overrides.get('timeout', getattr(tool, 'timeout', None)),
+            max_concurrency=overrides.get('max_concurrency', getattr(tool, 'max_concurrency', None)),
+        )
+
+
+_worker_tools: Dict[str, Tool] = {}
+
+
+def _process_context():
+    # Forking copies the parent's threads' locks in whatever state they are, e.g. held by the producer
+    # thread of a mission queue; forkserver and spawn start workers from a clean interpreter
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _call_in_worker(tool_name: str, parameters: dict):
+    """Run a tool in a pool process; the tool instance is created once per process."""
+    tool = _worker_tools.get(tool_name)
+    if tool is None:
+        tool = _worker_tools[tool_name] = Tool.get_tool_by_name(tool_name)
+    return _timed_call(tool, parameters)
+
+
+def _timed_call(tool: Tool, parameters: dict):
+    # time.monotonic is system-wide, so start times of pool processes compare with the parent's
+    start = time.monotonic()
+    outputs = dict(tool.use(parameters))
+    return outputs, start, time.monotonic()
+
+
+class ToolCall:
+    """A submitted tool call; `result()` waits for it within the policy's timeout."""
+
+    def __init__(self, executor: ToolExecutor, tool: Tool, policy: ToolPolicy, future: Optional[Future],
+                 submitted: float, queue_depth: int, error: Optional[str] = None):
+        self.executor = executor
+        self.tool = tool
+        self.policy = policy
+        self.future = future
+        self.submitted = submitted
+        self.queue_depth = queue_depth
+        self._error = error
+
+    def cancel(self) -> bool:
+        """Cancel the call if it has not started. Running calls are not interrupted."""
+        return self.future is not None and self.future.cancel()
+
+    def result(self) -> Tuple[dict, Optional[str], dict]:
+        """(outputs, error message or None, metrics)."""
+        metrics = {
+            'tool_name': self.tool.name,
+            'mode': self.policy.mode,
+            'queue_depth': self.queue_depth,
+            'queue_seconds': None,
+            'run_seconds': None,
+            'status': 'ok',
+        }
+        if self._error is not None:
+            metrics['status'] = 'rejected'
+            return {}, f"{self.tool.name}: {self._error}", metrics
+        timeout = self.policy.timeout
+        remaining = None if timeout is None else max(0.0, self.submitted + timeout - time.monotonic())
+        try:
+            outputs, start, end = self.future.result(timeout=remaining)
+        except FutureTimeoutError:
+            metrics['status'] = 'cancelled' if self.cancel() else 'timeout'
+            return {}, f"{self.tool.name}: timed out after {timeout}s", metrics
+        except Exception as e:
+            metrics['status'] = 'error'
+            return {}, f"{self.tool.name}: {str(e)}", metrics
+        metrics['queue_seconds'] = start - self.submitted
+        metrics['run_seconds'] = end - start
+        return outputs, None, metrics
+
+
+class ToolExecutor:
+    """Thread and process pools with per-tool concurrency limits."""
+
+    _shared: Dict[Tuple[int, int], ToolExecutor] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, thread_workers: int = 8, process_workers: Optional[int] = None):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers or max(1, (os.cpu_count() or 2) // 2)
+        self._pools: Dict[str, object] = {}
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._in_flight = {"thread": 0, "process": 0}
+        self._lock = threading.Lock()
+        # Environments holding the shared executor (see shared/release)
+        self._users = 0
+
+    @classmethod
+    def shared(cls, thread_workers: int = 8, process_workers: Optional[int] = None) -> ToolExecutor:
+        """The executor of this process for the given pool sizes; hand it back with `release`."""
+        executor = cls(thread_workers, process_workers)
+        key = (executor.thread_workers, executor.process_workers)
+        with cls._shared_lock:
+            if not cls._shared:
+                atexit.register(cls._shutdown_shared)
+            executor = cls._shared.setdefault(key, executor)
+            executor._users += 1
+            return executor
+
+    def release(self) -> None:
+        """Give back an executor obtained from `shared`; the last user shuts its pools down."""
+        with self._shared_lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            key = (self.thread_workers, self.process_workers)
+            if self._shared.get(key) is self:
+                del self._shared[key]
+        # Calls that timed out may still be running; do not wait for them
+        self.shutdown(wait=False)
+
+    @classmethod
+    def _shutdown_shared(cls) -> None:
+        with cls._shared_lock:
+            executors, cls._shared = list(cls._shared.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=False)
+
+    def _pool(self, mode: str):
+        pool = self._pools.get(mode)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(mode)
+                if pool is None:
+                    if mode == "process":
+                        pool = ProcessPoolExecutor(max_workers=self.process_workers, mp_context=_process_context())
+                    else:
+                        pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="tool")
+                    self._pools[mode] = pool
+        return pool
+
+    def _limit(self, tool_name: str, max_concurrency: int) -> threading.BoundedSemaphore:
+        limit = self._limits.get(tool_name)
+        if limit is None:
+            with self._lock:
+                # The first limit registered for a tool applies to every environment
+                limit = self._limits.setdefault(tool_name, threading.BoundedSemaphore(max_concurrency))
+        return limit
+
+    def submit(self, tool: Tool, parameters: dict, policy: ToolPolicy) -> ToolCall:
+        """Start a tool call on the policy's pool ('thread' or 'process')."""
+        submitted = time.monotonic()
+        limit = None
+        if policy.max_concurrency:
+            # Back-pressure: wait for a free slot, but not beyond the call's timeout
+            limit = self._limit(tool.name, policy.max_concurrency)
+            if not limit.acquire(timeout=-1 if policy.timeout is None else policy.timeout):
+                return ToolCall(self, tool, policy, None, submitted, self._in_flight[policy.mode],
+                                error=f"no free slot within {policy.timeout}s (max_concurrency={policy.max_concurrency})")
+        mode = policy.mode
+        with self._lock:
+            queue_depth = self._in_flight[mode]
+            self._in_flight[mode] += 1
+        pool = None
+        try:
+            pool = self._pool(mode)
+            if mode == "process":
+                future = pool.submit(_call_in_worker, tool.name, parameters)
+            else:
+                future = pool.submit(_timed_call, tool, parameters)
+        except Exception as e:
+            # A broken or shut down pool rejects the call; the next call starts a new pool
+            self._finished(mode, limit)
+            self._discard_pool(mode, pool)
+            return ToolCall(self, tool, policy, None, submitted, queue_depth, error=f"{mode} pool unavailable: {e}")
+        except BaseException:
+            self._finished(mode, limit)
+            raise
+        future.add_done_callback(lambda done: self._finished(mode, limit, pool, done))
+        return ToolCall(self, tool, policy, future, submitted, queue_depth)
+
+    def _finished(self, mode: str, limit: Optional[threading.BoundedSemaphore], pool=None,
+                  future: Optional[Future] = None) -> None:
+        with self._lock:
+            self._in_flight[mode] -= 1
+        if limit is not None:
+            limit.release()
+        if future is not None and not future.cancelled() and isinstance(future.exception(), BrokenExecutor):
+            self._discard_pool(mode, pool)
+
+    def _discard_pool(self, mode: str, pool) -> None:
+        # A broken pool has already stopped its workers; only forget it so that `_pool` starts a new one
+        with self._lock:
+            if pool is not None and self._pools.get(mode) is pool:
+                del self._pools[mode]
+
+    def stats(self) -> dict:
+        """Calls submitted and not finished, per pool."""
+        with self._lock:
+            return dict(self._in_flight)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pools; calls that have not started are cancelled."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
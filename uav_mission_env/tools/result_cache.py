@@ -0,0 +1,228 @@
+"""Tool Result Cache - Memoizes outputs of pure tools across steps, episodes and environments.
+
+Tools with `cacheable = True` are pure functions of their parameters (and, with
+`uses_waypoint_media = True`, of the media of the current waypoint). Their outputs are kept in a
+size-bounded LRU keyed by (tool name, digest of the canonical JSON parameters, media id). An
+optional directory tier stores outputs as JSON files, so pool processes and other environment
+processes reuse them too. It is bounded by `max_disk_bytes`: beyond it, the least recently used
+files are deleted (reads refresh a file's modification time).
+
+    tool_cache:
+      max_entries: 1024
+      max_bytes: 67108864
+      disk_path: /tmp/uav_tool_cache
+      max_disk_bytes: 1073741824
+
+Caches are shared by every environment of a process with the same settings. Outputs containing
+an 'error' key are not cached.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..utils.immutable import freeze
+
+CacheKey = Tuple[str, str, Optional[str]]
+
+# Pruning deletes files until the disk tier is this share of max_disk_bytes, so it does not run on every write
+DISK_PRUNE_TARGET = 0.9
+
+
+def _canonical_json(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def cache_key(tool_name: str, parameters: dict, media_id: Optional[str] = None) -> CacheKey:
+    """(tool, parameter digest, media id); parameters are canonicalized so key order does not matter."""
+    digest = hashlib.blake2b(_canonical_json(parameters).encode("utf-8"), digest_size=16).hexdigest()
+    return tool_name, digest, media_id
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool outputs, bounded by entries and (approximate JSON) bytes."""
+
+    _shared: Dict[tuple, ToolResultCache] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 << 20, disk_path: Optional[str] = None,
+                 max_disk_bytes: int = 1 << 30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_path = os.path.abspath(disk_path) if disk_path else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[CacheKey, Tuple[dict, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "disk_evictions": 0}
+        self._by_tool: Dict[str, list] = {}
+        # Size of the disk tier as of the last scan plus this process's writes since; None until the first scan
+        self._disk_bytes: Optional[int] = None
+        self._prune_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, max_entries: int = 1024, max_bytes: int = 64 << 20, disk_path: Optional[str] = None,
+               max_disk_bytes: int = 1 << 30) -> ToolResultCache:
+        """The cache of this process for the given settings."""
+        key = (max_entries, max_bytes, os.path.abspath(disk_path) if disk_path else None, max_disk_bytes)
+        with cls._shared_lock:
+            cache = cls._shared.get(key)
+            if cache is None:
+                cache = cls._shared[key] = cls(max_entries, max_bytes, disk_path, max_disk_bytes)
+            return cache
+
+    def _disk_file(self, key: CacheKey) -> str:
+        tool_name, digest, media_id = key
+        if media_id is not None:
+            digest = hashlib.blake2b(f"{digest}:{media_id}".encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.disk_path, tool_name, digest[:2], digest + ".json")
+
+    def _count(self, tool_name: str, hit: bool) -> None:
+        counts = self._by_tool.get(tool_name)
+        if counts is None:
+            counts = self._by_tool[tool_name] = [0, 0]
+        counts[0 if hit else 1] += 1
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        """Cached outputs (read-only) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                self._count(key[0], True)
+                return entry[0]
+        if self.disk_path is not None:
+            path = self._disk_file(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    encoded = f.read()
+                outputs = json.loads(encoded)
+                # Recently read files are pruned last
+                os.utime(path)
+            except (OSError, ValueError):
+                pass
+            else:
+                outputs = self._insert(key, outputs, len(encoded))
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                    self._count(key[0], True)
+                return outputs
+        with self._lock:
+            self._counters["misses"] += 1
+            self._count(key[0], False)
+        return None
+
+    def put(self, key: CacheKey, outputs: dict) -> None:
+        if 'error' in outputs:
+            return
+        encoded = _canonical_json(outputs)
+        self._insert(key, outputs, len(encoded))
+        with self._lock:
+            self._counters["stores"] += 1
+        if self.disk_path is not None:
+            self._write_disk(key, encoded)
+
+    def _insert(self, key: CacheKey, outputs: dict, size: int) -> dict:
+        outputs = freeze(outputs)
+        if size > self.max_bytes:
+            return outputs
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (outputs, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+        return outputs
+
+    def _write_disk(self, key: CacheKey, encoded: str) -> None:
+        path = self._disk_file(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write and rename, so readers in other processes never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(encoded)
+            prune = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        # One thread prunes at a time; the others keep writing
+        if prune and self._prune_lock.acquire(blocking=False):
+            try:
+                self._prune_disk()
+            finally:
+                self._prune_lock.release()
+
+    def _prune_disk(self) -> None:
+        """Delete the least recently used files once the disk tier exceeds max_disk_bytes.
+
+        Other processes may write or delete files at the same time, so sizes are re-read from the
+        directory and files that are already gone are skipped.
+        """
+        files = []
+        for directory, _, names in os.walk(self.disk_path):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        if total > self.max_disk_bytes:
+            target = self.max_disk_bytes * DISK_PRUNE_TARGET
+            files.sort()
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                    evicted += 1
+                except OSError:
+                    pass
+                total -= size
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["disk_evictions"] += evicted
+
+    def clear(self) -> None:
+        """Drop the in-memory entries (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": (self._counters["hits"] + self._counters["disk_hits"]) / lookups if lookups else 0.0,
+                "by_tool": {
+                    name: {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+                    for name, (hits, misses) in self._by_tool.items()
+                },
+            }
@@ -1,7 +1,24 @@
+import json
+from typing import Optional
+
 from ..utils import media_utils
+from ..utils.image_pyramid import ImagePyramidCache
 
 class Tool:
     registry = {}
+    # Independent tools neither read nor change mission state, so several calls of them in one
+    # step may run concurrently
+    independent = False
+    # 'cpu' or 'io' to run on the thread pool of the ToolExecutor (the process pool is opt-in per tool
+    # in the state config), None to run inline
+    workload = None
+    # Defaults for ToolPolicy, overridable in the state config
+    timeout = None
+    max_concurrency = None
+    # Cacheable tools are pure functions of their parameters (and, with uses_waypoint_media, of the
+    # current waypoint's media), so their outputs are memoized by the ToolResultCache
+    cacheable = False
+    uses_waypoint_media = False
 
     def __init__(self, name: str, logging_enabled: bool = False, arguments: dict = None, mission_manager=None):
         self.name = name
@@ -23,6 +40,19 @@ class Tool:
         # here can be the specific tool logic
         return self.log(action_args)
 
+    def prepare(self, action_args: dict) -> dict:
+        """Resolve inputs that depend on mission state (e.g. the current waypoint's media) into plain
+        parameters. Runs on the environment thread before the call is dispatched or looked up in the
+        cache; returns `action_args` itself when there is nothing to resolve."""
+        return action_args
+
+    def media_id(self) -> Optional[str]:
+        """Identity of the current waypoint's media, part of the cache key of tools using it."""
+        if not self.uses_waypoint_media or self.mission_manager is None:
+            return None
+        waypoint = self.mission_manager.waypoint_manager.get_waypoint(self.mission_manager.current_waypoint_id)
+        return json.dumps(waypoint.media, sort_keys=True) if waypoint is not None else None
+
     @classmethod
     def get_tool_by_name(cls, tool_name: str, mission_manager=None, state_config: dict = {}, current_state: str = None):
         """Factory method to create tools with dependencies injected."""
@@ -39,6 +69,9 @@ class Tool:
 
 
 class NextGoalTool(Tool):
+    # Set by the environment (state_config.max_listed_waypoints); None lists every remaining waypoint
+    max_listed_waypoints = None
+
     def __init__(self, logging_enabled: bool = False, mission_manager=None):
         super().__init__(name="next_goal", logging_enabled=logging_enabled, mission_manager=mission_manager)
 
@@ -50,11 +83,14 @@ class NextGoalTool(Tool):
         waypoint = self.mission_manager.visit_waypoint(waypoint_id)
         obs_dict = {
             "current_location": waypoint_id,
-            "locations_to_be_visited": self.mission_manager.available_waypoints,
+            "locations_to_be_visited": self.mission_manager.get_available_waypoints(self.max_listed_waypoints),
+            "num_locations_to_be_visited": self.mission_manager.num_available_waypoints,
             "past_locations": self.mission_manager.visited_waypoints,
             "plan": self.mission_manager.current_mission,
             "waypoint": waypoint,
         }
+        if self.mission_manager.geometry is not None:
+            obs_dict["travel_cost"] = self.mission_manager.last_travel_cost
         log_args = self.log(action_args)
         obs_dict.update(log_args)
         return obs_dict
@@ -70,13 +106,66 @@ class ReportFinalConclusionTool(Tool):
         return action_args or {}
 
 class CropZoomImageTool(Tool):
+    independent = True
+    workload = "cpu"
+    cacheable = True
+    # Largest output of a crop from a waypoint image (image_index); crops are never upscaled
+    zoom_resolution = (640, 480)
+    # Set by the environment; None takes crops from the decoded source (`image_pyramid: false`)
+    pyramid_cache = None
+
     def __init__(self, logging_enabled: bool = False, mission_manager=None):
         super().__init__(name="crop_zoom_image", logging_enabled=logging_enabled, mission_manager=mission_manager)
 
+    def prepare(self, action_args: dict) -> dict:
+        # image_index refers to the current waypoint's media items (as in media_catalog)
+        index = action_args.get("image_index")
+        if index is None or self.mission_manager is None:
+            return action_args
+        waypoint = self.mission_manager.waypoint_manager.get_waypoint(self.mission_manager.current_waypoint_id)
+        items = media_utils.expand_media(waypoint.media) if waypoint is not None else []
+        if not isinstance(index, int) or not 0 <= index < len(items):
+            raise ValueError(f"Unknown image index {index}, the waypoint has {len(items)} images")
+        prepared = {key: value for key, value in action_args.items() if key != "image_index"}
+        prepared["source"] = {"path": items[index].get("path"), "frame": items[index].get("frame")}
+        # The settings travel with the call, so tools in pool processes use the same kind of cache
+        prepared["pyramid"] = self.pyramid_cache.settings() if self.pyramid_cache is not None else False
+        return prepared
+
+    def _crop_source(self, source: dict, bbox: dict, pyramid_settings) -> str:
+        """Crop `bbox` of a waypoint image; pyramid_settings: ImagePyramidCache.settings(), or False
+        to crop from the decoded source."""
+        path, frame = source["path"], source.get("frame")
+        box = (bbox["x_min"], bbox["y_min"], bbox["x_max"], bbox["y_max"])
+        if pyramid_settings is False:
+            pyramid = None
+            image = media_utils.load_image_from_path(path, frame=frame)
+            width, height = image.size
+        else:
+            # This process's cache with the environment's settings
+            pyramid = ImagePyramidCache.shared(**pyramid_settings)
+            width, height = pyramid.source_size(path, frame)
+        crop_width, crop_height = (box[2] - box[0]) * width, (box[3] - box[1]) * height
+        scale = min(1.0, self.zoom_resolution[0] / crop_width, self.zoom_resolution[1] / crop_height)
+        size = (max(1, round(crop_width * scale)), max(1, round(crop_height * scale)))
+        if pyramid is not None:
+            # Served from the smallest pyramid level with enough pixels in the box
+            return media_utils.pil_image_to_base64_str(pyramid.region(path, frame, box, size))
+        cropped = image.crop((int(box[0] * width), int(box[1] * height), int(box[2] * width), int(box[3] * height)))
+        return media_utils.pil_image_to_base64_str(cropped.resize(size) if cropped.size != size else cropped)
+
     def use(self, action_args: dict = None):
         image_b64 = action_args.get("image")
         bbox = action_args.get("bbox")
-        
+        source = action_args.get("source")
+
+        if source and bbox:
+            try:
+                result = {"cropped_image": self._crop_source(source, bbox, action_args.get("pyramid", {}))}
+                result.update(self.log(action_args))
+                return result
+            except Exception as e:
+                return {"error": str(e), **self.log(action_args)}
         if not image_b64 or not bbox:
                 return self.log(action_args)
 
@@ -98,7 +187,23 @@ class CropZoomImageTool(Tool):
         except Exception as e:
             return {"error": str(e), **self.log(action_args)}
 
+class ViewImagesTool(Tool):
+    # Set by the environment: the CurrentWaypointObservation that shows the requested images
+    waypoint_observation = None
+
+    def __init__(self, logging_enabled: bool = False, mission_manager=None):
+        super().__init__(name="view_images", logging_enabled=logging_enabled, mission_manager=mission_manager)
+
+    def use(self, action_args: dict = None):
+        if self.waypoint_observation is None:
+            raise RuntimeError("ViewImagesTool requires the waypoint observation to be injected.")
+        # Unknown indices raise ValueError, reported as a tool error
+        indices = (action_args or {}).get("indices") or []
+        return {"view_images": self.waypoint_observation.request(list(indices))}
+
 class NavigateToNewLandingZoneTool(Tool):
+    independent = True
+
     def __init__(self, logging_enabled: bool = False, mission_manager=None):
         super().__init__(name="navigate_to_new_landing_zone", logging_enabled=logging_enabled, mission_manager=mission_manager)
 
@@ -106,6 +211,8 @@ class NavigateToNewLandingZoneTool(Tool):
         return self.log(action_args)
 
 class ActivateLandingProcessTool(Tool):
+    independent = True
+
     def __init__(self, logging_enabled: bool = False, mission_manager=None):
         super().__init__(name="activate_landing_process", logging_enabled=logging_enabled, mission_manager=mission_manager)
 
@@ -113,6 +220,8 @@ class ActivateLandingProcessTool(Tool):
         return self.log(action_args)
 
 class ActivateTrackingModeTool(Tool):
+    independent = True
+
     def __init__(self, logging_enabled: bool = False, mission_manager=None):
         super().__init__(name="activate_tracking_mode", logging_enabled=logging_enabled, mission_manager=mission_manager)
 
@@ -124,6 +233,7 @@ Tool.registry = {
     "next_goal": NextGoalTool,
     "report_final_conclusion": ReportFinalConclusionTool,
     "crop_zoom_image": CropZoomImageTool,
+    "view_images": ViewImagesTool,
     "navigate_to_new_landing_zone": NavigateToNewLandingZoneTool,
     "activate_landing_process": ActivateLandingProcessTool,
     "activate_tracking_mode": ActivateTrackingModeTool,
@@ -5,6 +5,8 @@ import yaml
 from pathlib import Path
 from typing import Optional
 
+from ..utils.immutable import freeze
+
 
 class ToolManager:
     """Manages tool specifications from all_tools.yaml."""
@@ -18,7 +20,8 @@ class ToolManager:
         with open(tools_config_path, 'r') as f:
             all_tools = yaml.safe_load(f)
         
-        self.registry = {tool['name']: tool for tool in all_tools.get('tools', [])}
+        # Specs are shared by every observation, so they are frozen to keep them from being modified
+        self.registry = {tool['name']: freeze(tool) for tool in all_tools.get('tools', [])}
     
     def get_spec(self, tool_name: str) -> Optional[dict]:
         """Get specification for a tool."""
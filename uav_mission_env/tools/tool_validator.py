@@ -1,7 +1,10 @@
 """Tool Validator - Validates tool actions against specifications."""
 
 from __future__ import annotations
-from typing import Optional
+from typing import Dict, Optional
+
+from ..utils.schema_utils import Validator, compile_validator
+from .action_parser import ActionError
 
 
 class ToolValidator:
@@ -10,27 +13,47 @@ class ToolValidator:
     def __init__(self, tool_manager, state_config: dict):
         self.tool_manager = tool_manager
         self.state_config = state_config
+        self._parameter_validators: Dict[str, Validator] = {}
     
-    def validate(self, tool_name: str, tool_args: dict, state: str) -> Optional[str]:
-        """ Validate a tool action. Returns error message or None if valid. """
+    def validate(self, tool_name: str, tool_args: dict, state: str, check_schema: bool = False) -> Optional[ActionError]:
+        """ Validate a tool action. Returns the error or None if valid.
+
+        With `check_schema`, parameters are also checked against the tool's JSON schema.
+        """
         
         # Check if tool exists
         spec = self.tool_manager.get_spec(tool_name)
         if not spec:
-            return f"Tool '{tool_name}' not found"
+            return ActionError("unknown_tool", f"Tool '{tool_name}' not found")
         
         # Check if available in current state
         available = self.get_available_tools(state)
         if tool_name not in available:
-            return f"Tool '{tool_name}' not available in state '{state}'"
+            return ActionError("unavailable_tool", f"Tool '{tool_name}' not available in state '{state}'")
         
         # Check required parameters
         required = spec.get('parameters', {}).get('required', [])
         for param in required:
             if param not in tool_args:
-                return f"Missing required parameter '{param}'"
-        
+                return ActionError("invalid_parameters", f"Missing required parameter '{param}'", "parameters")
+
+        if check_schema:
+            return self.validate_parameters(tool_name, tool_args)
         return None
+
+    def parameter_validator(self, tool_name: str) -> Validator:
+        """Compiled validator of a tool's parameter schema (compiled on first use)."""
+        validator = self._parameter_validators.get(tool_name)
+        if validator is None:
+            spec = self.tool_manager.get_spec(tool_name) or {}
+            validator = compile_validator(spec.get('parameters'))
+            self._parameter_validators[tool_name] = validator
+        return validator
+
+    def validate_parameters(self, tool_name: str, tool_args: dict) -> Optional[ActionError]:
+        """Check parameters against the tool's JSON schema. Returns the error or None if valid."""
+        error = self.parameter_validator(tool_name)(tool_args, "parameters")
+        return None if error is None else ActionError("invalid_parameters", error[1], error[0])
     
     def get_available_tools(self, state: str) -> list[str]:
         """Get tool names available for a state."""
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from .media_utils import load_and_encode_image, load_image_from_path, pil_image_to_base64_str, base64_str_to_pil_image
+from .media_utils import MediaHandle, load_and_encode_image, load_image_from_path, pil_image_to_base64_str, base64_str_to_pil_image, encode_media_reference
 from .augmentations_utils import apply_random_augmentation
 __all__ = [
     "load_and_encode_image",
     "load_image_from_path",
     "pil_image_to_base64_str",
     "base64_str_to_pil_image",
+    "encode_media_reference",
+    "MediaHandle",
     "apply_random_augmentation"
 ]
\ No newline at end of file
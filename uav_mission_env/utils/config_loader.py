@@ -9,6 +9,8 @@ from ..missions.mission_manager import MissionManager
 from ..missions.task import TaskRegistry
 from ..missions.mission_generator import MissionGenerator, ConfigMissionGenerator, PresampledMissionGenerator, RandomMissionGenerator
 from ..missions.mission import Mission
+from ..missions.mission_queue import MissionQueue
+from ..missions.mission_dataset import DatasetMissionGenerator
 from ..missions.waypoint import Waypoint
 
 class ConfigLoader:
@@ -61,6 +63,15 @@ class ConfigLoader:
             if mission_config_path:
                     resolved_path = cls._resolve_mission_config_path(mission_config_path)
                     mission_generator = ConfigMissionGenerator(resolved_path)
+            elif "mission_dataset_path" in final_data_config:
+                # Missions materialized with uav_mission_env.missions.mission_dataset
+                mission_generator = DatasetMissionGenerator(
+                    final_data_config["mission_dataset_path"],
+                    rank=final_data_config.get("rank", 0),
+                    world_size=final_data_config.get("world_size", 1),
+                    shuffle=final_data_config.get("shuffle", False),
+                    seed=final_data_config.get("random_seed", 42)
+                )
             else:
                 # Ensure dataset_metadata_path is present if we are sampling
                 if "dataset_metadata_path" not in final_data_config:
@@ -71,14 +82,25 @@ class ConfigLoader:
                 mission_generator = RandomMissionGenerator(
                     dataset_metadata_path=final_data_config.get("dataset_metadata_path", ""),
                     task_registry=task_registry,
-                    random_generator=np.random.RandomState(final_data_config.get("random_seed", 42))
+                    random_generator=np.random.RandomState(final_data_config.get("random_seed", 42)),
+                    area_size=final_data_config.get("area_size")
                 )
 
+        # 4. Optional background mission pre-generation (only for sampled missions)
+        mission_queue = None
+        queue_config = final_data_config.get("mission_queue")
+        if queue_config is not None and isinstance(mission_generator, RandomMissionGenerator):
+            mission_queue = MissionQueue.from_config(mission_generator, queue_config, seed=final_data_config.get("random_seed", 42))
+
         mission_manager = MissionManager(
             dataset_metadata_path=final_data_config.get("dataset_metadata_path", ""),
             random_generator=np.random.RandomState(final_data_config.get("random_seed", 42)),
             task_registry=task_registry,
-            mission_generator=mission_generator
+            mission_generator=mission_generator,
+            mission_queue=mission_queue,
+            mission_size=final_data_config.get("mission_size", 5),
+            home_position=final_data_config.get("home_position"),
+            cruise_speed=final_data_config.get("cruise_speed")
         )
         
         return final_state_config, task_registry, mission_manager
@@ -93,7 +115,8 @@ class ConfigLoader:
                 waypoint_id=wp_data["id"],
                 gt_entities=wp_data.get("gt_entities", {}),
                 is_target=wp_data.get("is_target", False),
-                media=wp_data.get("media", [])
+                media=wp_data.get("media", []),
+                position=wp_data.get("position")
             )
             waypoints.append(wp)
             if wp.is_target:
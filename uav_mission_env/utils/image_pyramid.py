@@ -0,0 +1,198 @@
+"""Image pyramids: source images at several scales, built once and reused for resizes and crops.
+
+For every source image (or video frame) the cache keeps levels reduced by integer factors, e.g.
+1x, 1/2 and 1/4. A request for a size, or for a relative box at a size, is served from the coarsest
+level that still has at least that many pixels, so resizes and zooms start from the smallest
+sufficient image instead of the decoded source:
+
+    image_pyramid:
+      factors: [1, 2, 4]
+      max_bytes: 134217728
+      disk_path: /tmp/uav_pyramids     # optional: reduced levels as PNG files, shared by processes
+
+Levels are built lazily from the next finer one with `Image.reduce`. Caches are shared by every
+environment of a process with the same settings. Cached images are shared and must not be modified
+in place (PIL operations such as resize, crop and the augmentations return new images).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from PIL import Image
+
+LevelKey = Tuple[str, Optional[int], int]
+
+
+def _reduce(image: Image.Image, factor: int) -> Image.Image:
+    """`image.reduce(factor)`; palette, bilevel and 16-bit images are converted first (reduce rejects them)."""
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    elif image.mode == "1":
+        image = image.convert("L")
+    elif image.mode.startswith("I;16"):
+        image = image.convert("I")
+    try:
+        return image.reduce(factor)
+    except ValueError:
+        # Any other mode reduce does not support
+        return image.convert("RGBA").reduce(factor)
+
+
+class ImagePyramidCache:
+    """Thread-safe LRU of pyramid levels keyed by (path, frame, factor), bounded by pixel bytes."""
+
+    _shared: Dict[tuple, ImagePyramidCache] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, factors: Sequence[int] = (1, 2, 4), max_bytes: int = 128 << 20, disk_path: Optional[str] = None):
+        self.factors = tuple(sorted({int(factor) for factor in factors} | {1}))
+        self.max_bytes = max_bytes
+        self.disk_path = os.path.abspath(disk_path) if disk_path else None
+        self._levels: OrderedDict[LevelKey, Image.Image] = OrderedDict()
+        self._sizes: Dict[Tuple[str, Optional[int]], Tuple[int, int]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "builds": 0, "source_loads": 0, "evictions": 0}
+
+    @classmethod
+    def shared(cls, factors: Sequence[int] = (1, 2, 4), max_bytes: int = 128 << 20, disk_path: Optional[str] = None) -> ImagePyramidCache:
+        """The cache of this process for the given settings."""
+        cache = cls(factors, max_bytes, disk_path)
+        key = (cache.factors, cache.max_bytes, cache.disk_path)
+        with cls._shared_lock:
+            return cls._shared.setdefault(key, cache)
+
+    def settings(self) -> dict:
+        """Keyword arguments of `shared` that return this cache's counterpart in another process."""
+        return {"factors": list(self.factors), "max_bytes": self.max_bytes, "disk_path": self.disk_path}
+
+    @staticmethod
+    def _image_bytes(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def source_size(self, path: str, frame: Optional[int] = None) -> Tuple[int, int]:
+        """(width, height) of the source; read from the file header for still images."""
+        size = self._sizes.get((path, frame))
+        if size is None:
+            if frame is None:
+                from .media_utils import resolve_media_path
+                with Image.open(resolve_media_path(path)) as image:
+                    size = image.size
+            else:
+                size = self.level(path, frame, 1).size
+            self._sizes[(path, frame)] = size
+        return size
+
+    def choose_factor(self, path: str, frame: Optional[int], size: Optional[Sequence[int]],
+                      box: Optional[Sequence[float]] = None) -> int:
+        """Coarsest factor whose level has at least `size` pixels in `box` (relative x0, y0, x1, y1)."""
+        if not size:
+            return 1
+        width, height = self.source_size(path, frame)
+        box_width, box_height = (box[2] - box[0], box[3] - box[1]) if box else (1.0, 1.0)
+        for factor in reversed(self.factors):
+            if width // factor * box_width >= size[0] and height // factor * box_height >= size[1]:
+                return factor
+        return 1
+
+    def level(self, path: str, frame: Optional[int], factor: int) -> Image.Image:
+        """The source reduced by `factor` (one of `factors`), from memory, disk or built."""
+        key = (path, frame, factor)
+        with self._lock:
+            image = self._levels.get(key)
+            if image is not None:
+                self._levels.move_to_end(key)
+                self._counters["hits"] += 1
+                return image
+        image = self._read_disk(key) if factor > 1 and self.disk_path is not None else None
+        if image is not None:
+            with self._lock:
+                self._counters["disk_hits"] += 1
+        elif factor == 1:
+            from .media_utils import load_image_from_path
+            image = load_image_from_path(path, frame=frame)
+            image.load()
+            with self._lock:
+                self._counters["source_loads"] += 1
+        else:
+            finer = self.factors[self.factors.index(factor) - 1]
+            image = _reduce(self.level(path, frame, finer), factor // finer)
+            with self._lock:
+                self._counters["builds"] += 1
+            if self.disk_path is not None:
+                self._write_disk(key, image)
+        self._insert(key, image)
+        return image
+
+    def get(self, path: str, frame: Optional[int] = None, size: Optional[Sequence[int]] = None) -> Image.Image:
+        """The smallest level at least `size` large (the source if `size` is None). Not resized."""
+        return self.level(path, frame, self.choose_factor(path, frame, size))
+
+    def region(self, path: str, frame: Optional[int], box: Sequence[float], size: Optional[Sequence[int]] = None) -> Image.Image:
+        """The relative `box` (x0, y0, x1, y1) of the source, resized to `size` if given."""
+        image = self.level(path, frame, self.choose_factor(path, frame, size, box))
+        width, height = image.size
+        cropped = image.crop((int(box[0] * width), int(box[1] * height), int(box[2] * width), int(box[3] * height)))
+        return cropped.resize(tuple(size)) if size and cropped.size != tuple(size) else cropped
+
+    def _insert(self, key: LevelKey, image: Image.Image) -> None:
+        size = self._image_bytes(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._levels.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._image_bytes(previous)
+            self._levels[key] = image
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._levels.popitem(last=False)
+                self._bytes -= self._image_bytes(evicted)
+                self._counters["evictions"] += 1
+
+    def _disk_file(self, key: LevelKey) -> str:
+        path, frame, factor = key
+        from .media_utils import resolve_media_path
+        source = resolve_media_path(path)
+        try:
+            # A changed source gets new files
+            version = os.stat(source).st_mtime_ns
+        except OSError:
+            version = 0
+        digest = hashlib.blake2b(f"{source}:{frame}:{version}".encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.disk_path, digest[:2], f"{digest}_{factor}.png")
+
+    def _read_disk(self, key: LevelKey) -> Optional[Image.Image]:
+        try:
+            with Image.open(self._disk_file(key)) as image:
+                image.load()
+                return image.copy()
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: LevelKey, image: Image.Image) -> None:
+        path = self._disk_file(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write and rename, so readers in other processes never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format="PNG")
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Drop the in-memory levels (the disk tier is kept)."""
+        with self._lock:
+            self._levels.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "levels": len(self._levels), "bytes": self._bytes}
@@ -0,0 +1,55 @@
+"""Read-only dict/list types for observation parts that are shared between steps and environments.
+
+Both subclass the builtin types, so equality, iteration and `json.dumps` behave as usual. Mutating
+methods raise TypeError; `copy.copy`/`copy.deepcopy` return plain, mutable containers.
+"""
+
+from __future__ import annotations
+import copy
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"'{type(self).__name__}' object is immutable, copy it before modifying")
+
+
+class FrozenDict(dict):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return {copy.deepcopy(key, memo): copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> list:
+        return [copy.deepcopy(item, memo) for item in self]
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value):
+    """Recursively convert dicts and lists into FrozenDict and FrozenList."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
@@ -3,42 +3,187 @@ from io import BytesIO
 from PIL import Image
 from pathlib import Path
 import os
-from . import augmentations_utils
+import threading
+from dataclasses import dataclass
+from typing import Optional
+import cv2
+import numpy as np
+from . import augmentations_utils, video_utils
 
-def load_image_from_path(image_path: str) -> Image.Image:
+def resolve_media_path(media_path: str) -> str:
     # Resolve the media path - if it's relative, make it absolute
     # Try to resolve relative to package directory first
-    if not os.path.isabs(image_path):
+    if not os.path.isabs(media_path):
         package_dir = Path(__file__).parent.parent
-        resolved_path = package_dir / image_path
+        resolved_path = package_dir / media_path
         if resolved_path.exists():
-            image_path = str(resolved_path)
+            return str(resolved_path)
+        # Try resolving from current working directory
+        resolved_path = Path(media_path).resolve()
+        if resolved_path.exists():
+            return str(resolved_path)
+    return media_path
+
+def load_image_from_path(image_path: str, frame: Optional[int] = None) -> Image.Image:
+    """Open an image, or decode frame `frame` of the video at `image_path` (see video_utils)."""
+    if frame is not None:
+        path = resolve_media_path(image_path)
+        return video_utils.decode_frames(path, [frame])[frame]
+    return Image.open(resolve_media_path(image_path))
+
+def expand_media(media_list: list) -> list:
+    """Media items with every `video` item replaced by one image item per sampled frame."""
+    if not any(media.get("type") == "video" for media in media_list):
+        return list(media_list)
+    expanded = []
+    for media in media_list:
+        if media.get("type") == "video":
+            expanded.extend(video_utils.expand_video_item(media, resolve_media_path(media.get("path"))))
         else:
-            # Try resolving from current working directory
-            resolved_path = Path(image_path).resolve()
-            if resolved_path.exists():
-                image_path = str(resolved_path)
-    
-    return Image.open(image_path)
-
-def pil_image_to_base64_str(image: Image.Image, format: str = "jpg") -> str:
-    buffered = BytesIO()
-    image.save(buffered, format=format)
-    return b64encode(buffered.getvalue()).decode("utf-8")
+            expanded.append(media)
+    return expanded
+
+def prefetch_frames(media_list: list) -> None:
+    """Decode the video frames among `media_list` with one pass per video, into the frame cache."""
+    frames_by_path = {}
+    for media in media_list:
+        if media.get("frame") is not None:
+            frames_by_path.setdefault(media.get("path"), []).append(media["frame"])
+    for path, frames in frames_by_path.items():
+        video_utils.decode_frames(resolve_media_path(path), frames)
+
+# Codecs for encoded images; without a configured codec the source format is kept (JPEG for video frames)
+IMAGE_CODECS = ("jpeg", "webp", "png")
+_PIL_FORMATS = {"jpeg": "JPEG", "webp": "WEBP", "png": "PNG"}
+_CV2_EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp", "png": ".png"}
+_buffers = threading.local()
+
+@dataclass(frozen=True, slots=True)
+class ImageEncoding:
+    """Codec (None: the source format), quality 1-100 for JPEG/WebP (None: the encoder's default) and
+    encoder ('pil' or 'cv2') of encoded images."""
+    codec: Optional[str] = None
+    quality: Optional[int] = None
+    encoder: str = "pil"
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> "ImageEncoding":
+        encoding = cls(**(config or {}))
+        if encoding.codec is not None and encoding.codec not in IMAGE_CODECS:
+            raise ValueError(f"Unknown image codec '{encoding.codec}', expected one of {IMAGE_CODECS}.")
+        if encoding.encoder not in IMAGE_ENCODERS:
+            raise ValueError(f"Unknown image encoder '{encoding.encoder}', expected one of {tuple(IMAGE_ENCODERS)}.")
+        if encoding.quality is not None and not 1 <= encoding.quality <= 100:
+            raise ValueError(f"Image quality must be between 1 and 100, got {encoding.quality}.")
+        return encoding
+
+def _encode_pil(image: Image.Image, codec: str, quality: Optional[int]) -> str:
+    if codec == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    options = {"quality": quality} if quality is not None and codec != "png" else {}
+    # One buffer per thread, overwritten in place, so its allocation is reused by every encode
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _buffers.buffer = BytesIO()
+    buffer.seek(0)
+    image.save(buffer, format=_PIL_FORMATS[codec], **options)
+    view = buffer.getbuffer()
+    try:
+        return b64encode(view[:buffer.tell()]).decode("utf-8")
+    finally:
+        view.release()
+
+def _encode_cv2(image: Image.Image, codec: str, quality: Optional[int]) -> str:
+    if image.mode not in ("RGB", "L") and (codec == "jpeg" or image.mode != "RGBA"):
+        image = image.convert("RGB")
+    array = np.asarray(image)
+    if array.ndim == 3:
+        array = cv2.cvtColor(array, cv2.COLOR_RGBA2BGRA if array.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+    params = []
+    if quality is not None and codec != "png":
+        params = [cv2.IMWRITE_JPEG_QUALITY if codec == "jpeg" else cv2.IMWRITE_WEBP_QUALITY, quality]
+    ok, data = cv2.imencode(_CV2_EXTENSIONS[codec], array, params)
+    if not ok:
+        raise ValueError(f"cv2 could not encode the image as {codec}")
+    return b64encode(data).decode("utf-8")
+
+IMAGE_ENCODERS = {
+    "pil": _encode_pil,
+    "cv2": _encode_cv2,
+}
+
+def pil_image_to_base64_str(image: Image.Image, format: str = "jpg", quality: Optional[int] = None, encoder: str = "pil") -> str:
+    # PIL uses 'JPEG' not 'JPG'
+    codec = "jpeg" if format.lower() in ("jpg", "jpeg") else format.lower()
+    if codec not in IMAGE_CODECS:
+        # Other PIL formats (e.g. BMP) with PIL's default settings
+        buffered = BytesIO()
+        image.save(buffered, format=format)
+        return b64encode(buffered.getvalue()).decode("utf-8")
+    return IMAGE_ENCODERS[encoder](image, codec, quality)
 
 def base64_str_to_pil_image(base64_str: str) -> Image.Image:
     image_data = b64decode(base64_str)
     return Image.open(BytesIO(image_data))
 
-def load_and_encode_image(image_path: str, augment: bool = True,image_resolution=(640, 480)) -> str:
+def load_and_encode_image(image_path: str, augment: bool = True,image_resolution=(640, 480), augmentations: list = None,
+                          frame: Optional[int] = None, pyramid=None, encoding: Optional[ImageEncoding] = None) -> str:
+    """Load, augment, resize and base64-encode an image (or frame `frame` of a video, as JPEG).
 
-    format = image_path.split('.')[-1].upper()
+    If `augmentations` is given (e.g. [Augmentation_types.BLUR]) exactly those functions are applied
+    instead of a random selection. With an ImagePyramidCache as `pyramid`, the image is taken from the
+    smallest cached level that is at least `image_resolution` large instead of the decoded source.
+    `encoding` selects codec, quality and encoder (default: the source format with PIL's defaults).
+    """
+
+    format = image_path.split('.')[-1].upper() if frame is None else 'JPEG'
     # PIL uses 'JPEG' not 'JPG'
     if format == 'JPG':
         format = 'JPEG'
-    image = load_image_from_path(image_path)
-    if augment:
+    if pyramid is not None:
+        image = pyramid.get(image_path, frame, image_resolution)
+    else:
+        image = load_image_from_path(image_path, frame=frame)
+    if augmentations is not None:
+        image = augmentations_utils.apply_augmentations(image, augmentations)
+    elif augment:
         image = augmentations_utils.apply_random_augmentation(image)
     if image_resolution:
         image = image.resize(image_resolution)
-    return pil_image_to_base64_str(image, format=format)
\ No newline at end of file
+    if encoding is None:
+        return pil_image_to_base64_str(image, format=format)
+    return pil_image_to_base64_str(image, format=encoding.codec or format, quality=encoding.quality, encoder=encoding.encoder)
+
+def encode_media_reference(reference: dict, augment: bool = True, pyramid=None) -> str:
+    """Load and encode a media reference produced by the environment in 'reference' media mode."""
+    image_resolution = reference.get("image_resolution")
+    encoding = ImageEncoding.from_config(reference["encoding"]) if reference.get("encoding") else None
+    return load_and_encode_image(reference["path"], augment=augment, image_resolution=tuple(image_resolution) if image_resolution else None,
+                                 frame=reference.get("frame"), pyramid=pyramid, encoding=encoding)
+
+class MediaHandle:
+    """One media item of a waypoint. Nothing is loaded until the item is selected; the encoding is
+    kept on the handle, so an image shown several times during a visit is encoded once."""
+    __slots__ = ("index", "item", "image_resolution", "encoding", "encoded")
+
+    def __init__(self, index: int, item: dict, image_resolution=(640, 480), encoding: Optional[ImageEncoding] = None):
+        self.index = index
+        self.item = item
+        self.image_resolution = image_resolution
+        self.encoding = encoding
+        self.encoded = None
+
+    def reference(self) -> dict:
+        reference = {"type": self.item.get("type"), "path": self.item.get("path"), "image_resolution": list(self.image_resolution)}
+        if self.item.get("frame") is not None:
+            reference["frame"] = self.item["frame"]
+        if self.encoding is not None:
+            reference["encoding"] = {"codec": self.encoding.codec, "quality": self.encoding.quality, "encoder": self.encoding.encoder}
+        return reference
+
+    def describe(self, shown: bool) -> dict:
+        """Catalog entry: index, type and metadata such as the camera, without the path."""
+        entry = {"index": self.index}
+        entry.update((key, value) for key, value in self.item.items() if key != "path")
+        entry["shown"] = shown
+        return entry
@@ -0,0 +1,216 @@
+"""Prompt templates that are split into static and dynamic segments once at load time."""
+
+from __future__ import annotations
+import hashlib
+from collections import OrderedDict
+from string import Formatter
+from typing import Callable, Iterable, List, Mapping, Optional, Tuple
+
+from .immutable import FrozenDict
+
+_CONVERTERS = {"r": repr, "s": str, "a": ascii}
+
+# inline: the template as written. static_first: the template text with `<field>` markers, followed
+# by a block with the field values, so everything before that block is identical on every turn.
+PROMPT_LAYOUTS = ("inline", "static_first")
+VALUES_HEADER = "\n\n## Current Values\n"
+
+
+def segment_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _chain_hash(prefix_hash: str, content_hash: str) -> str:
+    return hashlib.blake2b((prefix_hash + content_hash).encode("ascii"), digest_size=8).hexdigest()
+
+
+def _segment(text: str, static: bool, prefix_hash: str) -> dict:
+    content_hash = segment_hash(text)
+    return {"text": text, "static": static, "hash": content_hash, "prefix_hash": _chain_hash(prefix_hash, content_hash)}
+
+
+class PromptTemplate:
+    """A `str.format` template parsed once into (static text, field) segments.
+
+    `render(values)` returns exactly what `template.format(**values)` would. Templates using
+    attribute/index access or nested format specs fall back to `str.format`.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        # (literal, field_name, format_spec, conversion); field_name is None for trailing text
+        self.segments: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+        self._simple = True
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            if field_name is not None and (
+                    not field_name.isidentifier() or "{" in (format_spec or "")):
+                self._simple = False
+            self.segments.append((literal, field_name, format_spec or "", conversion))
+        self.field_names = tuple(dict.fromkeys(
+            segment[1] for segment in self.segments if segment[1] is not None))
+        self._static_segments = {}
+        # Keys of `field_texts`: the field name, qualified when a field is formatted in several ways
+        formats = {}
+        for _, field_name, format_spec, conversion in self.segments:
+            if field_name is not None:
+                formats.setdefault(field_name, set()).add((format_spec, conversion))
+        self._text_keys = [
+            None if field_name is None
+            else field_name if len(formats[field_name]) == 1
+            else f"{field_name}!{conversion or ''}:{format_spec}"
+            for _, field_name, format_spec, conversion in self.segments
+        ]
+
+    def render(self, values: Mapping) -> str:
+        if not self._simple:
+            return self.template.format(**values)
+        parts = []
+        for literal, field_name, format_spec, conversion in self.segments:
+            if literal:
+                parts.append(literal)
+            if field_name is not None:
+                value = values[field_name]
+                if conversion:
+                    value = _CONVERTERS[conversion](value)
+                parts.append(format(value, format_spec))
+        return "".join(parts)
+
+    def field_texts(self, values: Mapping) -> Optional[dict]:
+        """Formatted text of every field, or None for templates that fall back to `str.format`."""
+        if not self._simple:
+            return None
+        texts = {}
+        for (_, field_name, format_spec, conversion), key in zip(self.segments, self._text_keys):
+            if key is not None and key not in texts:
+                texts[key] = self._format_field(values, field_name, format_spec, conversion)
+        return texts
+
+    def render_texts(self, texts: Mapping) -> str:
+        """Render from already formatted field texts (see `field_texts`)."""
+        parts = []
+        for (literal, _, _, _), key in zip(self.segments, self._text_keys):
+            parts.append(literal)
+            if key is not None:
+                parts.append(texts[key])
+        return "".join(parts)
+
+    def _format_field(self, values: Mapping, field_name: str, format_spec: str, conversion: Optional[str]) -> str:
+        value = values[field_name]
+        if conversion:
+            value = _CONVERTERS[conversion](value)
+        return format(value, format_spec)
+
+    def _leading_static(self, layout: str) -> List[dict]:
+        """Segments before the first dynamic one, which are the same on every render (computed once)."""
+        segments = self._static_segments.get(layout)
+        if segments is None:
+            segments, prefix_hash = [], ""
+            if self._simple and layout == "static_first":
+                skeleton = "".join(
+                    literal + (f"<{field_name}>" if field_name is not None else "")
+                    for literal, field_name, _, _ in self.segments
+                )
+                segments.append(FrozenDict(_segment(skeleton, True, prefix_hash)))
+                if self.field_names:
+                    # Own segment, so request builders can insert static content (tool specs) before it
+                    segments.append(FrozenDict(_segment(VALUES_HEADER, True, segments[-1]["prefix_hash"])))
+            elif self._simple and self.segments and self.segments[0][0]:
+                segments.append(FrozenDict(_segment(self.segments[0][0], True, prefix_hash)))
+            self._static_segments[layout] = segments
+        return segments
+
+    def render_segments(self, values: Mapping, layout: str = "inline") -> List[dict]:
+        """The rendered prompt as ordered segments `{text, static, hash, prefix_hash}`.
+
+        `hash` identifies the segment text, `prefix_hash` the text of all segments up to and including
+        this one, so equal prefixes of different prompts have equal prefix hashes. The joined texts
+        equal `render(values)` for the inline layout.
+        """
+        if layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout '{layout}', expected one of {PROMPT_LAYOUTS}.")
+        segments = list(self._leading_static(layout))
+        prefix_hash = segments[-1]["prefix_hash"] if segments else ""
+        if not self._simple:
+            return [_segment(self.template.format(**values), False, prefix_hash)]
+
+        if layout == "static_first":
+            formatted = {}
+            for _, field_name, format_spec, conversion in self.segments:
+                if field_name is not None and field_name not in formatted:
+                    formatted[field_name] = self._format_field(values, field_name, format_spec, conversion)
+            for field_name, text in formatted.items():
+                segment = _segment(f"<{field_name}>: {text}\n", False, prefix_hash)
+                segments.append(segment)
+                prefix_hash = segment["prefix_hash"]
+            return segments
+
+        for index, (literal, field_name, format_spec, conversion) in enumerate(self.segments):
+            # The first literal is part of the leading static segments
+            if literal and index > 0:
+                segment = _segment(literal, True, prefix_hash)
+                segments.append(segment)
+                prefix_hash = segment["prefix_hash"]
+            if field_name is not None:
+                segment = _segment(self._format_field(values, field_name, format_spec, conversion), False, prefix_hash)
+                segments.append(segment)
+                prefix_hash = segment["prefix_hash"]
+        return segments
+
+
+def approximate_token_count(text: str) -> int:
+    # About four characters per token for English text with common tokenizers
+    return (len(text) + 3) // 4
+
+
+class PrefixReuseTracker:
+    """Measures how much of each prompt a prefix cache could reuse.
+
+    Feed it the `prompt_segments` of every prompt sent to the inference server (from any turn,
+    episode or environment). A prompt can reuse its longest segment prefix whose prefix hash was
+    seen before. The last `max_entries` prefixes are remembered, like a bounded server cache.
+    """
+
+    def __init__(self, max_entries: int = 100000, count_tokens: Callable[[str], int] = approximate_token_count):
+        self.max_entries = max_entries
+        self.count_tokens = count_tokens
+        self._seen: OrderedDict = OrderedDict()
+        self.prompts = 0
+        self.total_bytes = 0
+        self.reusable_bytes = 0
+        self.total_tokens = 0
+        self.reusable_tokens = 0
+
+    def observe(self, segments: Iterable[dict]) -> int:
+        """Record one prompt and return the number of bytes of it that could be reused."""
+        reusing = True
+        reused_bytes = 0
+        seen = self._seen
+        for segment in segments:
+            size = len(segment["text"].encode("utf-8"))
+            tokens = self.count_tokens(segment["text"])
+            self.total_bytes += size
+            self.total_tokens += tokens
+            prefix_hash = segment["prefix_hash"]
+            if reusing and prefix_hash in seen:
+                seen.move_to_end(prefix_hash)
+                reused_bytes += size
+                self.reusable_tokens += tokens
+            else:
+                reusing = False
+                seen[prefix_hash] = None
+                if len(seen) > self.max_entries:
+                    seen.popitem(last=False)
+        self.prompts += 1
+        self.reusable_bytes += reused_bytes
+        return reused_bytes
+
+    def summary(self) -> dict:
+        return {
+            "prompts": self.prompts,
+            "total_bytes": self.total_bytes,
+            "reusable_bytes": self.reusable_bytes,
+            "reusable_bytes_ratio": self.reusable_bytes / self.total_bytes if self.total_bytes else 0.0,
+            "total_tokens": self.total_tokens,
+            "reusable_tokens": self.reusable_tokens,
+            "reusable_tokens_ratio": self.reusable_tokens / self.total_tokens if self.total_tokens else 0.0,
+        }
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import numpy as np
 
 def create_json_schema_from_keys(output_keys: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -107,4 +107,99 @@ def create_gbnf_grammar(output_keys: List[Dict[str, Any]], tool_name_list: List[
     grammar_lines.append(f'json-output ::= "{{" ws {fields_joined} ws "}}"')
     grammar_lines.append(r'root ::= thinking? json-output')
 
-    return "\n".join(grammar_lines)
\ No newline at end of file
+    return "\n".join(grammar_lines)
+
+# Python types accepted for each JSON schema type ("float" is used by some tool specs)
+_JSON_TYPES = {
+    "string": (str,),
+    "boolean": (bool,),
+    "number": (int, float),
+    "float": (int, float),
+    "integer": (int,),
+    "object": (dict,),
+    "array": (list,),
+    "null": (type(None),),
+}
+
+# validate(value, path) -> None, or (path of the offending value, message)
+Validator = Callable[[Any, str], Optional[Tuple[str, str]]]
+
+
+def _compile(schema) -> Optional[Callable[[Any], Optional[Tuple[str, str]]]]:
+    """One check per schema node returning None or (path below the node, message)."""
+    if not schema:
+        return None
+    types = expected = None
+    reject_bool = False
+    schema_type = schema.get("type")
+    if schema_type is not None:
+        names = schema_type if isinstance(schema_type, (list, tuple)) else [schema_type]
+        types = tuple(t for name in names for t in _JSON_TYPES.get(name, ())) or None
+        # bool is an int subclass but not a JSON number
+        reject_bool = types is not None and bool not in types
+        expected = "|".join(names)
+    enum = tuple(schema["enum"]) if schema.get("enum") is not None else None
+    max_length = schema.get("maxLength", schema.get("max_length"))
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    required = tuple(schema.get("required") or ())
+    properties = tuple(
+        (name, check) for name, check in
+        ((name, _compile(sub_schema)) for name, sub_schema in (schema.get("properties") or {}).items())
+        if check is not None
+    )
+    items = _compile(schema.get("items")) if isinstance(schema.get("items"), dict) else None
+    if (types is None and enum is None and max_length is None and minimum is None and maximum is None
+            and not required and not properties and items is None):
+        return None
+
+    def check(value):
+        if types is not None and (not isinstance(value, types) or (reject_bool and isinstance(value, bool))):
+            return "", f"expected {expected}, got {type(value).__name__}"
+        if enum is not None and value not in enum:
+            return "", f"{value!r} is not one of {list(enum)}"
+        if isinstance(value, str):
+            if max_length is not None and len(value) > max_length:
+                return "", f"longer than {max_length} characters"
+        elif isinstance(value, dict):
+            for name in required:
+                if name not in value:
+                    return "", f"missing required property '{name}'"
+            for name, check_property in properties:
+                if name in value:
+                    error = check_property(value[name])
+                    if error is not None:
+                        return f".{name}{error[0]}", error[1]
+        elif isinstance(value, list):
+            if items is not None:
+                for i, item in enumerate(value):
+                    error = items(item)
+                    if error is not None:
+                        return f"[{i}]{error[0]}", error[1]
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if minimum is not None and value < minimum:
+                return "", f"{value} is less than {minimum}"
+            if maximum is not None and value > maximum:
+                return "", f"{value} is greater than {maximum}"
+        return None
+    return check
+
+
+def _accept(value: Any, path: str) -> Optional[Tuple[str, str]]:
+    return None
+
+
+def compile_validator(schema: Optional[Dict[str, Any]]) -> Validator:
+    """Compile a JSON schema subset into `validate(value, path) -> (error path, message) or None`.
+
+    Supports type, properties, required, items, enum, maxLength/max_length, minimum and maximum.
+    Unknown keywords are ignored and undeclared properties are accepted. Compile once per schema
+    and reuse the returned function: validation is then one call per checked field.
+    """
+    check = _compile(schema)
+    if check is None:
+        return _accept
+
+    def validate(value, path):
+        error = check(value)
+        return None if error is None else (f"{path}{error[0]}", error[1])
+    return validate
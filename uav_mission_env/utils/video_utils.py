@@ -0,0 +1,165 @@
+"""Video media: frame sampling and on-demand decoding with OpenCV.
+
+A `video` media item of a waypoint describes which frames are shown:
+
+    {"type": "video", "path": "data/flight_0003.mp4", "keyframe": 120}           # one frame
+    {"type": "video", "path": "...", "start": 2.0, "end": 6.0, "stride": 15}    # every 15th frame in [2 s, 6 s)
+    {"type": "video", "path": "...", "keyframe": 120, "start": 2.0, "end": 6.0}  # both
+
+`start`/`end` (seconds) default to the whole video and `stride` (frames) to one frame per second.
+An empty video, a keyframe outside the video, a stride below 1 or a window without frames is a ValueError.
+`expand_video_item` turns such an item into one image item per frame, `{"type": "image", "path",
+"frame", "timestamp"}`, using only the container's frame rate and frame count. Frames are decoded when
+an image item is encoded: in ascending order, seeking for gaps and grabbing (without color conversion)
+for short ones, so the rest of the video is never read. Decoded frames are kept in a shared
+`FrameCache`, so a frame requested again is not decoded again.
+"""
+
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import cv2
+from PIL import Image
+
+# Gaps of up to this many frames are skipped with grab() instead of a seek to the preceding keyframe
+SEEK_DISTANCE = 16
+
+
+class FrameCache:
+    """Thread-safe LRU of decoded frames, keyed by (video path, frame index), bounded by pixel bytes."""
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        self.max_bytes = max_bytes
+        self._frames: OrderedDict[Tuple[str, int], Image.Image] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _size(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, path: str, frame: int):
+        with self._lock:
+            image = self._frames.get((path, frame))
+            if image is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end((path, frame))
+            self.hits += 1
+            return image
+
+    def put(self, path: str, frame: int, image: Image.Image) -> None:
+        size = self._size(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._frames.pop((path, frame), None)
+            if previous is not None:
+                self._bytes -= self._size(previous)
+            self._frames[(path, frame)] = image
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= self._size(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "frames": len(self._frames), "bytes": self._bytes}
+
+
+# Shared by every environment of the process
+FRAME_CACHE = FrameCache()
+
+
+@lru_cache(maxsize=1024)
+def probe_video(path: str) -> Tuple[float, int]:
+    """(frames per second, frame count) from the container, without decoding frames."""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video '{path}'")
+        return capture.get(cv2.CAP_PROP_FPS) or 30.0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+
+def sample_frames(item: dict, fps: float, frame_count: int) -> List[int]:
+    """Frame indices described by a video item, ascending; raises ValueError if it describes none."""
+    path = item.get("path")
+    if frame_count <= 0:
+        raise ValueError(f"Video '{path}' has no frames")
+    frames = set()
+    keyframe = item.get("keyframe")
+    if keyframe is not None:
+        if not 0 <= int(keyframe) < frame_count:
+            raise ValueError(f"Keyframe {keyframe} of video '{path}' is outside its {frame_count} frames")
+        frames.add(int(keyframe))
+    if keyframe is None or any(key in item for key in ("start", "end", "stride")):
+        stride = item.get("stride")
+        if stride is not None and int(stride) < 1:
+            raise ValueError(f"Stride of video '{path}' must be at least 1 frame, got {stride}")
+        first = max(0, round(item.get("start", 0.0) * fps))
+        last = frame_count if item.get("end") is None else min(frame_count, round(item["end"] * fps))
+        if first >= last:
+            raise ValueError(
+                f"Time window [{item.get('start', 0.0)}, {item.get('end')}) of video '{path}' contains no frames "
+                f"(the video is {frame_count / fps:.2f} s long)"
+            )
+        frames.update(range(first, last, max(1, int(stride or round(fps)))))
+    return sorted(frames)
+
+
+def expand_video_item(item: dict, path: str) -> List[dict]:
+    """Image items for the frames of a video item; `path` is the resolved path of the video."""
+    fps, frame_count = probe_video(path)
+    extra = {key: value for key, value in item.items() if key not in ("type", "path", "keyframe", "start", "end", "stride")}
+    return [
+        {"type": "image", "path": item.get("path"), "frame": frame, "timestamp": round(frame / fps, 3), **extra}
+        for frame in sample_frames(item, fps, frame_count)
+    ]
+
+
+def decode_frames(path: str, frames: Iterable[int], cache: FrameCache = FRAME_CACHE) -> Dict[int, Image.Image]:
+    """Decoded RGB frames of the video at `path`; frames not in `cache` are decoded in one pass."""
+    images = {}
+    missing = []
+    for frame in sorted(set(frames)):
+        image = cache.get(path, frame)
+        if image is None:
+            missing.append(frame)
+        else:
+            images[frame] = image
+    if not missing:
+        return images
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video '{path}'")
+        position = None
+        for frame in missing:
+            if position is None or frame < position or frame - position > SEEK_DISTANCE:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, frame)
+                position = frame
+            while position < frame:
+                capture.grab()
+                position += 1
+            ok, bgr = capture.read()
+            position += 1
+            if not ok:
+                raise ValueError(f"Cannot decode frame {frame} of video '{path}'")
+            image = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+            cache.put(path, frame, image)
+            images[frame] = image
+    finally:
+        capture.release()
+    return images
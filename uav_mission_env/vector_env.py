@@ -0,0 +1,56 @@
+"""Synchronous vector wrapper that steps several mission environments in lockstep."""
+
+from __future__ import annotations
+from typing import List, Optional
+
+import numpy as np
+
+from .environment import MissionEnvironment
+
+
+class VectorMissionEnvironment:
+    """Steps `num_envs` MissionEnvironment instances in lockstep.
+
+    Environment `i` is reset with `seed + i`; environments that terminate or truncate are reset
+    automatically with the next unused seed of their stream, and the observation that ended the
+    episode is returned in `info['final_observation']`.
+    """
+
+    def __init__(self, num_envs: int, config: Optional[dict] = None, max_turns: int = 10):
+        if num_envs < 1:
+            raise ValueError("num_envs must be at least 1.")
+        self.num_envs = num_envs
+        self.envs = [MissionEnvironment(config=config, max_turns=max_turns) for _ in range(num_envs)]
+        self._base_seed = 0
+        self._episode_counts = [0] * num_envs
+
+    def _seed_for(self, index: int) -> int:
+        return self._base_seed + index + self.num_envs * self._episode_counts[index]
+
+    def reset(self, seed: Optional[int] = None) -> List[dict]:
+        if seed is None:
+            seed = int(np.random.randint(0, 2**31 - 1))
+        self._base_seed = seed
+        self._episode_counts = [0] * self.num_envs
+        return [env.reset(seed=self._seed_for(i)) for i, env in enumerate(self.envs)]
+
+    def step(self, actions: List[dict]):
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}.")
+        observations, rewards, terminations, truncations, infos = [], [], [], [], []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            observation, reward, terminated, truncated, info = env.step(action)
+            if terminated or truncated:
+                info['final_observation'] = observation
+                self._episode_counts[i] += 1
+                observation = env.reset(seed=self._seed_for(i))
+            observations.append(observation)
+            rewards.append(reward)
+            terminations.append(terminated)
+            truncations.append(truncated)
+            infos.append(info)
+        return observations, rewards, terminations, truncations, infos
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
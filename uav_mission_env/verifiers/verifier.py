@@ -16,6 +16,7 @@ class Verifier:
         verifiers = {
             "formatted_verifier": FormattedVerifier,
             "conclusion_verifier": ConclusionVerifier,
+            "path_length_verifier": PathLengthVerifier,
         }
         verifier_class = verifiers.get(name)
         if verifier_class is None:
@@ -46,3 +47,14 @@ class ConclusionVerifier(Verifier):
             reward += 1.0 # Predicted waypoint matches ground truth
         return reward * self.reward_factor
 
+class PathLengthVerifier(Verifier):
+    """Penalizes each flown leg by its travel cost, normalized by the longest leg of the mission."""
+
+    def __init__(self, reward_factor: float = 1.0):
+        super().__init__(name="path_length_verifier", reward_factor=reward_factor)
+
+    def verify(self, data: str, mission_manager: MissionManager) -> float:
+        travel_cost = data.get("travel_cost")
+        if travel_cost is None or mission_manager.geometry is None:
+            return 0.0
+        return -travel_cost / mission_manager.geometry.cost_scale * self.reward_factor